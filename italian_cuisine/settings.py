@@ -12,9 +12,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-og)f-1jo+j32yj)x**i=aic5b9irihk@)l_gt9r*z@lkm=o#t*'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DJANGO_DEBUG=0 activa el modo de producción: estáticos con hash y comprimidos servidos por
+# la propia aplicación (hay que ejecutar antes "python manage.py collectstatic")
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]').split(',') if host]
 
 
 # Application definition
@@ -30,11 +32,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'italian_cuisine_app.middleware.InstrumentacionSQLMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'italian_cuisine_app.middleware.EmpleadoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -51,6 +55,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'italian_cuisine_app.context_processors.empleado',
             ],
         },
     },
@@ -62,12 +67,119 @@ WSGI_APPLICATION = 'italian_cuisine.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Perfil de base de datos elegido con la variable de entorno DB_PERFIL:
+#   desarrollo (por defecto): SQLite sin ajustes, una conexión por petición.
+#   sqlite: SQLite de producción (WAL, busy timeout, mmap y transacciones IMMEDIATE).
+#           Los PRAGMA se aplican al abrir cada conexión (ver italian_cuisine_app/db.py).
+#   postgres: PostgreSQL con el pool de conexiones de Django (requiere psycopg[binary,pool], ver README).
+DB_PERFIL = os.environ.get('DB_PERFIL', 'desarrollo')
+
+SQLITE_PRAGMAS = {}
+
+if DB_PERFIL == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'italian_cuisine'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Con pool, CONN_MAX_AGE debe quedarse en 0: el pool reutiliza las conexiones
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            },
+        }
+    }
+elif DB_PERFIL == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            # Bajo ASGI cada petición usa su propio contexto y las conexiones persistentes
+            # se acumulan sin reutilizarse; abrir un archivo SQLite es barato. Solo tiene
+            # sentido subirlo (DB_CONN_MAX_AGE) si se sirve con WSGI.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Segundos que sqlite3 espera el lock antes de "database is locked"; es el
+                # busy timeout de la conexión, por eso no se repite en SQLITE_PRAGMAS
+                'timeout': 20,
+                # Toma el lock de escritura al empezar la transacción, no a mitad de ella
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -20000,
+        'temp_store': 'MEMORY',
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Base de archivo: pedidos cerrados antiguos que mueve el comando archivar_pedidos.
+# Se crea con "python manage.py migrate --database=archivo" (ver italian_cuisine_app/routers.py).
+DATABASES['archivo'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.environ.get('ARCHIVO_SQLITE_PATH', BASE_DIR / 'archivo.sqlite3'),
 }
+if DB_PERFIL == 'sqlite':
+    DATABASES['archivo'].update({
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+    })
+DATABASE_ROUTERS = ['italian_cuisine_app.routers.ArchivoRouter']
+# Días que un pedido cerrado permanece en las tablas operativas antes de archivarse
+ARCHIVO_DIAS = int(os.environ.get('ARCHIVO_DIAS', 90))
+
+
+
+# Caché por proceso (LocMemCache) salvo que se indique REDIS_URL (requiere el paquete redis).
+# Las sesiones y los usuarios solo se sirven desde la caché si es compartida: con una por proceso,
+# cerrar sesión o desactivar un usuario solo llegaría al proceso que atendió el cambio.
+CACHE_COMPARTIDA = bool(os.environ.get('REDIS_URL'))
+if CACHE_COMPARTIDA:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Motor de sesiones elegido con la variable de entorno SESIONES:
+#   cache_db (por defecto con REDIS_URL): se leen de la caché y se escriben también en
+#           django_session (italian_cuisine_app/sesiones.py; "manage.py limpiar_sesiones" borra
+#           las expiradas).
+#   cookies: firmadas en la propia cookie, sin tabla ni caché; no se pueden cerrar desde el
+#           servidor hasta que expiran.
+#   db (por defecto sin REDIS_URL): la tabla django_session en cada petición, como en Django.
+SESIONES = os.environ.get('SESIONES', 'cache_db' if CACHE_COMPARTIDA else 'db')
+SESSION_ENGINE = {
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}.get(SESIONES, 'italian_cuisine_app.sesiones')
+
+# Con caché compartida el usuario de la sesión se lee de ella (italian_cuisine_app/autenticacion.py).
+# ModelBackend sigue en la lista: las sesiones abiertas con él siguen siendo válidas.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+if CACHE_COMPARTIDA:
+    AUTHENTICATION_BACKENDS.insert(0, 'italian_cuisine_app.autenticacion.UsuarioEnCacheBackend')
+USUARIO_CACHE_TTL = int(os.environ.get('USUARIO_CACHE_TTL', 300))
+# Segundos que la versión del menú (italian_cuisine_app/menu.py) se lee de la caché sin ir a la base
+MENU_VERSION_TTL = int(os.environ.get('MENU_VERSION_TTL', 5))
 
 
 # Password validation
@@ -105,6 +217,21 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# Destino de collectstatic. Sin DEBUG, italian_cuisine_app.views.servir_estatico sirve desde aquí
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # En producción: nombres con hash (manifest) y variantes .gz/.br generadas al recolectar
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'italian_cuisine_app.estaticos.EstaticosComprimidos'
+        ),
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -119,3 +246,24 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 LOGIN_REDIRECT_URL = 'inicio'
+
+
+# Instrumentación SQL por petición (italian_cuisine_app.middleware.InstrumentacionSQLMiddleware)
+SQL_MUESTREO = float(os.environ.get('SQL_MUESTREO', 1.0 if DEBUG else 0.05))
+SQL_UMBRAL_N_MAS_1 = 5
+SQL_CONSULTAS_LENTAS = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'italian_cuisine_app.sql': {
+            'handlers': ['console'],
+            'level': os.environ.get('SQL_LOG_NIVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -1,12 +1,16 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from italian_cuisine_app import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('italian_cuisine_app.urls')),
+    # Imágenes de platos con Range y validación condicional, con o sin DEBUG
+    re_path(r'^%s(?P<ruta>.+)$' % settings.MEDIA_URL.lstrip('/'), views.servir_media),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if not settings.DEBUG:
+    # Con DEBUG, runserver sirve los estáticos directamente desde las apps
+    urlpatterns.append(re_path(r'^%s(?P<ruta>.+)$' % settings.STATIC_URL.lstrip('/'), views.servir_estatico))
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ItalianCuisineAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'italian_cuisine_app'
+
+    def ready(self):
+        # Registra las señales que invalidan la instantánea del menú y el usuario en caché, y
+        # mantienen la búsqueda de empleados
+        from . import autenticacion, busqueda, menu  # noqa: F401
+        from .db import aplicar_pragmas_sqlite
+        connection_created.connect(aplicar_pragmas_sqlite, dispatch_uid='aplicar_pragmas_sqlite')
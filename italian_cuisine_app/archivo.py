@@ -0,0 +1,131 @@
+"""Separación de pedidos activos (base ``default``) y pedidos cerrados antiguos (base ``archivo``).
+
+Las vistas operativas (mis pedidos, punto de venta, mesas, cocina) solo consultan Pedido y
+DetallePedido, que quedan pequeñas. Los reportes que necesitan todo el histórico usan los
+helpers de este módulo, que leen ambas bases y devuelven filas con la misma forma.
+"""
+import heapq
+
+from django.db import DatabaseError, connections, transaction
+
+from .models import DetalleArchivado, DetallePedido, Pedido, PedidoArchivado
+from .routers import ARCHIVO
+
+TAMANO_LOTE = 500
+
+
+def archivo_disponible():
+    """Si la base de archivo ya tiene sus tablas (``migrate --database=archivo``).
+
+    Sin ellas el archivo se trata como vacío: después de un ``migrate`` normal los reportes y
+    comandos funcionan igual, solo que sin pedidos archivados.
+    """
+    try:
+        tablas = connections[ARCHIVO].introspection.table_names()
+    except DatabaseError:
+        return False
+    return PedidoArchivado._meta.db_table in tablas and DetalleArchivado._meta.db_table in tablas
+
+
+def ids_duplicados(pedidos, lote=TAMANO_LOTE):
+    """Ids de ``pedidos`` (queryset de Pedido) que también están en el archivo.
+
+    Solo pasa si ``archivar_pedidos`` se cortó entre copiar un lote y borrarlo de la base
+    operativa; hasta la siguiente ejecución esos pedidos cuentan solo desde la base operativa.
+    """
+    if not archivo_disponible():
+        return set()
+    candidatos = pedidos.filter(estado='cerrado').order_by('id').values_list('id', flat=True)
+    duplicados = set()
+    ultimo = 0
+    while True:
+        ids = list(candidatos.filter(id__gt=ultimo)[:lote])
+        if not ids:
+            return duplicados
+        duplicados.update(PedidoArchivado.objects.filter(id__in=ids).values_list('id', flat=True))
+        ultimo = ids[-1]
+
+
+def archivar_pedidos(antes_de, lote=TAMANO_LOTE):
+    """Mueve los pedidos cerrados con fecha anterior a ``antes_de`` (y sus líneas) al archivo.
+
+    Trabaja por lotes de ``lote`` pedidos y devuelve ``(pedidos, lineas)`` movidos. Cada lote se
+    confirma primero en el archivo y después se borra de la base operativa; si el proceso se
+    corta entre ambos pasos, la siguiente ejecución vuelve a copiar ese lote sin duplicarlo.
+    """
+    total_pedidos = total_lineas = 0
+    while True:
+        ids = list(
+            Pedido.objects.filter(estado='cerrado', fecha__lt=antes_de)
+            .order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return total_pedidos, total_lineas
+
+        pedidos = [
+            PedidoArchivado(id=pk, fecha=fecha, estado=estado, total=total, mesa_numero=mesa,
+                            mesero_id=mesero_id, mesero_usuario=usuario or '')
+            for pk, fecha, estado, total, mesa, mesero_id, usuario in Pedido.objects.filter(id__in=ids).values_list(
+                'id', 'fecha', 'estado', 'total', 'mesa__numero', 'mesero_id', 'mesero__username',
+            )
+        ]
+        lineas = [
+            DetalleArchivado(id=pk, pedido_id=pedido_id, plato_id=plato_id, plato_nombre=plato,
+                             categoria_nombre=categoria, precio_unitario=precio, cantidad=cantidad, subtotal=subtotal)
+            for pk, pedido_id, plato_id, plato, categoria, precio, cantidad, subtotal
+            in DetallePedido.objects.filter(pedido_id__in=ids).values_list(
+                'id', 'pedido_id', 'plato_id', 'plato_nombre', 'categoria_nombre', 'precio_unitario', 'cantidad', 'subtotal',
+            )
+        ]
+
+        with transaction.atomic(using=ARCHIVO):
+            PedidoArchivado.objects.filter(id__in=ids).delete()
+            PedidoArchivado.objects.bulk_create(pedidos)
+            DetalleArchivado.objects.bulk_create(lineas)
+        # Los borrados masivos no pasan por DetallePedido.delete: los resúmenes del dashboard
+        # conservan las ventas archivadas
+        with transaction.atomic():
+            DetallePedido.objects.filter(pedido_id__in=ids).delete()
+            Pedido.objects.filter(id__in=ids).delete()
+
+        total_pedidos += len(pedidos)
+        total_lineas += len(lineas)
+
+
+def lineas_historial(inicio, fin, tamano_bloque=2000):
+    """Una fila por línea de pedido (o una por pedido sin líneas) con fecha en ``[inicio, fin)``.
+
+    Forma: ``(pedido, fecha, estado, mesa, mesero, total, plato, categoria, precio_unitario,
+    cantidad, subtotal)``; plato, categoría y precio son los copiados al momento de la venta.
+    Combina las bases operativa y de archivo en streaming, ordenadas por fecha e id de pedido.
+    Si el archivo aún no existe solo lee la base operativa; los pedidos presentes en las dos
+    (un ``archivar_pedidos`` interrumpido) salen una sola vez, desde la operativa.
+    """
+    pedidos = Pedido.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+    activas = (
+        pedidos.order_by('fecha', 'id', 'detallepedido__id')
+        .values_list(
+            'id', 'fecha', 'estado', 'mesa__numero', 'mesero__username', 'total',
+            'detallepedido__plato_nombre', 'detallepedido__categoria_nombre', 'detallepedido__precio_unitario',
+            'detallepedido__cantidad', 'detallepedido__subtotal',
+        )
+    )
+    # Se comprueba antes de devolver el generador: una respuesta en streaming ya enviada no
+    # puede convertirse en error a mitad del CSV
+    if not archivo_disponible():
+        return activas.iterator(chunk_size=tamano_bloque)
+    archivadas = (
+        PedidoArchivado.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+        .exclude(id__in=ids_duplicados(pedidos))
+        .order_by('fecha', 'id', 'lineas__id')
+        .values_list(
+            'id', 'fecha', 'estado', 'mesa_numero', 'mesero_usuario', 'total',
+            'lineas__plato_nombre', 'lineas__categoria_nombre', 'lineas__precio_unitario',
+            'lineas__cantidad', 'lineas__subtotal',
+        )
+    )
+    return heapq.merge(
+        archivadas.iterator(chunk_size=tamano_bloque),
+        activas.iterator(chunk_size=tamano_bloque),
+        key=lambda fila: (fila[1], fila[0]),
+    )
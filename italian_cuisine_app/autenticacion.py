@@ -0,0 +1,53 @@
+"""Usuario autenticado servido desde la caché: una petición con sesión no consulta auth_user.
+
+``UsuarioEnCacheBackend`` guarda el User en la caché por defecto bajo ``usuario:<id>``. Guardar o
+borrar el usuario (cambio de contraseña, de is_active/is_staff/is_superuser, el last_login del
+inicio de sesión) borra la entrada. La siguiente petición lo relee y Django compara el hash de la
+sesión con la contraseña nueva, así que cambiar la contraseña cierra las demás sesiones igual que
+sin caché. Los permisos de grupos y user_permissions no se guardan con el usuario: ModelBackend
+los consulta cuando se usan.
+
+La invalidación tiene que llegar a todos los procesos, así que settings solo activa este backend
+con una caché compartida (REDIS_URL); con la LocMemCache por proceso se usa ModelBackend. Las
+sesiones iniciadas con ModelBackend siguen siendo válidas: Django las atiende con él mientras
+siga en AUTHENTICATION_BACKENDS.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+USUARIO_CACHE_TTL = getattr(settings, 'USUARIO_CACHE_TTL', 300)
+
+
+def clave_usuario(user_id):
+    return f'usuario:{user_id}'
+
+
+class UsuarioEnCacheBackend(ModelBackend):
+    """ModelBackend cuyo ``get_user`` (el de AuthenticationMiddleware) lee primero la caché."""
+
+    def get_user(self, user_id):
+        usuario = cache.get(clave_usuario(user_id))
+        if usuario is None:
+            usuario = super().get_user(user_id)
+            # Un usuario inactivo o borrado no se guarda: la sesión se cierra y no vuelve a pedirse
+            if usuario is not None:
+                cache.set(clave_usuario(user_id), usuario, USUARIO_CACHE_TTL)
+        return usuario
+
+    async def aget_user(self, user_id):
+        usuario = await cache.aget(clave_usuario(user_id))
+        if usuario is None:
+            usuario = await super().aget_user(user_id)
+            if usuario is not None:
+                await cache.aset(clave_usuario(user_id), usuario, USUARIO_CACHE_TTL)
+        return usuario
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidar_usuario(sender, instance, **kwargs):
+    cache.delete(clave_usuario(instance.pk))
@@ -0,0 +1,146 @@
+"""Búsqueda de empleados por prefijo sobre nombre, apellido, usuario, email y teléfono.
+
+Cada empleado tiene en TerminoEmpleado una fila por palabra de esos campos, normalizada a
+minúsculas ASCII sin acentos (el teléfono, además, con todos sus dígitos juntos). Una búsqueda
+separa el texto en palabras de la misma forma y exige que cada una sea prefijo de algún término
+del empleado. Cada prefijo se resuelve como el rango ``[prefijo, siguiente)`` sobre el índice
+(termino, empleado): a diferencia de LIKE, que en SQLite no distingue mayúsculas y por eso no
+usa un índice común, el rango recorre el B-tree en SQLite y en PostgreSQL.
+
+Los términos se actualizan con señales al guardar un Empleado o el usuario asociado; las altas
+con ``bulk_create`` (no emiten señales) llaman a ``indexar_empleados``.
+"""
+import re
+import unicodedata
+
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+
+from .models import Empleado, TerminoEmpleado
+
+MAX_PALABRAS = 5
+TAMANO_LOTE = 500
+# Una palabra con menos coincidencias que esto guía la búsqueda desde el índice de términos
+UMBRAL_GUIA = 5000
+# Una búsqueda muy amplia se pagina sobre sus primeros TOPE_CONTEO resultados
+TOPE_CONTEO = 1000
+# Los términos solo usan estos caracteres: el orden es el mismo con cualquier collation
+_ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'
+_LARGO_TERMINO = TerminoEmpleado._meta.get_field('termino').max_length
+
+
+def palabras(texto):
+    """Palabras de un texto en minúsculas ASCII, sin acentos ni signos."""
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z0-9]+', texto)
+
+
+def terminos(first_name, last_name, email, telefono, username, email_usuario):
+    """Términos de búsqueda de un empleado a partir de sus campos y los de su usuario."""
+    encontrados = set()
+    for texto in (first_name, last_name, email, telefono, username, email_usuario):
+        encontrados.update(palabras(texto))
+    # "300 123 4567" también se encuentra escribiendo "3001234567"
+    digitos = ''.join(re.findall(r'\d', telefono or ''))
+    if digitos:
+        encontrados.add(digitos)
+    return {termino[:_LARGO_TERMINO] for termino in encontrados}
+
+
+def terminos_empleado(empleado):
+    usuario = empleado.user
+    return terminos(
+        empleado.first_name, empleado.last_name, empleado.email, empleado.telefono,
+        usuario.username if usuario else None, usuario.email if usuario else None,
+    )
+
+
+def indexar_empleados(empleados):
+    """Reescribe los términos de ``empleados`` (conviene traerlos con select_related('user'))."""
+    empleados = list(empleados)
+    with transaction.atomic():
+        TerminoEmpleado.objects.filter(empleado_id__in=[empleado.pk for empleado in empleados]).delete()
+        TerminoEmpleado.objects.bulk_create(
+            [
+                TerminoEmpleado(empleado_id=empleado.pk, termino=termino)
+                for empleado in empleados for termino in terminos_empleado(empleado)
+            ],
+            batch_size=TAMANO_LOTE,
+        )
+
+
+def _limite(prefijo):
+    """La menor cadena mayor que todas las que empiezan con ``prefijo`` (None si no hay)."""
+    for i in range(len(prefijo) - 1, -1, -1):
+        posicion = _ALFABETO.index(prefijo[i])
+        if posicion + 1 < len(_ALFABETO):
+            return prefijo[:i] + _ALFABETO[posicion + 1]
+    return None
+
+
+def _con_prefijo(prefijo):
+    terminos = TerminoEmpleado.objects.filter(termino__gte=prefijo)
+    limite = _limite(prefijo)
+    return terminos if limite is None else terminos.filter(termino__lt=limite)
+
+
+def buscar_empleados(texto, queryset=None):
+    """Filtra ``queryset`` a los empleados que tienen un término con cada palabra de ``texto`` como prefijo.
+
+    La palabra con menos coincidencias (contadas hasta UMBRAL_GUIA) guía la consulta: sus
+    empleados salen del índice (termino, empleado) y las demás palabras se comprueban por
+    empleado con EXISTS sobre (empleado, termino). Si todas las palabras son muy comunes ("ma",
+    "com") ninguna guía: coinciden con buena parte del personal, así que es más barato recorrer
+    el listado en su orden y detenerse al completar la página.
+    """
+    queryset = Empleado.objects.all() if queryset is None else queryset
+    prefijos = list(dict.fromkeys(palabras(texto)))[:MAX_PALABRAS]
+    if not prefijos:
+        return queryset
+    rangos = [_con_prefijo(prefijo) for prefijo in prefijos]
+    # Conteos acotados: cada uno lee como mucho UMBRAL_GUIA entradas del índice
+    conteos = [rango.values('empleado_id')[:UMBRAL_GUIA].count() for rango in rangos]
+    guia = min(range(len(rangos)), key=conteos.__getitem__)
+    if conteos[guia] < UMBRAL_GUIA:
+        queryset = queryset.filter(pk__in=rangos[guia].values('empleado_id'))
+    else:
+        guia = None
+    for i, rango in enumerate(rangos):
+        if i != guia:
+            queryset = queryset.filter(Exists(rango.filter(empleado_id=OuterRef('pk'))))
+    return queryset
+
+
+class PaginadorBusqueda(Paginator):
+    """Paginator que deja de contar en TOPE_CONTEO resultados; ``acotado`` indica que hay más."""
+
+    acotado = False
+
+    @cached_property
+    def count(self):
+        # Sin ORDER BY: para contar no hace falta recorrer en el orden del listado
+        cantidad = self.object_list.order_by()[:TOPE_CONTEO + 1].count()
+        self.acotado = cantidad > TOPE_CONTEO
+        return min(cantidad, TOPE_CONTEO)
+
+
+@receiver(post_save, sender=Empleado)
+def _indexar_empleado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexar_empleados([instance])
+
+
+@receiver(post_save, sender=User)
+def _indexar_usuario(sender, instance, raw=False, update_fields=None, **kwargs):
+    # El login guarda solo last_login: no cambia nada de lo que se busca
+    if raw or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return
+    empleado = Empleado.objects.filter(user=instance).first()
+    if empleado is not None:
+        empleado.user = instance
+        indexar_empleados([empleado])
@@ -0,0 +1,107 @@
+"""Cola de la pantalla de cocina y sus actualizaciones por long-polling.
+
+Cada cambio de un pedido (alta, líneas, estado) inserta una fila en ``CambioPedido`` dentro de
+la misma transacción; el id de esa fila es el cursor. La pantalla carga una vez la cola completa y
+después solo pregunta por los cambios con id mayor al último que vio; la respuesta se retiene
+hasta que hay cambios o vence la espera. La cola sale del índice ``(estado, fecha)`` de Pedido,
+así que no depende de cuántos pedidos cerrados se acumulen.
+
+El cursor solo avanza sobre ids consecutivos. En SQLite los escritores van en serie y
+AUTOINCREMENT no deja huecos, así que es exacto. En PostgreSQL un id menor puede confirmarse
+después que uno mayor (o no confirmarse nunca si su transacción se deshace): ante un hueco el
+cursor se detiene hasta ``ESPERA_HUECO`` después del cambio siguiente, y solo entonces lo salta.
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .eventos import hub
+from .models import CambioPedido, DetallePedido, Pedido
+
+ESPERA_MAXIMA = 25
+# Los cambios hechos en otro proceso no pasan por el hub: se revisa la base cada tanto
+INTERVALO_CONSULTA = 2
+LIMITE_CAMBIOS = 100
+# Tiempo máximo que una transacción puede tardar en confirmar un cambio ya numerado
+ESPERA_HUECO = timedelta(seconds=getattr(settings, 'COCINA_ESPERA_HUECO', 10))
+
+
+def _con_lineas(queryset):
+    lineas = DetallePedido.objects.only('pedido_id', 'cantidad', 'plato_nombre').order_by('id')
+    return queryset.select_related('mesa').prefetch_related(Prefetch('detallepedido_set', queryset=lineas))
+
+
+def tarjeta(pedido):
+    """Datos de un pedido para la pantalla de cocina."""
+    return {
+        'id': pedido.id,
+        'mesa': pedido.mesa.numero if pedido.mesa else None,
+        'estado': pedido.estado,
+        'fecha': pedido.fecha.isoformat(),
+        'secuencia': pedido.secuencia,
+        'lineas': [
+            {'plato': linea.plato_nombre, 'cantidad': linea.cantidad}
+            for linea in pedido.detallepedido_set.all()
+        ],
+    }
+
+
+def cola_cocina():
+    """``(secuencia, tarjetas)`` de los pedidos pendientes y en preparación, el más antiguo primero.
+
+    La secuencia se lee antes que la cola y deja fuera los últimos ``ESPERA_HUECO``: esos cambios
+    se vuelven a recibir en el primer long-poll (la pantalla reemplaza la tarjeta por id) en lugar
+    de perderse.
+    """
+    secuencia = (
+        CambioPedido.objects.filter(creado__lte=timezone.now() - ESPERA_HUECO)
+        .order_by('-id').values_list('id', flat=True).first()
+    ) or 0
+    pedidos = _con_lineas(Pedido.objects.filter(estado__in=Pedido.ESTADOS_COCINA).order_by('fecha', 'id'))
+    return secuencia, [tarjeta(pedido) for pedido in pedidos]
+
+
+def cambios_desde(secuencia, limite=LIMITE_CAMBIOS):
+    """``(tarjetas, hasta)`` de los pedidos cambiados después de ``secuencia``.
+
+    Incluye los que ya salieron de la cola. ``hasta`` es el nuevo cursor: el último id antes del
+    primer hueco que todavía podría llenarse.
+    """
+    filas = (
+        CambioPedido.objects.filter(id__gt=secuencia)
+        .order_by('id').values_list('id', 'pedido_id', 'creado')[:limite]
+    )
+    limite_hueco = timezone.now() - ESPERA_HUECO
+    hasta, pedido_ids = secuencia, {}
+    for cambio_id, pedido_id, creado in filas:
+        if cambio_id != hasta + 1 and creado > limite_hueco:
+            break
+        hasta = cambio_id
+        pedido_ids[pedido_id] = None
+    pedidos = _con_lineas(Pedido.objects.filter(pk__in=pedido_ids)).in_bulk()
+    return [tarjeta(pedidos[pk]) for pk in pedido_ids if pk in pedidos], hasta
+
+
+async def esperar_cambios(secuencia, espera=ESPERA_MAXIMA):
+    """``(tarjetas, cursor)`` en cuanto haya cambios posteriores a ``secuencia``, o ([], secuencia)
+    al vencer ``espera``."""
+    # Suscribirse antes de consultar evita perder un aviso que llegue entre ambas cosas
+    suscripcion = hub.suscribir()
+    limite = time.monotonic() + espera
+    try:
+        while True:
+            cambios, hasta = await sync_to_async(cambios_desde)(secuencia)
+            restante = limite - time.monotonic()
+            if hasta != secuencia or restante <= 0:
+                return cambios, hasta
+            try:
+                await asyncio.wait_for(suscripcion.cola.get(), min(INTERVALO_CONSULTA, restante))
+            except TimeoutError:
+                pass
+    finally:
+        hub.cancelar(suscripcion)
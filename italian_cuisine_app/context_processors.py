@@ -0,0 +1,3 @@
+def empleado(request):
+    """Agrega el empleado logueado (resuelto por EmpleadoMiddleware) al contexto de las plantillas."""
+    return {'empleado': getattr(request, 'empleado', None)}
@@ -0,0 +1,10 @@
+from django.conf import settings
+
+
+def aplicar_pragmas_sqlite(sender, connection, **kwargs):
+    """Aplica settings.SQLITE_PRAGMAS a cada conexión SQLite nueva (perfil DB_PERFIL=sqlite)."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for nombre, valor in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
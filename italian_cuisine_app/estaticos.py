@@ -0,0 +1,233 @@
+"""Estáticos y media servidos por el propio proceso de Django en producción (DEBUG apagado).
+
+``collectstatic`` copia los estáticos a STATIC_ROOT con el hash del contenido en el nombre
+(``styles.3f2a9c1b7d4e.css``, registrado en un manifest) y deja junto a cada archivo de texto
+sus variantes ``.gz`` y, si está instalado el paquete ``brotli``, ``.br``. Un nombre con hash no
+cambia nunca de contenido, así que se sirve con caché de un año e ``immutable``; el resto se
+revalida con ETag y Last-Modified.
+
+``respuesta_archivo`` responde con FileResponse (el servidor WSGI puede usar sendfile vía
+``wsgi.file_wrapper``), atiende peticiones condicionales (304/412) y un único rango de bytes
+(206/416), que es lo que piden los navegadores al reanudar descargas o recorrer imágenes grandes.
+Con ASGI el archivo se lee por bloques desde el event loop: Django juntaría en memoria todo el
+iterador síncrono de FileResponse antes de enviar el primer byte.
+"""
+import gzip
+import mimetypes
+import os
+import re
+import stat
+
+from asgiref.sync import sync_to_async
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se generan las variantes gzip
+    brotli = None
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'no-cache'
+CACHE_MEDIA = 'public, max-age=86400'
+
+EXTENSIONES_COMPRIMIBLES = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico'}
+# Por debajo de esto la cabecera de gzip se come la ganancia
+TAMANO_MINIMO_COMPRESION = 512
+# (Content-Encoding, extensión de la variante), en orden de preferencia
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que además genera las variantes comprimidas al recolectar."""
+
+    def stored_name(self, name):
+        # Una plantilla que referencia un estático inexistente (img/plato_default.jpg) sale sin
+        # hash y da 404, como con DEBUG, en lugar de convertir toda la página en un 500
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        nombres = set()
+        for original, procesado, resultado in super().post_process(paths, dry_run, **options):
+            if not isinstance(resultado, Exception):
+                nombres.add(original)
+                if procesado:
+                    nombres.add(procesado)
+            yield original, procesado, resultado
+        if not dry_run:
+            for nombre in sorted(nombres):
+                self._comprimir(nombre)
+
+    def _comprimir(self, nombre):
+        if os.path.splitext(nombre)[1].lower() not in EXTENSIONES_COMPRIMIBLES:
+            return
+        with self.open(nombre) as archivo:
+            datos = archivo.read()
+        for extension, comprimir in _compresores():
+            destino = nombre + extension
+            if self.exists(destino):
+                self.delete(destino)
+            if len(datos) < TAMANO_MINIMO_COMPRESION:
+                continue
+            comprimido = comprimir(datos)
+            # Solo se guarda si ahorra al menos un 5 %
+            if len(comprimido) < len(datos) * 0.95:
+                self._save(destino, ContentFile(comprimido))
+
+
+def _compresores():
+    # mtime=0: el mismo contenido da siempre los mismos bytes (y el mismo ETag) en cada despliegue
+    compresores = [('.gz', lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compresores.insert(0, ('.br', lambda datos: brotli.compress(datos, quality=11)))
+    return compresores
+
+
+class _Tramo:
+    """Lee solo ``largo`` bytes de un archivo ya posicionado.
+
+    No expone ``fileno``: un rango que no llega al final del archivo no puede ir por sendfile,
+    que enviaría hasta el final.
+    """
+
+    def __init__(self, archivo, largo):
+        self.archivo = archivo
+        self.restante = largo
+
+    def read(self, tamano=-1):
+        if self.restante <= 0:
+            return b''
+        tamano = self.restante if tamano is None or tamano < 0 else min(tamano, self.restante)
+        datos = self.archivo.read(tamano)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+async def _leer_async(archivo, tamano_bloque):
+    # Sin conexión a la base de datos: cualquier hilo del executor sirve
+    leer = sync_to_async(archivo.read, thread_sensitive=False)
+    while bloque := await leer(tamano_bloque):
+        yield bloque
+
+
+def _tipo(ruta):
+    tipo, _ = mimetypes.guess_type(ruta)
+    tipo = tipo or 'application/octet-stream'
+    if tipo.startswith('text/') or tipo.endswith(('javascript', 'json', '+xml')):
+        tipo += '; charset=utf-8'
+    return tipo
+
+
+def _etag(estado, sufijo=''):
+    return f'"{estado.st_size:x}-{estado.st_mtime_ns:x}{sufijo}"'
+
+
+def _rango(request, etag, modificado, tamano):
+    """``(inicio, fin)`` pedido con Range (fin incluido), None para enviar todo o False (416).
+
+    Solo se atiende un rango; varios (``bytes=0-9,20-29``) o una cabecera mal formada se
+    ignoran y se envía el archivo entero, como permite el RFC 9110.
+    """
+    coincidencia = _RANGO.match(request.META.get('HTTP_RANGE', '').strip())
+    if not coincidencia or not any(coincidencia.groups()):
+        return None
+    # If-Range: si el archivo cambió desde que el cliente guardó el trozo, va entero
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != modificado:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        if int(fin) == 0 or tamano == 0:
+            return False
+        return max(tamano - int(fin), 0), tamano - 1
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    if inicio >= tamano:
+        return False
+    return inicio, min(int(fin), tamano - 1) if fin else tamano - 1
+
+
+def _encabezados(respuesta, etag, modificado, cache_control, variable):
+    respuesta['ETag'] = etag
+    respuesta['Last-Modified'] = http_date(modificado)
+    respuesta['Cache-Control'] = cache_control
+    if variable:
+        respuesta['Vary'] = 'Accept-Encoding'
+    return respuesta
+
+
+def respuesta_archivo(request, ruta, cache_control, comprimidos=False):
+    """FileResponse de ``ruta`` con validación condicional y Range. Lanza Http404.
+
+    Con ``comprimidos``, si el cliente acepta br o gzip y existe la variante ya comprimida, se
+    envía esa (las peticiones con Range siempre reciben el archivo sin comprimir).
+    """
+    try:
+        estado = os.stat(ruta)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not stat.S_ISREG(estado.st_mode):
+        raise Http404
+
+    enviar, codificacion, sufijo = ruta, None, ''
+    variantes = []
+    if comprimidos:
+        variantes = [(nombre, ruta + extension) for nombre, extension in CODIFICACIONES if os.path.isfile(ruta + extension)]
+    if variantes and 'HTTP_RANGE' not in request.META:
+        aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for nombre, variante in variantes:
+            if re.search(rf'\b{nombre}\b', aceptadas):
+                enviar, codificacion, sufijo = variante, nombre, f'-{nombre}'
+                estado = os.stat(variante)
+                break
+
+    etag = _etag(estado, sufijo)
+    modificado = int(estado.st_mtime)
+    condicional = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if condicional is not None:
+        return _encabezados(condicional, etag, modificado, cache_control, bool(variantes))
+
+    tipo = _tipo(ruta)
+    rango = None if codificacion else _rango(request, etag, modificado, estado.st_size)
+    if rango is False:
+        respuesta = HttpResponse(status=416)
+        respuesta['Content-Range'] = f'bytes */{estado.st_size}'
+        return respuesta
+
+    archivo = open(enviar, 'rb')
+    if rango is None:
+        # filename: una variante .gz/.br conserva el nombre del original
+        respuesta = FileResponse(archivo, content_type=tipo, filename=os.path.basename(ruta))
+    else:
+        inicio, fin = rango
+        archivo.seek(inicio)
+        if fin == estado.st_size - 1:
+            # Hasta el final: el archivo posicionado sigue pudiendo ir por sendfile
+            respuesta = FileResponse(archivo, content_type=tipo, status=206)
+        else:
+            respuesta = FileResponse(_Tramo(archivo, fin - inicio + 1), content_type=tipo, status=206)
+            respuesta['Content-Length'] = fin - inicio + 1
+        respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+    if isinstance(request, ASGIRequest):
+        # Las cabeceras (Content-Length) y el cierre del archivo ya quedaron fijados por FileResponse
+        fuente = respuesta.file_to_stream
+        respuesta.streaming_content = _leer_async(fuente, respuesta.block_size)
+    if codificacion:
+        respuesta['Content-Encoding'] = codificacion
+    else:
+        respuesta['Accept-Ranges'] = 'bytes'
+    return _encabezados(respuesta, etag, modificado, cache_control, bool(variantes))
@@ -0,0 +1,121 @@
+"""Difusión en proceso de cambios de mesas y pedidos hacia los clientes conectados por SSE.
+
+Las vistas síncronas publican con ``publicar_mesa``/``publicar_pedido`` (después del commit), las
+asíncronas con ``publicar_mesa_ahora``, y cada conexión abierta en ``stream_eventos`` tiene una
+cola asyncio en su propio event loop. Un cliente inactivo solo cuesta esa cola y una corrutina
+dormida. El hub es por proceso: con varios workers cada uno difunde los cambios que atiende.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from functools import partial
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+HISTORIAL = 256
+COLA_MAXIMA = 100
+
+
+class Suscripcion:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(COLA_MAXIMA)
+        self.desbordada = False
+
+    def entregar(self, evento):
+        # Puede llamarse desde cualquier hilo; la cola solo se toca en su propio loop
+        try:
+            self.loop.call_soon_threadsafe(self._poner, evento)
+        except RuntimeError:
+            pass  # el loop ya se cerró: la conexión terminó
+
+    def _poner(self, evento):
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se corta y al reconectar recupera lo perdido con Last-Event-ID
+            self.desbordada = True
+
+
+class Hub:
+    def __init__(self, historial=HISTORIAL):
+        self._lock = threading.Lock()
+        self._suscripciones = set()
+        self._secuencia = 0
+        self._historial = deque(maxlen=historial)
+
+    def publicar(self, tipo, datos):
+        with self._lock:
+            self._secuencia += 1
+            evento = (self._secuencia, tipo, json.dumps(datos, cls=DjangoJSONEncoder))
+            self._historial.append(evento)
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            suscripcion.entregar(evento)
+
+    def suscribir(self, ultimo_id=None):
+        """Crea una suscripción en el loop actual, con los eventos posteriores a ``ultimo_id`` ya encolados."""
+        suscripcion = Suscripcion()
+        with self._lock:
+            if ultimo_id is not None:
+                for evento in self._historial:
+                    if evento[0] > ultimo_id:
+                        suscripcion._poner(evento)
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+
+hub = Hub()
+
+
+def _datos_mesa(mesa):
+    return {
+        'id': mesa.id,
+        'numero': mesa.numero,
+        'ocupada': mesa.ocupada,
+    }
+
+
+def publicar_mesa(mesa):
+    transaction.on_commit(partial(hub.publicar, 'mesa', _datos_mesa(mesa)))
+
+
+def publicar_mesa_ahora(mesa):
+    """Para vistas asíncronas: el cambio ya está confirmado (autocommit) y se publica enseguida.
+
+    ``transaction.on_commit`` consulta la conexión, algo que no se puede hacer desde el event loop.
+    """
+    hub.publicar('mesa', _datos_mesa(mesa))
+
+
+def publicar_pedido(pedido):
+    transaction.on_commit(partial(hub.publicar, 'pedido', {
+        'id': pedido.id,
+        'mesa': pedido.mesa_id,
+        'estado': pedido.estado,
+        'total': pedido.total,
+    }))
+
+
+async def flujo_sse(suscripcion, intervalo_ping=15):
+    """Generador asíncrono con el formato text/event-stream para una suscripción."""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                evento_id, tipo, datos = await asyncio.wait_for(suscripcion.cola.get(), intervalo_ping)
+            except TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ': ping\n\n'
+                continue
+            if suscripcion.desbordada:
+                break
+            yield f'id: {evento_id}\nevent: {tipo}\ndata: {datos}\n\n'
+    finally:
+        hub.cancelar(suscripcion)
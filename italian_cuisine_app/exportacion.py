@@ -0,0 +1,119 @@
+"""Exportación en streaming del histórico de pedidos a CSV (opcionalmente comprimido con gzip).
+
+Una consulta por base (operativa y de archivo) une pedido, mesa, mesero y líneas (que ya traen
+nombre y precio del plato) en la base de datos y se recorre con ``iterator(chunk_size=...)``;
+cada fila se escribe y se entrega enseguida, así que la memoria no depende del rango exportado.
+
+Con ASGI, Django consume un iterador síncrono entero (``sync_to_async(list)``) antes de enviar el
+primer byte; ``en_bloques_async`` lo recorre desde el event loop de a bloques acotados.
+"""
+import csv
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .archivo import lineas_historial
+
+TAMANO_BLOQUE = 2000
+# Bytes (o caracteres) que se juntan en cada salto al hilo síncrono con ASGI
+TAMANO_ENVIO = 64 * 1024
+
+COLUMNAS = (
+    'pedido', 'fecha', 'estado', 'mesa', 'mesero', 'total_pedido',
+    'plato', 'categoria', 'precio_unitario', 'cantidad', 'subtotal',
+)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: ``write`` devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def rango_fechas(params):
+    """``(desde, hasta)`` como fechas a partir de ``desde``/``hasta``, ``mes`` (AAAA-MM) o ``anio``.
+
+    Sin parámetros devuelve el mes en curso. Lanza ValueError si algún valor no es válido.
+    """
+    if params.get('anio'):
+        anio = int(params['anio'])
+        return date(anio, 1, 1), date(anio, 12, 31)
+    if params.get('mes'):
+        anio, mes = (int(parte) for parte in params['mes'].split('-'))
+        inicio = date(anio, mes, 1)
+        siguiente = date(anio + mes // 12, mes % 12 + 1, 1)
+        return inicio, siguiente - timedelta(days=1)
+    hoy = timezone.localdate()
+    desde = date.fromisoformat(params['desde']) if params.get('desde') else hoy.replace(day=1)
+    hasta = date.fromisoformat(params['hasta']) if params.get('hasta') else hoy
+    if hasta < desde:
+        raise ValueError("La fecha final es anterior a la inicial.")
+    return desde, hasta
+
+
+def filas_pedidos(desde, hasta, tamano_bloque=TAMANO_BLOQUE):
+    """Tuplas (una por línea de pedido; los pedidos sin líneas salen una vez) entre dos fechas."""
+    zona = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.combine(desde, time.min), zona)
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min), zona)
+    # Incluye los pedidos ya movidos a la base de archivo
+    for pedido_id, fecha, *resto in lineas_historial(inicio, fin, tamano_bloque):
+        yield (pedido_id, timezone.localtime(fecha, zona).isoformat(timespec='seconds'), *resto)
+
+
+def csv_pedidos(desde, hasta, tamano_bloque=TAMANO_BLOQUE):
+    """Genera el CSV línea a línea (str), con cabecera."""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(COLUMNAS)
+    for fila in filas_pedidos(desde, hasta, tamano_bloque):
+        yield escritor.writerow(fila)
+
+
+def comprimir(lineas, tamano_minimo=64 * 1024):
+    """Comprime en gzip un iterable de str; entrega bloques de bytes de al menos ``tamano_minimo``."""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pendiente = []
+    tamano = 0
+    for linea in lineas:
+        bloque = compresor.compress(linea.encode('utf-8'))
+        if bloque:
+            pendiente.append(bloque)
+            tamano += len(bloque)
+        if tamano >= tamano_minimo:
+            yield b''.join(pendiente)
+            pendiente, tamano = [], 0
+    pendiente.append(compresor.flush())
+    yield b''.join(pendiente)
+
+
+def _tomar(iterador, tamano_minimo):
+    partes, tamano = [], 0
+    for parte in iterador:
+        partes.append(parte)
+        tamano += len(parte)
+        if tamano >= tamano_minimo:
+            break
+    return partes
+
+
+async def en_bloques_async(iterable, tamano_minimo=TAMANO_ENVIO):
+    """Iterador asíncrono sobre un iterable síncrono de str o bytes (csv_pedidos, comprimir).
+
+    Cada salto de hilo avanza el iterable hasta juntar ``tamano_minimo`` y entrega ese bloque
+    unido, así que la memoria queda acotada a un bloque. Los saltos van al mismo hilo
+    (``thread_sensitive``), que es el dueño de la conexión y del cursor de la consulta.
+    """
+    iterador = iter(iterable)
+    tomar = sync_to_async(_tomar)
+    try:
+        while partes := await tomar(iterador, tamano_minimo):
+            # str o bytes, según el iterable
+            yield partes[0][:0].join(partes)
+    finally:
+        cerrar = getattr(iterador, 'close', None)
+        if cerrar is not None:
+            # Cierra el generador (y su cursor) en el hilo donde corrió, aunque el cliente se vaya antes
+            await sync_to_async(cerrar)()
@@ -30,3 +30,10 @@ class EmpleadoModelForm(forms.ModelForm):
             empleado.save()
         return empleado
 
+
+
+class ImagenPlatoForm(forms.Form):
+    """Valida con Pillow la imagen subida para un plato antes de guardar nada."""
+    imagen = forms.ImageField(required=False, error_messages={
+        'invalid_image': "El archivo subido no es una imagen válida o está dañado.",
+    })
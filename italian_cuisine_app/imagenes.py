@@ -0,0 +1,144 @@
+"""Almacenamiento por contenido y variantes redimensionadas de Plato.imagen.
+
+``AlmacenPorContenido`` guarda cada imagen subida como ``platos/<sha256>.<ext>``: la misma foto
+subida dos veces es un solo archivo, y como un nombre nunca cambia de contenido su URL se puede
+cachear para siempre (ver ``servir_media``).
+
+Cada imagen ``platos/foto.jpg`` genera ``platos/variantes/foto_<ancho>w.webp`` para cada ancho
+de ``ANCHOS`` menor que el original. Las variantes se escriben con el mismo storage que la imagen.
+Si Pillow no puede leer la imagen (``ERRORES_IMAGEN``) el plato se queda sin variantes y las
+plantillas usan el original.
+"""
+import hashlib
+import os
+import posixpath
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.utils.crypto import get_random_string
+from PIL import Image, ImageOps
+
+ANCHOS = (160, 320, 640)
+CALIDAD = 75
+CARPETA = 'variantes'
+
+# Lo que puede lanzar Pillow con un archivo que no es una imagen, está dañado o es demasiado grande
+ERRORES_IMAGEN = (OSError, ValueError, Image.DecompressionBombError)
+
+_POR_CONTENIDO = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+
+def huella(contenido):
+    """SHA-256 hexadecimal de un File, leído por bloques (la memoria no depende del tamaño)."""
+    digest = hashlib.sha256()
+    for bloque in contenido.chunks():
+        digest.update(bloque)
+    return digest.hexdigest()
+
+
+def es_por_contenido(nombre):
+    """True si ``nombre`` es un original guardado por AlmacenPorContenido (su contenido no cambia)."""
+    return bool(_POR_CONTENIDO.match(posixpath.basename(nombre)))
+
+
+class AlmacenPorContenido(FileSystemStorage):
+    """FileSystemStorage que nombra cada archivo por el SHA-256 de su contenido.
+
+    Las variantes (carpeta ``variantes/``) conservan el nombre que les da ``ruta_variante``: ya
+    derivan de la huella del original.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if posixpath.basename(posixpath.dirname(str(name).replace('\\', '/'))) == CARPETA:
+            return super().save(name, content, max_length)
+
+        nombre = self.nombre_por_contenido(name, content)
+        validate_file_name(nombre, allow_relative_path=True)
+        if not self.exists(nombre):
+            self._guardar(nombre, content)
+        return nombre
+
+    @staticmethod
+    def nombre_por_contenido(name, content):
+        """``<carpeta de name>/<sha256 de content>.<extensión de name en minúsculas>``."""
+        carpeta, archivo = posixpath.split(str(name).replace('\\', '/'))
+        return posixpath.join(carpeta, huella(content) + posixpath.splitext(archivo)[1].lower())
+
+    def _guardar(self, nombre, content):
+        # Se escribe con otro nombre y se renombra: quien vea el archivo lo ve completo, y dos
+        # subidas simultáneas de la misma foto acaban en el mismo archivo en lugar de en dos
+        carpeta = posixpath.dirname(nombre)
+        temporal = super()._save(posixpath.join(carpeta, f'.{get_random_string(12)}.subida'), content)
+        try:
+            os.replace(self.path(temporal), self.path(nombre))
+        except OSError:
+            self.delete(temporal)
+            raise
+
+
+def ruta_variante(nombre, ancho):
+    carpeta, archivo = posixpath.split(nombre)
+    base = posixpath.splitext(archivo)[0]
+    return posixpath.join(carpeta, CARPETA, f'{base}_{ancho}w.webp')
+
+
+def generar_variantes(imagen):
+    """Genera (o regenera) las variantes de un FieldFile ya guardado. Devuelve los anchos creados."""
+    storage = imagen.storage
+    with storage.open(imagen.name, 'rb') as archivo:
+        original = Image.open(archivo)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    creados = []
+    for ancho in ANCHOS:
+        if ancho >= original.width:
+            break
+        alto = round(original.height * ancho / original.width)
+        variante = original.resize((ancho, alto), Image.Resampling.LANCZOS)
+        salida = BytesIO()
+        variante.save(salida, 'WEBP', quality=CALIDAD, method=4)
+        ruta = ruta_variante(imagen.name, ancho)
+        if storage.exists(ruta):
+            storage.delete(ruta)
+        storage.save(ruta, ContentFile(salida.getvalue()))
+        creados.append(ancho)
+    return creados
+
+
+def borrar_variantes(storage, nombre):
+    """Borra las variantes de la imagen ``nombre`` (no el original)."""
+    for ancho in ANCHOS:
+        ruta = ruta_variante(nombre, ancho)
+        if storage.exists(ruta):
+            storage.delete(ruta)
+
+
+def variantes_existentes(imagen):
+    """Lista de ``(url, ancho)`` de las variantes disponibles en el storage."""
+    storage = imagen.storage
+    variantes = []
+    for ancho in ANCHOS:
+        ruta = ruta_variante(imagen.name, ancho)
+        if storage.exists(ruta):
+            variantes.append((storage.url(ruta), ancho))
+    return variantes
+
+
+def atributos_imagen(imagen):
+    """``(src, srcset)`` para un <img>: la variante mediana como src y todas las variantes en srcset."""
+    variantes = variantes_existentes(imagen)
+    if not variantes:
+        return imagen.url, ''
+    src = variantes[min(1, len(variantes) - 1)][0]
+    srcset = ', '.join(f'{url} {ancho}w' for url, ancho in variantes)
+    return src, srcset
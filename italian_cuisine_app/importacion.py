@@ -0,0 +1,299 @@
+"""Importación masiva del menú (platos y categorías) desde CSV o JSON.
+
+Los archivos se leen en streaming: CSV fila a fila y JSON objeto a objeto (un arreglo de objetos
+o JSON Lines), así que la memoria depende del tamaño del lote y no del archivo. Cada lote se
+escribe en su propia transacción: los platos nuevos con ``bulk_create`` y los modificados con
+``bulk_update``. Una fila inválida, o un objeto JSON mal formado, se anota en el reporte con su
+número de línea sin detener el resto de la importación.
+
+Columnas: ``nombre``, ``categoria``, ``precio`` (obligatorias), ``descripcion`` y ``disponible``.
+Un plato existente se reconoce por categoría + nombre sin distinguir mayúsculas y se actualiza
+solo si algún valor cambió.
+"""
+import csv
+import io
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .menu import invalidar_menu
+from .models import Categoria, Plato
+
+TAMANO_LOTE = 500
+BLOQUE_LECTURA = 64 * 1024
+# Un objeto JSON más largo que esto se da por mal formado en lugar de seguir leyendo
+MAX_OBJETO = 1024 * 1024
+# Filas por UPDATE de bulk_update (arma un CASE por fila y campo)
+LOTE_ACTUALIZACION = 100
+FORMATOS = ('csv', 'json')
+
+# Tras un objeto mal formado, la lectura sigue en la próxima línea que empieza con "{"
+_INICIO_OBJETO = re.compile(r'\n[ \t\r,\[]*(?=\{)')
+
+_VERDADEROS = {'1', 'true', 'si', 'sí', 'yes', 'x'}
+_FALSOS = {'0', 'false', 'no'}
+
+
+class ErrorImportacion(Exception):
+    """Fila que no se puede importar; el mensaje va al reporte."""
+
+
+def detectar_formato(nombre_archivo):
+    """Formato según la extensión (``.csv``, ``.json``, ``.jsonl``) o None."""
+    extension = nombre_archivo.rsplit('.', 1)[-1].lower() if '.' in nombre_archivo else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('json', 'jsonl', 'ndjson'):
+        return 'json'
+    return None
+
+
+def leer_csv(texto):
+    """Genera ``(numero_fila, dict)``; la fila 1 es la cabecera.
+
+    Una fila que el módulo csv no puede leer se entrega como ``(numero, ErrorImportacion)`` y la
+    lectura sigue con la siguiente.
+    """
+    lector = csv.DictReader(texto)
+    while True:
+        try:
+            fila = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield lector.line_num, ErrorImportacion(f"CSV inválido: {e}")
+            continue
+        yield lector.line_num, fila
+
+
+def leer_json(texto):
+    """Genera ``(linea, dict)`` de un arreglo JSON o de JSON Lines sin cargar el archivo entero.
+
+    ``linea`` es la línea donde empieza el objeto. Un objeto mal formado se entrega como
+    ``(linea, ErrorImportacion)`` y la lectura sigue en la siguiente línea que empieza un objeto;
+    el buffer nunca pasa de MAX_OBJETO más un bloque.
+    """
+    decodificador = json.JSONDecoder()
+    buffer = ''
+    linea = 1
+    fin = False
+    saltando = False
+    while True:
+        if saltando:
+            coincidencia = _INICIO_OBJETO.search(buffer)
+            if coincidencia is None:
+                if fin:
+                    return
+                # Lo anterior al último salto de línea ya no puede contener el próximo objeto
+                corte = buffer.rfind('\n')
+                corte = len(buffer) if corte < 0 else corte
+                linea += buffer.count('\n', 0, corte)
+                bloque = texto.read(BLOQUE_LECTURA)
+                fin = not bloque
+                buffer = buffer[corte:] + bloque
+                continue
+            linea += buffer.count('\n', 0, coincidencia.end())
+            buffer = buffer[coincidencia.end():]
+            saltando = False
+
+        # Descarta separadores entre objetos: espacios, comas y los corchetes del arreglo
+        resto = buffer.lstrip(' \t\r\n,[]')
+        linea += buffer.count('\n', 0, len(buffer) - len(resto))
+        buffer = resto
+        if not buffer:
+            if fin:
+                return
+            bloque = texto.read(BLOQUE_LECTURA)
+            fin = not bloque
+            buffer = bloque
+            continue
+        try:
+            objeto, posicion = decodificador.raw_decode(buffer)
+        except json.JSONDecodeError as e:
+            # El error está al final del buffer: el objeto quedó partido entre dos bloques
+            partido = e.pos >= len(buffer.rstrip()) or e.msg.startswith('Unterminated string')
+            if partido and not fin and len(buffer) < MAX_OBJETO:
+                bloque = texto.read(BLOQUE_LECTURA)
+                fin = not bloque
+                buffer += bloque
+                continue
+            yield linea, ErrorImportacion(f"JSON inválido: {e.msg}.")
+            saltando = True
+            continue
+        yield linea, objeto
+        linea += buffer.count('\n', 0, posicion)
+        buffer = buffer[posicion:]
+
+
+def leer_archivo(archivo, formato):
+    """Abre un archivo binario como texto UTF-8 (con o sin BOM) y devuelve el lector adecuado."""
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    return leer_csv(texto) if formato == 'csv' else leer_json(texto)
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    return '' if valor is None else str(valor).strip()
+
+
+def _disponible(valor):
+    if isinstance(valor, bool):
+        return valor
+    valor = '' if valor is None else str(valor).strip().lower()
+    # Una columna vacía cuenta como disponible, igual que el valor por defecto del modelo
+    if not valor or valor in _VERDADEROS:
+        return True
+    if valor in _FALSOS:
+        return False
+    raise ErrorImportacion(f"'disponible' no reconocido: {valor!r}.")
+
+
+def validar_fila(fila):
+    """Normaliza una fila a ``(nombre, categoria, precio, descripcion, disponible)``."""
+    if isinstance(fila, ErrorImportacion):
+        # El lector no pudo leer la fila: se reporta como cualquier otra fila inválida
+        raise fila
+    if not isinstance(fila, dict):
+        raise ErrorImportacion("Se esperaba un objeto con los campos del plato.")
+    nombre = _texto(fila, 'nombre')
+    categoria = _texto(fila, 'categoria')
+    if not nombre:
+        raise ErrorImportacion("Falta el nombre del plato.")
+    if not categoria:
+        raise ErrorImportacion("Falta la categoría.")
+    if len(nombre) > Plato._meta.get_field('nombre').max_length:
+        raise ErrorImportacion("El nombre del plato es demasiado largo.")
+    if len(categoria) > Categoria._meta.get_field('nombre').max_length:
+        raise ErrorImportacion("El nombre de la categoría es demasiado largo.")
+    try:
+        precio = Decimal(_texto(fila, 'precio')).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ErrorImportacion(f"Precio inválido: {fila.get('precio')!r}.")
+    if not precio.is_finite() or precio < 0 or precio >= Decimal('1000000'):
+        raise ErrorImportacion(f"Precio fuera de rango: {precio}.")
+    return nombre, categoria, precio, _texto(fila, 'descripcion'), _disponible(fila.get('disponible'))
+
+
+class Importador:
+    """Aplica las filas por lotes y acumula el reporte."""
+
+    def __init__(self, tamano_lote=TAMANO_LOTE):
+        self.tamano_lote = tamano_lote
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.categorias_creadas = 0
+        self.errores = []
+        # Las categorías son pocas: se resuelven una sola vez para todo el archivo
+        self.categorias = {
+            nombre.lower(): pk for pk, nombre in Categoria.objects.values_list('id', 'nombre')
+        }
+
+    def reporte(self):
+        return {
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'sin_cambios': self.sin_cambios,
+            'categorias_creadas': self.categorias_creadas,
+            'errores': [{'fila': numero, 'error': mensaje} for numero, mensaje in self.errores],
+        }
+
+    def importar(self, filas):
+        filas = iter(filas)
+        try:
+            # Los lectores entregan las filas ilegibles como ErrorImportacion: no cortan el lote
+            while True:
+                lote = list(islice(filas, self.tamano_lote))
+                if not lote:
+                    break
+                self._procesar_lote(lote)
+        finally:
+            # Las escrituras masivas no emiten señales: se invalida el menú una vez al final
+            if self.creados or self.actualizados or self.categorias_creadas:
+                invalidar_menu()
+        return self.reporte()
+
+    def _procesar_lote(self, lote):
+        validas = {}
+        for numero, fila in lote:
+            try:
+                nombre, categoria, precio, descripcion, disponible = validar_fila(fila)
+            except ErrorImportacion as e:
+                self.errores.append((numero, str(e)))
+                continue
+            # Dentro del archivo, la última aparición de un plato es la que vale
+            validas[(categoria.lower(), nombre.lower())] = (numero, nombre, categoria, precio, descripcion, disponible)
+        if not validas:
+            return
+
+        try:
+            with transaction.atomic():
+                nuevas = self._crear_categorias(v[2] for v in validas.values())
+                creados, actualizados, sin_cambios = self._guardar_platos(validas)
+        except DatabaseError as e:
+            self.errores.extend((v[0], f"Lote descartado por error de base de datos: {e}") for v in validas.values())
+            # Los ids de categorías creadas en la transacción revertida ya no existen
+            self.categorias = {
+                nombre.lower(): pk for pk, nombre in Categoria.objects.values_list('id', 'nombre')
+            }
+            return
+        self.categorias_creadas += nuevas
+        self.creados += creados
+        self.actualizados += actualizados
+        self.sin_cambios += sin_cambios
+
+    def _crear_categorias(self, nombres):
+        faltantes = {}
+        for nombre in nombres:
+            if nombre.lower() not in self.categorias:
+                faltantes.setdefault(nombre.lower(), nombre)
+        if not faltantes:
+            return 0
+        # Otra importación pudo crearlas después de cargar self.categorias: esas no se cuentan
+        existentes = set(Categoria.objects.filter(nombre__in=faltantes.values()).values_list('nombre', flat=True))
+        nuevas = [Categoria(nombre=nombre) for nombre in faltantes.values() if nombre not in existentes]
+        Categoria.objects.bulk_create(nuevas, ignore_conflicts=True)
+        # ignore_conflicts no devuelve ids: se releen las categorías recién creadas
+        creadas = Categoria.objects.filter(nombre__in=faltantes.values()).values_list('id', 'nombre')
+        self.categorias.update((nombre.lower(), pk) for pk, nombre in creadas)
+        return len(nuevas)
+
+    def _guardar_platos(self, validas):
+        claves = {(self.categorias[cat], nombre): (cat, nombre) for cat, nombre in validas}
+        # Se comparan los nombres en Python: LOWER() de SQLite solo baja letras ASCII
+        existentes = {}
+        consulta = Plato.objects.filter(categoria_id__in={c for c, _ in claves}).values_list(
+            'id', 'categoria_id', 'nombre', 'precio', 'descripcion', 'disponible'
+        )
+        for pk, categoria_id, *valores in consulta:
+            existentes.setdefault((categoria_id, valores[0].lower()), (pk, tuple(valores)))
+
+        ahora = timezone.now()
+        nuevos, cambiados = [], []
+        for (categoria_id, n), clave in claves.items():
+            _, nombre, _, precio, descripcion, disponible = validas[clave]
+            valores = (nombre, precio, descripcion, disponible)
+            actual = existentes.get((categoria_id, n))
+            if actual is None:
+                nuevos.append(Plato(nombre=nombre, categoria_id=categoria_id, precio=precio,
+                                    descripcion=descripcion, disponible=disponible))
+            elif actual[1] != valores:
+                # La marca de la API de menú se pone a mano: bulk_update no aplica auto_now
+                cambiados.append(Plato(id=actual[0], nombre=nombre, precio=precio, descripcion=descripcion,
+                                       disponible=disponible, actualizado=ahora))
+
+        Plato.objects.bulk_create(nuevos)
+        Plato.objects.bulk_update(
+            cambiados, ['nombre', 'precio', 'descripcion', 'disponible', 'actualizado'],
+            batch_size=LOTE_ACTUALIZACION,
+        )
+        return len(nuevos), len(cambiados), len(claves) - len(nuevos) - len(cambiados)
+
+
+def importar_menu(archivo, formato, tamano_lote=TAMANO_LOTE):
+    """Importa un archivo binario abierto; devuelve el reporte ``{creados, actualizados, ...}``."""
+    return Importador(tamano_lote).importar(leer_archivo(archivo, formato))
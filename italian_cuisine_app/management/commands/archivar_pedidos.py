@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.utils import timezone
+
+from italian_cuisine_app.archivo import TAMANO_LOTE, archivar_pedidos
+
+
+class Command(BaseCommand):
+    help = "Mueve los pedidos cerrados antiguos (con sus líneas) a la base de archivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.ARCHIVO_DIAS,
+                            help="Archiva los pedidos cerrados con más de estos días (ARCHIVO_DIAS).")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Pedidos por transacción.")
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['lote'] < 1:
+            raise CommandError("--dias no puede ser negativo y --lote debe ser mayor que cero.")
+        antes_de = timezone.now() - timedelta(days=options['dias'])
+        try:
+            pedidos, lineas = archivar_pedidos(antes_de, options['lote'])
+        except DatabaseError as e:
+            raise CommandError(
+                f"No se pudo archivar ({e}). ¿Se creó la base de archivo con "
+                "'python manage.py migrate --database=archivo'?"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Pedidos archivados: {pedidos} ({lineas} líneas) cerrados antes del {antes_de:%Y-%m-%d}."
+        ))
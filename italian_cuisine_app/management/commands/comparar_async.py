@@ -0,0 +1,290 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.test import Client, override_settings
+from django.urls import path
+from django.utils.crypto import get_random_string
+from django.views import View
+from django.views.decorators.http import require_POST
+
+from italian_cuisine_app import views
+from italian_cuisine_app.eventos import publicar_mesa
+from italian_cuisine_app.models import Empleado, Mesa, Pedido, Plato
+
+from .poblar_datos import PREFIJO
+from .simular_carga import percentil
+
+
+# Versiones síncronas de referencia. La app sirve las asíncronas de views.py; estas solo existen
+# para que el benchmark compare ambas sobre el mismo trabajo.
+
+@login_required
+def obtener_plato(request, pk):
+    """Retorna los datos de un plato en formato JSON."""
+    plato = get_object_or_404(Plato, pk=pk)
+    data = {
+        'id': plato.id,
+        'nombre': plato.nombre,
+        'descripcion': plato.descripcion,
+        'precio': float(plato.precio),
+        'categoria': plato.categoria.id if plato.categoria else None,
+        'disponible': plato.disponible,
+    }
+    return JsonResponse(data)
+
+
+class EditarPlatoView(LoginRequiredMixin, View):
+    def post(self, request):
+        plato_id = request.POST.get('plato_id')
+        plato = get_object_or_404(Plato, id=plato_id)
+        imagen, error = views.imagen_subida(request)
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        plato.nombre = request.POST.get('nombre')
+        plato.descripcion = request.POST.get('descripcion')
+        plato.precio = request.POST.get('precio')
+        plato.disponible = 'disponible' in request.POST
+        categoria_id = request.POST.get('categoria')
+        if categoria_id:
+            plato.categoria_id = categoria_id
+        if imagen:
+            plato.imagen = imagen
+        plato.save()
+        messages.success(request, f"✅ Plato '{plato.nombre}' actualizado correctamente.")
+        return JsonResponse({'success': True})
+
+
+@require_POST
+@login_required
+def cambiar_estado_mesa(request, pk):
+    # Alterna la mesa en el propio UPDATE (ocupada = NOT ocupada), sin leer-modificar-escribir
+    with transaction.atomic():
+        cambiadas = Mesa.objects.filter(pk=pk).update(
+            ocupada=Case(When(ocupada=True, then=Value(False)), default=Value(True))
+        )
+        if not cambiadas:
+            raise Http404("Mesa no encontrada.")
+        mesa = Mesa.objects.only('numero', 'ocupada').get(pk=pk)
+        publicar_mesa(mesa)
+    return JsonResponse({"success": True, "ocupada": mesa.ocupada})
+
+
+# URLconf del benchmark: cada endpoint en su versión síncrona y asíncrona
+urlpatterns = [
+    path('sync/plato/<int:pk>/', obtener_plato),
+    path('async/plato/<int:pk>/', views.obtener_plato_async),
+    path('sync/plato/editar/', EditarPlatoView.as_view()),
+    path('async/plato/editar/', views.editar_plato_async),
+    path('sync/mesa/<int:pk>/cambiar/', cambiar_estado_mesa),
+    path('async/mesa/<int:pk>/cambiar/', views.cambiar_estado_mesa_async),
+    path('sync/pedidos/crear/', views.CrearPedidoView.as_view()),
+    path('async/pedidos/crear/', views.crear_pedido_async),
+]
+
+ENDPOINTS = ('obtener_plato', 'editar_plato', 'cambiar_estado_mesa', 'crear_pedido')
+VARIANTES = ('sync', 'async')
+
+
+class ClienteASGI:
+    """Cliente HTTP mínimo que habla ASGI directamente con la aplicación, sin sockets.
+
+    Cada petición pasa por el mismo ASGIHandler y la misma cadena de middleware que en el
+    despliegue, así que las vistas síncronas pagan su salto de hilo y las asíncronas no.
+    """
+
+    def __init__(self, aplicacion, host, cookies, csrf):
+        self.aplicacion = aplicacion
+        self.host = host
+        self.cookies = '; '.join(f'{nombre}={valor}' for nombre, valor in cookies.items())
+        self.csrf = csrf
+
+    async def peticion(self, metodo, ruta, datos=None):
+        cuerpo = urlencode(datos or {}, doseq=True).encode() if metodo == 'POST' else b''
+        encabezados = [
+            (b'host', self.host.encode()),
+            (b'cookie', self.cookies.encode()),
+            (b'x-requested-with', b'XMLHttpRequest'),
+            (b'x-csrftoken', self.csrf.encode()),
+        ]
+        if cuerpo:
+            encabezados += [
+                (b'content-type', b'application/x-www-form-urlencoded'),
+                (b'content-length', str(len(cuerpo)).encode()),
+            ]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': metodo, 'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(),
+            'query_string': b'', 'root_path': '', 'headers': encabezados,
+            'client': ('127.0.0.1', 0), 'server': (self.host, 80),
+        }
+        pendientes = [{'type': 'http.request', 'body': cuerpo, 'more_body': False}]
+
+        async def receive():
+            if pendientes:
+                return pendientes.pop()
+            # El handler espera aquí una desconexión que nunca llega; se cancela al responder
+            await asyncio.Future()
+
+        respuesta = {'estado': None, 'cuerpo': []}
+
+        async def send(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                respuesta['estado'] = mensaje['status']
+            elif mensaje['type'] == 'http.response.body':
+                respuesta['cuerpo'].append(mensaje.get('body', b''))
+
+        await self.aplicacion(scope, receive, send)
+        return respuesta['estado'], b''.join(respuesta['cuerpo'])
+
+
+class Command(BaseCommand):
+    help = ("Compara peticiones por segundo y latencias p50/p95/p99 de las versiones síncrona y "
+            "asíncrona de los endpoints JSON bajo ASGI, con muchos clientes concurrentes. Modifica "
+            "datos (edita platos, crea y cierra pedidos): úsalo sobre una base de prueba.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=50, help="Clientes concurrentes.")
+        parser.add_argument('--peticiones', type=int, default=20, help="Peticiones por cliente y variante.")
+        parser.add_argument('--endpoint', choices=ENDPOINTS, action='append',
+                            help="Endpoint a medir (repetible; por defecto, todos).")
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--semilla', type=int, default=7)
+        parser.add_argument('--salida', help="Archivo donde escribir el informe JSON (por defecto, stdout).")
+
+    def handle(self, *args, **options):
+        if options['clientes'] < 1 or options['peticiones'] < 1:
+            raise CommandError("--clientes y --peticiones deben ser mayores que cero.")
+        usuarios = [
+            empleado.user for empleado in
+            Empleado.objects.filter(user__username__startswith=PREFIJO, cargo='mesero').select_related('user')
+        ]
+        platos = {
+            plato.id: plato for plato in
+            Plato.objects.filter(disponible=True).only('nombre', 'descripcion', 'precio', 'categoria_id')
+        }
+        if not usuarios or not platos or not Mesa.objects.exists():
+            raise CommandError("No hay datos simulados: ejecuta primero 'manage.py poblar_datos'.")
+
+        informe = {'endpoints': {}}
+        with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, options['host']]):
+            clientes = self._sesiones(usuarios, options)
+            for endpoint in options['endpoint'] or ENDPOINTS:
+                informe['endpoints'][endpoint] = {
+                    variante: self._medir(endpoint, variante, clientes, platos, options)
+                    for variante in VARIANTES
+                }
+        informe['configuracion'] = {
+            clave: options[clave] for clave in ('clientes', 'peticiones', 'semilla')
+        }
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+            self.stdout.write(self.style.SUCCESS(f"Informe escrito en {options['salida']}."))
+        else:
+            self.stdout.write(salida)
+
+    def _sesiones(self, usuarios, options):
+        """Una sesión iniciada (y un token CSRF) por cliente, repartiendo los meseros simulados."""
+        aplicacion = ASGIHandler()
+        clientes = []
+        for i in range(options['clientes']):
+            cliente = Client()
+            cliente.force_login(usuarios[i % len(usuarios)])
+            csrf = get_random_string(32)
+            cookies = {nombre: morsel.value for nombre, morsel in cliente.cookies.items()}
+            cookies[settings.CSRF_COOKIE_NAME] = csrf
+            clientes.append(ClienteASGI(aplicacion, options['host'], cookies, csrf))
+        return clientes
+
+    def _medir(self, endpoint, variante, clientes, platos, options):
+        mesas_libres = list(Mesa.objects.filter(ocupada=False).values_list('id', flat=True))
+        mesas = list(Mesa.objects.values_list('id', flat=True))
+        if endpoint == 'crear_pedido' and len(clientes) > len(mesas_libres):
+            self.stderr.write(
+                f"Hay {len(mesas_libres)} mesas libres para {len(clientes)} clientes: los que comparten "
+                f"mesa recibirán 409 cuando la encuentren ocupada."
+            )
+        cerrar_pedido = sync_to_async(self._cerrar_pedidos)
+
+        async def cliente(indice, sesion):
+            rng = random.Random(options['semilla'] + indice)
+            medidas = []
+            for i in range(options['peticiones']):
+                metodo, ruta, datos = self._peticion(
+                    endpoint, variante, rng, indice, i, options['peticiones'], platos, mesas, mesas_libres,
+                )
+                inicio = time.perf_counter()
+                estado, cuerpo = await sesion.peticion(metodo, ruta, datos)
+                medidas.append((time.perf_counter() - inicio, estado))
+                if endpoint == 'crear_pedido' and estado == 200:
+                    # Fuera de la medición: el pedido se cierra y su mesa queda libre para el siguiente
+                    await cerrar_pedido([json.loads(cuerpo)['id']])
+            return medidas
+
+        async def todos():
+            inicio = time.perf_counter()
+            resultados = await asyncio.gather(*(cliente(i, s) for i, s in enumerate(clientes)))
+            return time.perf_counter() - inicio, [medida for medidas in resultados for medida in medidas]
+
+        duracion, medidas = asyncio.run(todos())
+
+        # Latencias solo de las respuestas 200: un rechazo rápido (400/409) no mide el endpoint
+        ms = sorted(segundos * 1000 for segundos, estado in medidas if estado == 200)
+        latencias = {
+            f'p{p}_ms': round(percentil(ms, p), 2) if ms else None for p in (50, 95, 99)
+        }
+        return {
+            'peticiones': len(medidas),
+            'estados': dict(sorted(Counter(str(estado) for _, estado in medidas).items())),
+            'rps': round(len(medidas) / duracion, 2),
+            **latencias,
+            'max_ms': round(ms[-1], 2) if ms else None,
+        }
+
+    @staticmethod
+    def _peticion(endpoint, variante, rng, cliente, numero, total, platos, mesas, mesas_libres):
+        """``(metodo, ruta, datos)`` de la petición ``numero`` de un cliente."""
+        if endpoint == 'obtener_plato':
+            return 'GET', f'/{variante}/plato/{rng.choice(list(platos))}/', None
+        if endpoint == 'editar_plato':
+            # Guarda los mismos valores: mide la escritura sin alterar el menú
+            plato = platos[rng.choice(list(platos))]
+            return 'POST', f'/{variante}/plato/editar/', {
+                'plato_id': plato.id, 'nombre': plato.nombre, 'descripcion': plato.descripcion,
+                'precio': plato.precio, 'categoria': plato.categoria_id, 'disponible': 'on',
+            }
+        if endpoint == 'cambiar_estado_mesa':
+            # Con --peticiones par, cada mesa se alterna un número par de veces y termina como estaba
+            mesa = mesas[(cliente * total + numero // 2) % len(mesas)]
+            return 'POST', f'/{variante}/mesa/{mesa}/cambiar/', None
+        lineas = rng.sample(list(platos), min(len(platos), rng.randint(1, 8)))
+        return 'POST', f'/{variante}/pedidos/crear/', {
+            # Cada cliente reusa su mesa, que se libera tras cada pedido: solo hay 409 si comparten mesa
+            'mesa': (mesas_libres or mesas)[cliente % len(mesas_libres or mesas)], 'platos': lineas,
+            'cantidades': [rng.randint(1, 3) for _ in lineas],
+        }
+
+    @staticmethod
+    def _cerrar_pedidos(ids):
+        for pedido in Pedido.objects.filter(id__in=ids).select_related('mesa'):
+            with transaction.atomic():
+                pedido.cambiar_estado(pedido.estado, 'cerrado')
+                if pedido.mesa is not None:
+                    pedido.mesa.liberar()
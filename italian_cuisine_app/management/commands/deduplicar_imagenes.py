@@ -0,0 +1,110 @@
+import posixpath
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from italian_cuisine_app.imagenes import (
+    ERRORES_IMAGEN, borrar_variantes, es_por_contenido, generar_variantes, variantes_existentes,
+)
+from italian_cuisine_app.menu import invalidar_menu
+from italian_cuisine_app.models import Plato
+
+TAMANO_LOTE = 200
+
+
+class Command(BaseCommand):
+    help = ("Renombra las imágenes de platos ya subidas por su contenido (platos/<sha256>.<ext>), "
+            "deja una sola copia de cada foto repetida y actualiza Plato.imagen por lotes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Platos por transacción.")
+        parser.add_argument('--simular', action='store_true',
+                            help="Solo informa de lo que haría; no copia, actualiza ni borra nada.")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        campo = Plato._meta.get_field('imagen')
+        storage = campo.storage
+        if not hasattr(storage, 'nombre_por_contenido'):
+            raise CommandError("Plato.imagen no usa AlmacenPorContenido.")
+
+        nuevos, existentes, tamanos = self._renombrar(storage, campo.upload_to.rstrip('/'), options['simular'])
+        distintos = set(nuevos.values())
+        # Las copias de una misma foto tienen el mismo tamaño: queda una por nombre nuevo
+        escritos = {nuevos[viejo]: tamano for viejo, tamano in tamanos.items() if nuevos[viejo] not in existentes}
+        liberados = sum(tamanos.values()) - sum(escritos.values())
+        if options['simular']:
+            referencias = Plato.objects.filter(imagen__in=list(nuevos)).count()
+            self.stdout.write(
+                f"Se renombrarían {len(nuevos)} archivos a {len(distintos)} imágenes distintas, se "
+                f"actualizarían {referencias} platos y se liberarían {liberados} bytes."
+            )
+            return
+
+        # Las variantes nuevas existen antes de que un plato apunte a su imagen
+        errores = self._variantes(storage, campo, distintos)
+        actualizados = self._actualizar_platos(nuevos, options['lote'])
+        # La instantánea del menú en caché todavía tiene las URLs viejas: se invalida antes de borrarlas
+        invalidar_menu()
+        for viejo in nuevos:
+            storage.delete(viejo)
+            borrar_variantes(storage, viejo)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivos renombrados: {len(nuevos)} ({len(distintos)} imágenes distintas), platos "
+            f"actualizados: {actualizados}, bytes liberados: {liberados}, errores de variantes: {errores}."
+        ))
+
+    @staticmethod
+    def _renombrar(storage, carpeta, simular):
+        """``({viejo: nuevo}, nombres por contenido ya presentes, {viejo: tamaño})``.
+
+        Copia cada archivo a su nombre por contenido (salvo con ``simular``); los originales se
+        borran al final, cuando ningún plato los referencia.
+        """
+        nuevos, existentes, tamanos = {}, set(), {}
+        _, archivos = storage.listdir(carpeta)
+        for archivo in sorted(archivos):
+            nombre = posixpath.join(carpeta, archivo)
+            if archivo.startswith('.'):
+                # Restos de una subida interrumpida o archivos ocultos
+                continue
+            if es_por_contenido(nombre):
+                existentes.add(nombre)
+                continue
+            with storage.open(nombre, 'rb') as contenido:
+                if simular:
+                    nuevos[nombre] = storage.nombre_por_contenido(nombre, contenido)
+                else:
+                    nuevos[nombre] = storage.save(nombre, contenido)
+            tamanos[nombre] = storage.size(nombre)
+        return nuevos, existentes, tamanos
+
+    @staticmethod
+    def _actualizar_platos(nuevos, lote):
+        # "actualizado" cambia a mano (bulk_update no aplica auto_now): los clientes de la API de
+        # menú con ?since= reciben la URL nueva antes de que se borre la vieja
+        ids = list(Plato.objects.filter(imagen__in=list(nuevos)).order_by('pk').values_list('pk', flat=True))
+        for inicio in range(0, len(ids), lote):
+            with transaction.atomic():
+                platos = list(Plato.objects.filter(pk__in=ids[inicio:inicio + lote]).only('id', 'imagen'))
+                ahora = timezone.now()
+                for plato in platos:
+                    plato.imagen = nuevos[plato.imagen.name]
+                    plato.actualizado = ahora
+                Plato.objects.bulk_update(platos, ['imagen', 'actualizado'])
+        return len(ids)
+
+    def _variantes(self, storage, campo, nombres):
+        errores = 0
+        for nombre in sorted(nombres):
+            imagen = campo.attr_class(None, campo, nombre)
+            if variantes_existentes(imagen):
+                continue
+            try:
+                generar_variantes(imagen)
+            except ERRORES_IMAGEN as e:
+                errores += 1
+                self.stderr.write(f"{nombre}: {e}")
+        return errores
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from italian_cuisine_app.exportacion import TAMANO_BLOQUE, comprimir, csv_pedidos, rango_fechas
+
+
+class Command(BaseCommand):
+    help = "Exporta los pedidos con sus líneas a CSV (o CSV comprimido con gzip) en streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Fecha final incluida (AAAA-MM-DD).")
+        parser.add_argument('--mes', help="Mes completo (AAAA-MM).")
+        parser.add_argument('--anio', help="Año completo (AAAA).")
+        parser.add_argument('--salida', help="Archivo de destino; por defecto la salida estándar.")
+        parser.add_argument('--gzip', action='store_true', help="Comprime la salida con gzip.")
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help="Filas leídas por consulta.")
+
+    def handle(self, *args, **options):
+        try:
+            desde, hasta = rango_fechas(options)
+        except (ValueError, TypeError):
+            raise CommandError("Rango inválido: use --desde/--hasta (AAAA-MM-DD), --mes (AAAA-MM) o --anio.")
+
+        lineas = csv_pedidos(desde, hasta, options['bloque'])
+        bloques = comprimir(lineas) if options['gzip'] else (linea.encode('utf-8') for linea in lineas)
+        destino = open(options['salida'], 'wb') if options['salida'] else sys.stdout.buffer
+        try:
+            for bloque in bloques:
+                destino.write(bloque)
+        finally:
+            if options['salida']:
+                destino.close()
+        if options['salida']:
+            self.stderr.write(self.style.SUCCESS(f"Pedidos del {desde} al {hasta} exportados a {options['salida']}."))
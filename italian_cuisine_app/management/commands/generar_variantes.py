@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from italian_cuisine_app.imagenes import ERRORES_IMAGEN, generar_variantes, variantes_existentes
+from italian_cuisine_app.menu import invalidar_menu
+from italian_cuisine_app.models import Plato
+
+
+class Command(BaseCommand):
+    help = "Genera las variantes redimensionadas de las imágenes de platos existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true',
+                            help="Regenera también las imágenes que ya tienen variantes.")
+
+    def handle(self, *args, **options):
+        generadas = omitidas = errores = 0
+        # Varios platos pueden compartir el mismo archivo: se procesa una vez por nombre
+        nombres = (
+            Plato.objects.exclude(imagen='').exclude(imagen__isnull=True)
+            .order_by().values_list('imagen', flat=True).distinct()
+        )
+        campo = Plato._meta.get_field('imagen')
+        for nombre in nombres.iterator():
+            imagen = campo.attr_class(None, campo, nombre)
+            if not options['forzar'] and variantes_existentes(imagen):
+                omitidas += 1
+                continue
+            try:
+                generar_variantes(imagen)
+                generadas += 1
+            except ERRORES_IMAGEN as e:
+                errores += 1
+                self.stderr.write(f"{nombre}: {e}")
+        invalidar_menu()
+        self.stdout.write(self.style.SUCCESS(
+            f"Variantes generadas: {generadas}, omitidas: {omitidas}, errores: {errores}."
+        ))
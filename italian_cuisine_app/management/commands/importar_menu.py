@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from italian_cuisine_app.importacion import FORMATOS, TAMANO_LOTE, detectar_formato, importar_menu
+
+
+class Command(BaseCommand):
+    help = "Importa platos y categorías desde un archivo CSV o JSON (arreglo o JSON Lines)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo a importar.")
+        parser.add_argument('--formato', choices=FORMATOS,
+                            help="Formato del archivo; por defecto se deduce de la extensión.")
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por transacción.")
+        parser.add_argument('--reporte', help="Guarda el reporte completo (JSON) en esta ruta.")
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or detectar_formato(options['archivo'])
+        if formato is None:
+            raise CommandError("No se pudo deducir el formato; use --formato csv|json.")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                reporte = importar_menu(archivo, formato, options['lote'])
+        except OSError as e:
+            raise CommandError(f"No se pudo leer el archivo: {e}")
+
+        for error in reporte['errores'][:50]:
+            self.stderr.write(f"Fila {error['fila'] or '-'}: {error['error']}")
+        if len(reporte['errores']) > 50:
+            self.stderr.write(f"... y {len(reporte['errores']) - 50} errores más.")
+        if options['reporte']:
+            with open(options['reporte'], 'w', encoding='utf-8') as salida:
+                json.dump(reporte, salida, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Platos creados: {reporte['creados']}, actualizados: {reporte['actualizados']}, "
+            f"sin cambios: {reporte['sin_cambios']}, "
+            f"categorías nuevas: {reporte['categorias_creadas']}, filas con error: {len(reporte['errores'])}."
+        ))
@@ -0,0 +1,33 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from italian_cuisine_app.sesiones import TAMANO_LOTE, borrar_expiradas
+
+
+class Command(BaseCommand):
+    help = ("Borra las sesiones expiradas por lotes cortos (no bloquea las escrituras de pedidos en "
+            "SQLite). Con --cada se queda repitiendo la limpieza cada tantos segundos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Sesiones por sentencia DELETE.")
+        parser.add_argument('--pausa', type=float, default=0.05, help="Segundos de espera entre lotes.")
+        parser.add_argument('--cada', type=float, default=0,
+                            help="Repite la limpieza cada tantos segundos (por defecto, una sola vez).")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1 or options['pausa'] < 0 or options['cada'] < 0:
+            raise CommandError("--lote debe ser mayor que cero y --pausa y --cada no pueden ser negativos.")
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Sesiones en cookies firmadas o solo en caché: expiran solas
+            self.stdout.write(f"{settings.SESSION_ENGINE} no guarda sesiones en la base: no hay nada que limpiar.")
+            return
+        while True:
+            borradas = borrar_expiradas(store.get_model_class(), options['lote'], options['pausa'])
+            self.stdout.write(self.style.SUCCESS(f"Sesiones expiradas borradas: {borradas}."))
+            if not options['cada']:
+                return
+            time.sleep(options['cada'])
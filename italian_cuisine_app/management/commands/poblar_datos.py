@@ -0,0 +1,163 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from italian_cuisine_app.busqueda import indexar_empleados
+from italian_cuisine_app.menu import invalidar_menu
+from italian_cuisine_app.models import Categoria, DetallePedido, Empleado, Mesa, Pedido, PedidoArchivado, Plato
+
+PREFIJO = 'sim_'
+CATEGORIAS = [
+    'Antipasti', 'Primi', 'Secondi', 'Contorni', 'Pizze', 'Risotti', 'Pasta fresca',
+    'Insalate', 'Dolci', 'Vini', 'Bevande', 'Caffè',
+]
+INGREDIENTES = [
+    'pomodoro', 'funghi', 'tartufo', 'pesto', 'carbonara', 'ragù', 'frutti di mare', 'limone',
+    'gorgonzola', 'speck', 'melanzane', 'zucca', 'salsiccia', 'burrata', 'pistacchio', 'nduja',
+]
+# Peso relativo de cada hora del día (almuerzo y cena concentran los pedidos)
+HORAS = {12: 6, 13: 10, 14: 8, 15: 3, 16: 1, 17: 1, 18: 2, 19: 5, 20: 10, 21: 9, 22: 4, 23: 1}
+
+
+class Command(BaseCommand):
+    help = "Genera un restaurante sintético (empleados, menú, mesas y pedidos históricos) para pruebas de carga."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meseros', type=int, default=20)
+        parser.add_argument('--admins', type=int, default=2)
+        parser.add_argument('--mesas', type=int, default=80)
+        parser.add_argument('--platos', type=int, default=300)
+        parser.add_argument('--dias', type=int, default=365, help="Días de historial de pedidos.")
+        parser.add_argument('--pedidos-por-dia', type=int, default=150)
+        parser.add_argument('--password', default='sim12345', help="Contraseña de los usuarios generados.")
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=2000, help="Filas por bulk_create.")
+        parser.add_argument('--limpiar', action='store_true',
+                            help="Borra antes los datos generados por una ejecución anterior.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semilla'])
+        lote = options['lote']
+        if options['limpiar']:
+            self._limpiar()
+
+        with transaction.atomic():
+            meseros = self._empleados(options, rng)
+            mesas = self._mesas(options['mesas'])
+            platos = self._menu(options['platos'], rng, lote)
+        invalidar_menu()
+
+        total_pedidos = self._pedidos(options, rng, meseros, mesas, platos, lote)
+
+        # Los resúmenes del dashboard se reconstruyen desde el histórico recién insertado
+        call_command('reconstruir_resumenes', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Listo: {len(meseros)} meseros, {len(mesas)} mesas, {len(platos)} platos disponibles, {total_pedidos} pedidos."
+        ))
+
+    def _limpiar(self):
+        with transaction.atomic():
+            Pedido.objects.filter(mesero__username__startswith=PREFIJO).delete()
+            Categoria.objects.filter(nombre__startswith=PREFIJO).delete()
+            User.objects.filter(username__startswith=PREFIJO).delete()
+        try:
+            PedidoArchivado.objects.filter(mesero_usuario__startswith=PREFIJO).delete()
+        except DatabaseError:
+            pass  # la base de archivo todavía no se creó: no hay nada archivado
+        self.stdout.write("Datos simulados anteriores eliminados.")
+
+    def _empleados(self, options, rng):
+        password = make_password(options['password'])  # un solo hash para todos los usuarios
+        nombres = ['Giulia', 'Marco', 'Sofia', 'Luca', 'Chiara', 'Matteo', 'Elena', 'Davide', 'Sara', 'Paolo']
+        apellidos = ['Rossi', 'Bianchi', 'Romano', 'Colombo', 'Ricci', 'Marino', 'Greco', 'Bruno', 'Gallo']
+        cuentas = [(f'{PREFIJO}mesero_{i}', 'mesero') for i in range(1, options['meseros'] + 1)]
+        cuentas += [(f'{PREFIJO}admin_{i}', 'administrador') for i in range(1, options['admins'] + 1)]
+
+        existentes = set(User.objects.filter(username__in=[u for u, _ in cuentas]).values_list('username', flat=True))
+        nuevos = [
+            User(username=username, password=password,
+                 first_name=rng.choice(nombres), last_name=rng.choice(apellidos),
+                 email=f'{username}@ejemplo.com')
+            for username, _ in cuentas if username not in existentes
+        ]
+        User.objects.bulk_create(nuevos)
+        usuarios = User.objects.in_bulk([u for u, _ in cuentas], field_name='username')
+        cargos = dict(cuentas)
+        empleados = Empleado.objects.bulk_create([
+            Empleado(user=user, cargo=cargos[user.username], first_name=user.first_name,
+                     last_name=user.last_name, email=user.email, telefono=f'+39 3{rng.randint(10**8, 10**9 - 1)}')
+            for user in usuarios.values() if user.username not in existentes
+        ])
+        # bulk_create no emite señales: los términos de búsqueda se escriben aquí
+        indexar_empleados(empleados)
+        return [user for user in usuarios.values() if cargos[user.username] == 'mesero']
+
+    def _mesas(self, cantidad):
+        Mesa.objects.bulk_create([Mesa(numero=n) for n in range(1, cantidad + 1)], ignore_conflicts=True)
+        return list(Mesa.objects.filter(numero__lte=cantidad).order_by('numero'))
+
+    def _menu(self, cantidad, rng, lote):
+        Categoria.objects.bulk_create(
+            [Categoria(nombre=f'{PREFIJO}{nombre}') for nombre in CATEGORIAS], ignore_conflicts=True
+        )
+        categorias = list(Categoria.objects.filter(nombre__startswith=PREFIJO))
+        Plato.objects.bulk_create([
+            Plato(
+                nombre=f'{rng.choice(CATEGORIAS[:9])} al {rng.choice(INGREDIENTES)} #{i}',
+                descripcion='Plato generado para pruebas de carga.',
+                precio=Decimal(rng.randint(300, 4000)) / 100,
+                disponible=rng.random() > 0.1,
+                categoria=rng.choice(categorias),
+            )
+            for i in range(1, cantidad + 1)
+        ], batch_size=lote)
+        return list(Plato.objects.filter(categoria__in=categorias, disponible=True).select_related('categoria'))
+
+    def _pedidos(self, options, rng, meseros, mesas, platos, lote):
+        if not (meseros and mesas and platos):
+            return 0
+        zona = timezone.get_current_timezone()
+        hoy = timezone.localdate()
+        horas, pesos = list(HORAS), list(HORAS.values())
+        total = 0
+        # Un día por transacción: la memoria y el lock de escritura quedan acotados
+        for dias_atras in range(options['dias'], -1, -1):
+            dia = hoy - timedelta(days=dias_atras)
+            pedidos, fechas, lineas = [], [], []
+            for _ in range(max(1, int(rng.gauss(options['pedidos_por_dia'], options['pedidos_por_dia'] * 0.2)))):
+                fecha = datetime.combine(dia, time(rng.choices(horas, pesos)[0], rng.randrange(60)), zona)
+                if fecha > timezone.now():
+                    continue
+                elegidos = [(rng.choice(platos), rng.choices((1, 2, 3), (6, 3, 1))[0]) for _ in range(rng.randint(1, 8))]
+                pedidos.append(Pedido(
+                    mesa=rng.choice(mesas),
+                    mesero=rng.choice(meseros),
+                    estado='cerrado' if dias_atras else rng.choice(('espera', 'proceso', 'listo', 'cerrado')),
+                    total=sum(plato.precio * cantidad for plato, cantidad in elegidos),
+                ))
+                fechas.append(fecha)
+                lineas.append(elegidos)
+
+            with transaction.atomic():
+                # bulk_create no pasa por Pedido.save(): los resúmenes se reconstruyen al final
+                Pedido.objects.bulk_create(pedidos, batch_size=lote)
+                # fecha es auto_now_add, así que la fecha histórica se fija después del INSERT
+                for pedido, fecha in zip(pedidos, fechas):
+                    pedido.fecha = fecha
+                Pedido.objects.bulk_update(pedidos, ['fecha'], batch_size=500)
+                DetallePedido.objects.bulk_create([
+                    DetallePedido(pedido=pedido, plato=plato, cantidad=cantidad, subtotal=plato.precio * cantidad,
+                                  plato_nombre=plato.nombre, categoria_nombre=plato.categoria.nombre,
+                                  precio_unitario=plato.precio)
+                    for pedido, elegidos in zip(pedidos, lineas)
+                    for plato, cantidad in elegidos
+                ], batch_size=lote)
+            total += len(pedidos)
+        return total
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from italian_cuisine_app.models import Pedido
+
+
+class Command(BaseCommand):
+    help = "Recalcula el total de todos los pedidos a partir de sus líneas (reparación de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedido', type=int, action='append', dest='pedidos',
+                            help="Limita la reparación a estos ids de pedido (se puede repetir).")
+
+    def handle(self, *args, **options):
+        queryset = Pedido.objects.all()
+        if options['pedidos']:
+            queryset = queryset.filter(pk__in=options['pedidos'])
+        actualizados = Pedido.recalcular_totales(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Totales recalculados para {actualizados} pedidos."))
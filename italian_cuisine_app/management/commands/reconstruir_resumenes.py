@@ -0,0 +1,117 @@
+from datetime import date
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+
+from italian_cuisine_app.archivo import archivo_disponible, ids_duplicados
+from italian_cuisine_app.models import (
+    DetalleArchivado, DetallePedido, Pedido, PedidoArchivado, ResumenPlato, ResumenVentas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los resúmenes del dashboard (ResumenVentas y ResumenPlato) a partir del histórico, "
+        "incluidos los pedidos archivados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Reconstruye solo desde esta fecha (AAAA-MM-DD).")
+        parser.add_argument('--lote', type=int, default=1000, help="Filas por bulk_create.")
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError("--desde debe tener el formato AAAA-MM-DD.")
+
+        pedidos = Pedido.objects.all()
+        detalles = DetallePedido.objects.all()
+        if archivo_disponible():
+            # Un pedido en las dos bases (archivar_pedidos interrumpido) se cuenta una sola vez
+            duplicados = ids_duplicados(pedidos)
+            archivados = PedidoArchivado.objects.exclude(id__in=duplicados)
+            detalles_archivados = DetalleArchivado.objects.exclude(pedido_id__in=duplicados)
+        else:
+            # La base de archivo todavía no se migró: no hay nada archivado
+            archivados = PedidoArchivado.objects.none()
+            detalles_archivados = DetalleArchivado.objects.none()
+        if desde:
+            pedidos = pedidos.filter(fecha__date__gte=desde)
+            detalles = detalles.filter(pedido__fecha__date__gte=desde)
+            archivados = archivados.filter(fecha__date__gte=desde)
+            detalles_archivados = detalles_archivados.filter(pedido__fecha__date__gte=desde)
+
+        # Toda la agregación se hace en cada base de datos (operativa y de archivo), agrupando por
+        # día/hora/mesero y día/plato; aquí solo se suman los dos resultados
+        por_hora = chain(
+            pedidos.annotate(dia=TruncDate('fecha'), h=ExtractHour('fecha'))
+            .values('dia', 'h', 'mesero_id')
+            .annotate(n=Count('id'), cerrados=Count('id', filter=Q(estado='cerrado')))
+            .order_by().iterator(),
+            archivados.annotate(dia=TruncDate('fecha'), h=ExtractHour('fecha'))
+            .values('dia', 'h', 'mesero_id')
+            .annotate(n=Count('id'), cerrados=Count('id', filter=Q(estado='cerrado')))
+            .order_by().iterator(),
+        )
+        lineas_por_hora = chain(
+            detalles.annotate(dia=TruncDate('pedido__fecha'), h=ExtractHour('pedido__fecha'))
+            .values('dia', 'h', 'pedido__mesero_id')
+            .annotate(ventas=Sum('subtotal'), unidades=Sum('cantidad'))
+            .order_by().iterator(),
+            detalles_archivados.annotate(dia=TruncDate('pedido__fecha'), h=ExtractHour('pedido__fecha'))
+            .values('dia', 'h', 'pedido__mesero_id')
+            .annotate(ventas=Sum('subtotal'), unidades=Sum('cantidad'))
+            .order_by().iterator(),
+        )
+        por_plato = chain(
+            detalles.annotate(dia=TruncDate('pedido__fecha'))
+            .values('dia', 'plato_id')
+            .annotate(ventas=Sum('subtotal'), unidades=Sum('cantidad'))
+            .order_by().iterator(),
+            detalles_archivados.annotate(dia=TruncDate('pedido__fecha'))
+            .values('dia', 'plato_id')
+            .annotate(ventas=Sum('subtotal'), unidades=Sum('cantidad'))
+            .order_by().iterator(),
+        )
+
+        resumenes = {}
+        for fila in por_hora:
+            clave = (fila['dia'], fila['h'], fila['mesero_id'] or 0)
+            resumen = resumenes.get(clave)
+            if resumen is None:
+                resumen = resumenes[clave] = ResumenVentas(fecha=clave[0], hora=clave[1], mesero_id=clave[2])
+            resumen.pedidos += fila['n']
+            resumen.pedidos_cerrados += fila['cerrados']
+        for fila in lineas_por_hora:
+            resumen = resumenes[(fila['dia'], fila['h'], fila['pedido__mesero_id'] or 0)]
+            resumen.ventas += fila['ventas'] or 0
+            resumen.platos_vendidos += fila['unidades'] or 0
+
+        platos = {}
+        for fila in por_plato:
+            clave = (fila['dia'], fila['plato_id'])
+            resumen = platos.get(clave)
+            if resumen is None:
+                resumen = platos[clave] = ResumenPlato(fecha=clave[0], plato_id=clave[1])
+            resumen.cantidad += fila['unidades'] or 0
+            resumen.ventas += fila['ventas'] or 0
+
+        with transaction.atomic():
+            viejos_ventas = ResumenVentas.objects.all()
+            viejos_platos = ResumenPlato.objects.all()
+            if desde:
+                viejos_ventas = viejos_ventas.filter(fecha__gte=desde)
+                viejos_platos = viejos_platos.filter(fecha__gte=desde)
+            viejos_ventas.delete()
+            viejos_platos.delete()
+
+            ResumenVentas.objects.bulk_create(resumenes.values(), batch_size=options['lote'])
+            ResumenPlato.objects.bulk_create(platos.values(), batch_size=options['lote'])
+
+        self.stdout.write(self.style.SUCCESS(f"Resúmenes reconstruidos: {len(resumenes)} filas horarias."))
@@ -0,0 +1,177 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from italian_cuisine_app.models import Empleado, Mesa, Plato
+
+from .poblar_datos import PREFIJO
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores:
+        return None
+    # Rango ceil(p/100 * n), contado desde 1
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+class Registro:
+    """Latencias, consultas y errores por endpoint, compartido entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.consultas = defaultdict(list)
+        self.errores = defaultdict(int)
+
+    def anotar(self, endpoint, segundos, consultas, error):
+        with self._lock:
+            self.latencias[endpoint].append(segundos)
+            self.consultas[endpoint].append(consultas)
+            if error:
+                self.errores[endpoint] += 1
+
+    def informe(self, duracion):
+        endpoints = {}
+        for endpoint in sorted(self.latencias):
+            ms = sorted(s * 1000 for s in self.latencias[endpoint])
+            consultas = self.consultas[endpoint]
+            endpoints[endpoint] = {
+                'peticiones': len(ms),
+                'errores': self.errores[endpoint],
+                'rps': round(len(ms) / duracion, 2),
+                'p50_ms': round(percentil(ms, 50), 2),
+                'p95_ms': round(percentil(ms, 95), 2),
+                'p99_ms': round(percentil(ms, 99), 2),
+                'max_ms': round(ms[-1], 2),
+                'consultas_media': round(sum(consultas) / len(consultas), 2),
+                'consultas_max': max(consultas),
+            }
+        total = sum(len(v) for v in self.latencias.values())
+        return {
+            'duracion_s': round(duracion, 3),
+            'peticiones': total,
+            'errores': sum(self.errores.values()),
+            'rps': round(total / duracion, 2),
+            'endpoints': endpoints,
+        }
+
+
+class Sesion:
+    """Cliente de un usuario simulado que mide cada petición contra las URL reales de la app."""
+
+    def __init__(self, registro, host):
+        self.client = Client(HTTP_HOST=host)
+        self.registro = registro
+
+    def peticion(self, endpoint, metodo, url, datos=None, esperados=(200, 302), **extra):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            try:
+                respuesta = getattr(self.client, metodo)(url, datos, **extra)
+                error = respuesta.status_code not in esperados
+            except Exception:
+                respuesta, error = None, True
+            duracion = time.perf_counter() - inicio
+        self.registro.anotar(endpoint, duracion, len(consultas), error)
+        return respuesta
+
+
+class Command(BaseCommand):
+    help = ("Reproduce una carga concurrente de meseros y administradores contra las URL de la app "
+            "y reporta rendimiento, latencias p50/p95/p99 y consultas por endpoint en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meseros', type=int, default=8, help="Hilos de meseros concurrentes.")
+        parser.add_argument('--admins', type=int, default=2, help="Hilos de administradores concurrentes.")
+        parser.add_argument('--iteraciones', type=int, default=20, help="Ciclos de trabajo por usuario.")
+        parser.add_argument('--password', default='sim12345')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--semilla', type=int, default=7)
+        parser.add_argument('--salida', help="Archivo donde escribir el informe JSON (por defecto, stdout).")
+
+    def handle(self, *args, **options):
+        empleados = list(
+            Empleado.objects.filter(user__username__startswith=PREFIJO).select_related('user')
+        )
+        meseros = [e.user.username for e in empleados if e.cargo == 'mesero'][:options['meseros']]
+        admins = [e.user.username for e in empleados if e.cargo == 'administrador'][:options['admins']]
+        mesas = list(Mesa.objects.values_list('id', flat=True))
+        platos = list(Plato.objects.filter(disponible=True).values_list('id', flat=True))
+        if not meseros or not mesas or not platos:
+            raise CommandError("No hay datos simulados: ejecuta primero 'manage.py poblar_datos'.")
+
+        registro = Registro()
+        trabajos = [(self._mesero, u) for u in meseros] + [(self._admin, u) for u in admins]
+        inicio = time.perf_counter()
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, options['host']]):
+            with ThreadPoolExecutor(max_workers=len(trabajos)) as pool:
+                futuros = [
+                    pool.submit(self._ejecutar, trabajo, username, registro, options, mesas, platos, i)
+                    for i, (trabajo, username) in enumerate(trabajos)
+                ]
+                for futuro in futuros:
+                    futuro.result()
+        informe = registro.informe(time.perf_counter() - inicio)
+        informe['configuracion'] = {
+            clave: options[clave] for clave in ('meseros', 'admins', 'iteraciones', 'semilla')
+        }
+        informe['configuracion']['base_de_datos'] = connection.vendor
+
+        salida = json.dumps(informe, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+            self.stdout.write(self.style.SUCCESS(f"Informe escrito en {options['salida']}."))
+        else:
+            self.stdout.write(salida)
+
+    def _ejecutar(self, trabajo, username, registro, options, mesas, platos, indice):
+        rng = random.Random(options['semilla'] + indice)
+        sesion = Sesion(registro, options['host'])
+        try:
+            sesion.peticion('login', 'post', reverse('login'),
+                            {'username': username, 'password': options['password']})
+            for _ in range(options['iteraciones']):
+                trabajo(sesion, rng, mesas, platos)
+        finally:
+            # Cada hilo abre su propia conexión; se cierra al terminar
+            connections.close_all()
+
+    def _mesero(self, sesion, rng, mesas, platos):
+        sesion.peticion('pedidos', 'get', reverse('pedidos'))
+        lineas = rng.sample(platos, min(len(platos), rng.randint(1, 8)))
+        sesion.peticion(
+            'crear_pedido', 'post', reverse('crear_pedido'),
+            {'mesa': rng.choice(mesas), 'platos': lineas, 'cantidades': [rng.randint(1, 3) for _ in lineas]},
+            # 400/409: la mesa elegida al azar ya estaba ocupada, es parte normal de la carga
+            esperados=(200, 400, 409), HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        respuesta = sesion.peticion('mis_pedidos', 'get', reverse('mis_pedidos'))
+        abiertos = re.findall(rb'/panel/pedido/(\d+)/cerrar/', respuesta.content) if respuesta else []
+        if abiertos:
+            sesion.peticion('cerrar_pedido', 'post', reverse('cerrar_pedido', args=[int(rng.choice(abiertos))]))
+        if rng.random() < 0.2:
+            mesa = rng.choice(mesas)
+            # Dos cambios seguidos: mide el endpoint sin alterar el estado final de la mesa
+            for _ in range(2):
+                sesion.peticion('cambiar_estado_mesa', 'post', reverse('cambiar_estado_mesa', args=[mesa]))
+
+    def _admin(self, sesion, rng, mesas, platos):
+        sesion.peticion('dashboard', 'get', reverse('dashboard'))
+        sesion.peticion('panel_mesas', 'get', reverse('panel_mesas'))
+        sesion.peticion('platos_categorias', 'get', reverse('platos_categorias'))
+        sesion.peticion('empleados', 'get', reverse('empleados'))
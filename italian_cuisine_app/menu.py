@@ -0,0 +1,163 @@
+"""Instantánea del menú (platos disponibles por categoría) guardada en la caché de Django.
+
+La clave de la instantánea incluye el número de versión del menú, guardado en la base
+(VersionMenu) para que lo compartan todos los procesos; cualquier escritura sobre Plato o
+Categoría incrementa la versión y las lecturas siguientes reconstruyen la instantánea una sola
+vez por proceso. La versión se copia en la caché por ``MENU_VERSION_TTL`` segundos, así que una
+petición normal no hace ninguna consulta: con caché compartida el incremento se ve al instante en
+todos los procesos y con caché por proceso, como mucho ``MENU_VERSION_TTL`` segundos después. La
+misma versión guarda la marca de cambio (ETag/Last-Modified) y el cuerpo JSON de la API de menú.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .imagenes import atributos_imagen
+from .models import Categoria, Plato, VersionMenu
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+VERSION_CLAVE = 'menu:version'
+MENU_VERSION_TTL = getattr(settings, 'MENU_VERSION_TTL', 5)
+
+
+def version_menu():
+    """Versión actual del menú (1 si todavía no hubo cambios); solo consulta la base si no está en caché."""
+    version = cache.get(VERSION_CLAVE)
+    if version is None:
+        version = VersionMenu.objects.filter(pk=1).values_list('version', flat=True).first() or 1
+        # add y no set: no pisa un incremento que haya llegado mientras se leía la base
+        cache.add(VERSION_CLAVE, version, timeout=MENU_VERSION_TTL)
+    return version
+
+
+def _incrementar_version_en_cache():
+    try:
+        cache.incr(VERSION_CLAVE)
+    except ValueError:
+        # Sin la clave en caché la próxima lectura toma la versión de la base
+        pass
+
+
+def invalidar_menu():
+    """Incrementa la versión del menú; las instantáneas anteriores quedan huérfanas y expiran solas."""
+    ahora = timezone.now()
+    if not VersionMenu.objects.filter(pk=1).update(version=F('version') + 1, cambiado=ahora):
+        VersionMenu.objects.get_or_create(pk=1, defaults={'version': 2, 'cambiado': ahora})
+    # Tras el commit: antes otro proceso reconstruiría la instantánea nueva con los datos viejos
+    transaction.on_commit(_incrementar_version_en_cache)
+
+
+def construir_menu():
+    """Lista compacta de categorías con sus platos disponibles (dos consultas)."""
+    categorias = {
+        categoria_id: {'id': categoria_id, 'nombre': nombre, 'platos': []}
+        for categoria_id, nombre in Categoria.objects.order_by('id').values_list('id', 'nombre')
+    }
+    platos = (
+        Plato.objects.filter(disponible=True)
+        .order_by('id')
+        .values_list('id', 'nombre', 'precio', 'categoria_id', 'imagen')
+    )
+    campo = Plato._meta.get_field('imagen')
+    for plato_id, nombre, precio, categoria_id, imagen in platos:
+        # Las variantes se resuelven aquí, una vez por versión del menú y no en cada render
+        src, srcset = atributos_imagen(campo.attr_class(None, campo, imagen)) if imagen else ('', '')
+        categorias[categoria_id]['platos'].append({
+            'id': plato_id,
+            'nombre': nombre,
+            'precio': str(precio),
+            'imagen': src,
+            'srcset': srcset,
+        })
+    return list(categorias.values())
+
+
+def obtener_menu():
+    """Instantánea del menú para la versión actual; solo consulta la base de datos si no está en caché."""
+    clave = f'menu:snapshot:{version_menu()}'
+    menu = cache.get(clave)
+    if menu is None:
+        menu = construir_menu()
+        cache.set(clave, menu, timeout=SNAPSHOT_TIMEOUT)
+    return menu
+
+
+def marca_menu():
+    """``{'version': int, 'modificado': datetime, 'etag': str}`` de la versión actual, calculada una vez por versión."""
+    version = version_menu()
+    clave = f'menu:marca:{version}'
+    marca = cache.get(clave)
+    if marca is None:
+        platos = Plato.objects.aggregate(n=Count('id'), maximo=Max('actualizado'))
+        categorias = Categoria.objects.aggregate(n=Count('id'), maximo=Max('actualizado'))
+        # Los borrados no dejan rastro en "actualizado": cuenta el momento del último cambio registrado
+        cambiado = VersionMenu.objects.filter(pk=1).values_list('cambiado', flat=True).first()
+        fechas = [f for f in (platos['maximo'], categorias['maximo'], cambiado) if f]
+        modificado = max(fechas) if fechas else timezone.now()
+        # El conteo distingue un borrado aunque la fecha máxima no cambie
+        huella = f"{modificado.isoformat()}|{platos['n']}|{categorias['n']}"
+        marca = {'version': version, 'modificado': modificado, 'etag': hashlib.sha1(huella.encode()).hexdigest()[:20]}
+        cache.set(clave, marca, timeout=SNAPSHOT_TIMEOUT)
+    return marca
+
+
+def _plato_api(plato_id, nombre, precio, disponible, categoria_id, imagen, campo):
+    return {
+        'id': plato_id,
+        'nombre': nombre,
+        'precio': str(precio),
+        'disponible': disponible,
+        'categoria': categoria_id,
+        'imagen': campo.storage.url(imagen) if imagen else None,
+    }
+
+
+def menu_json(desde=None, marca=None):
+    """Cuerpo JSON compacto del menú completo (cacheado por versión) o solo de lo cambiado tras ``desde``.
+
+    ``marca`` es la de ``marca_menu()`` si el llamador ya la leyó.
+    """
+    marca = marca or marca_menu()
+    clave = f'menu:json:{marca["version"]}'
+    if desde is None:
+        cuerpo = cache.get(clave)
+        if cuerpo is not None:
+            return cuerpo
+
+    campo = Plato._meta.get_field('imagen')
+    categorias = Categoria.objects.order_by('id')
+    platos = Plato.objects.order_by('id')
+    if desde is not None:
+        categorias = categorias.filter(actualizado__gt=desde)
+        platos = platos.filter(actualizado__gt=desde)
+    datos = {
+        'marca': marca['modificado'].isoformat(),
+        'categorias': [{'id': i, 'nombre': n} for i, n in categorias.values_list('id', 'nombre')],
+        'platos': [
+            _plato_api(*fila, campo)
+            for fila in platos.values_list('id', 'nombre', 'precio', 'disponible', 'categoria_id', 'imagen')
+        ],
+    }
+    if desde is not None:
+        # Con ids vigentes el cliente puede descartar los platos y categorías borrados
+        datos['ids_platos'] = list(Plato.objects.order_by('id').values_list('id', flat=True))
+        datos['ids_categorias'] = list(Categoria.objects.order_by('id').values_list('id', flat=True))
+    cuerpo = json.dumps(datos, ensure_ascii=False, separators=(',', ':'))
+    if desde is None:
+        cache.set(clave, cuerpo, timeout=SNAPSHOT_TIMEOUT)
+    return cuerpo
+
+
+@receiver(post_save, sender=Plato)
+@receiver(post_delete, sender=Plato)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def _menu_modificado(sender, **kwargs):
+    invalidar_menu()
@@ -0,0 +1,153 @@
+import heapq
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from .models import Empleado
+
+logger_sql = logging.getLogger('italian_cuisine_app.sql')
+
+
+class EmpleadoMiddleware:
+    """Expone ``request.empleado``: el Empleado del usuario, resuelto una sola vez y solo si se usa."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Con ASGI la cadena sigue siendo asíncrona: __call__ devuelve la corrutina de get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.empleado = SimpleLazyObject(lambda: Empleado.de_usuario(request.user))
+        return self.get_response(request)
+
+
+class InstrumentacionSQLMiddleware:
+    """Mide las consultas SQL de cada petición muestreada.
+
+    Agrega un encabezado ``Server-Timing`` (``db`` y ``app``) y una línea de log estructurada con
+    el total de consultas, el tiempo en SQL, las sentencias más lentas y las formas de consulta
+    repetidas que sugieren un N+1. Configuración en settings:
+
+    * ``SQL_MUESTREO``: fracción de peticiones instrumentadas (1.0 = todas).
+    * ``SQL_UMBRAL_N_MAS_1``: repeticiones de una misma forma de consulta para marcarla.
+    * ``SQL_CONSULTAS_LENTAS``: cuántas sentencias lentas incluir en el log.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+        self.muestreo = getattr(settings, 'SQL_MUESTREO', 1.0)
+        self.umbral = getattr(settings, 'SQL_UMBRAL_N_MAS_1', 5)
+        self.lentas = getattr(settings, 'SQL_CONSULTAS_LENTAS', 3)
+
+    def __call__(self, request):
+        if self.muestreo <= 0 or (self.muestreo < 1 and random.random() >= self.muestreo):
+            return self.get_response(request)
+        if self.asincrono:
+            return self._medir_async(request)
+
+        medicion = MedicionSQL()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            self._instrumentar(pila, medicion)
+            response = self.get_response(request)
+        return self._registrar(request, response, medicion, inicio)
+
+    async def _medir_async(self, request):
+        medicion = MedicionSQL()
+        inicio = time.perf_counter()
+        pila = ExitStack()
+        # Las conexiones son locales a cada hilo: el wrapper se instala en el hilo de la petición,
+        # que es donde corren tanto las vistas síncronas como las consultas del ORM asíncrono
+        await sync_to_async(self._instrumentar)(pila, medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+        return self._registrar(request, response, medicion, inicio)
+
+    @staticmethod
+    def _instrumentar(pila, medicion):
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+
+    def _registrar(self, request, response, medicion, inicio):
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = medicion.tiempo * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{medicion.cantidad} consultas", app;dur={total_ms - db_ms:.1f}'
+        )
+        repetidas = medicion.repetidas(self.umbral)
+        registro = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'consultas': medicion.cantidad,
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(total_ms, 2),
+            'lentas': [
+                {'ms': round(segundos * 1000, 2), 'sql': sql}
+                for segundos, sql in medicion.mas_lentas(self.lentas)
+            ],
+            'n_mas_1': [{'veces': veces, 'sql': forma} for forma, veces in repetidas],
+        }
+        logger_sql.log(logging.WARNING if repetidas else logging.INFO, json.dumps(registro, ensure_ascii=False))
+        return response
+
+
+# Literales y listas IN de distinto largo se reducen a la misma "forma" de consulta
+_LISTA_IN = re.compile(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def forma_consulta(sql):
+    return _LITERALES.sub('?', _LISTA_IN.sub('IN (...)', sql))
+
+
+class MedicionSQL:
+    """execute_wrapper que acumula cantidad, tiempo y formas de las consultas de una petición."""
+
+    def __init__(self):
+        self.cantidad = 0
+        self.tiempo = 0.0
+        self.formas = Counter()
+        self._lentas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.cantidad += 1
+            self.tiempo += duracion
+            self.formas[sql] += 1
+            self._lentas.append((duracion, sql))
+
+    def mas_lentas(self, n):
+        return heapq.nlargest(n, self._lentas, key=lambda item: item[0])
+
+    def repetidas(self, umbral):
+        # Las formas se normalizan solo aquí, una vez por sentencia distinta y no por ejecución
+        agrupadas = Counter()
+        for sql, veces in self.formas.items():
+            agrupadas[forma_consulta(sql)] += veces
+        return [(forma, veces) for forma, veces in agrupadas.most_common() if veces >= umbral]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0003_empleado_email_empleado_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPlato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('plato_id', models.IntegerField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('ventas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'plato_id'), name='resumen_plato_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenVentas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora', models.PositiveSmallIntegerField()),
+                ('mesero_id', models.IntegerField(default=0)),
+                ('pedidos', models.IntegerField(default=0)),
+                ('pedidos_cerrados', models.IntegerField(default=0)),
+                ('ventas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('platos_vendidos', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'hora', 'mesero_id'), name='resumen_ventas_unico')],
+            },
+        ),
+    ]
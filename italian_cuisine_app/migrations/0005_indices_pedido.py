@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0004_resumenes_dashboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['mesero', 'fecha'], name='pedido_mesero_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'fecha'], name='pedido_estado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0006_menu_actualizado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fecha'], name='pedido_fecha_idx'),
+        ),
+    ]
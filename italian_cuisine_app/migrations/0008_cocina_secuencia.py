@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def normalizar_estados(apps, schema_editor):
+    # CrearPedidoView guardaba 'en_proceso', que no era un estado válido: eran pedidos recién tomados
+    Pedido = apps.get_model('italian_cuisine_app', 'Pedido')
+    Pedido.objects.filter(estado='en_proceso').update(estado='espera')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0007_indice_fecha_pedido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='secuencia',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='estado',
+            field=models.CharField(choices=[('espera', 'En espera'), ('proceso', 'En proceso'), ('listo', 'Listo'), ('cerrado', 'Cerrado')], default='espera', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CambioPedido',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('creado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cambios', to='italian_cuisine_app.pedido')),
+            ],
+        ),
+        migrations.RunPython(normalizar_estados, migrations.RunPython.noop),
+    ]
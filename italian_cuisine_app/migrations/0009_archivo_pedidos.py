@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0008_cocina_secuencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha', models.DateTimeField(db_index=True)),
+                ('estado', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('mesa_numero', models.PositiveIntegerField(null=True)),
+                ('mesero_id', models.IntegerField(null=True)),
+                ('mesero_usuario', models.CharField(blank=True, max_length=150)),
+                ('archivado', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DetalleArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('plato_id', models.IntegerField()),
+                ('plato_nombre', models.CharField(max_length=100)),
+                ('categoria_nombre', models.CharField(max_length=50)),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='italian_cuisine_app.pedidoarchivado')),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-17 15:56
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Subquery, When
+from django.db.models.functions import Cast
+
+
+def _precio_de_venta(precio_actual):
+    # El subtotal se calculó con el precio vigente al vender; solo sin cantidad se usa el actual
+    return Case(
+        # Cast evita la división entera de SQLite cuando el subtotal quedó guardado como entero
+        When(cantidad__gt=0, then=ExpressionWrapper(
+            Cast('subtotal', FloatField()) / F('cantidad'), output_field=DecimalField(max_digits=8, decimal_places=2),
+        )),
+        default=precio_actual,
+        output_field=DecimalField(max_digits=8, decimal_places=2),
+    )
+
+
+def copiar_platos(apps, schema_editor):
+    DetallePedido = apps.get_model('italian_cuisine_app', 'DetallePedido')
+    Plato = apps.get_model('italian_cuisine_app', 'Plato')
+    plato = Plato.objects.filter(pk=OuterRef('plato_id'))
+    DetallePedido.objects.update(
+        plato_nombre=Subquery(plato.values('nombre')[:1]),
+        categoria_nombre=Subquery(plato.values('categoria__nombre')[:1]),
+        precio_unitario=_precio_de_venta(Subquery(plato.values('precio')[:1])),
+    )
+
+
+def copiar_precios_archivados(apps, schema_editor):
+    DetalleArchivado = apps.get_model('italian_cuisine_app', 'DetalleArchivado')
+    DetalleArchivado.objects.update(precio_unitario=_precio_de_venta(0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0009_archivo_pedidos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detallearchivado',
+            name='precio_unitario',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='detallepedido',
+            name='categoria_nombre',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='detallepedido',
+            name='plato_nombre',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='detallepedido',
+            name='precio_unitario',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.RunPython(copiar_platos, migrations.RunPython.noop),
+        # Con model_name el router la ejecuta en la base de archivo
+        migrations.RunPython(
+            copiar_precios_archivados, migrations.RunPython.noop, hints={'model_name': 'detallearchivado'},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0010_copia_plato_en_detalle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedido',
+            name='clave_cliente',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:08
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Copia del tokenizador de italian_cuisine_app.busqueda tal como era al crear el índice: la
+# migración no debe cambiar si el módulo cambia después
+TAMANO_LOTE = 500
+LARGO_TERMINO = 150
+
+
+def palabras(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z0-9]+', texto)
+
+
+def terminos(first_name, last_name, email, telefono, username, email_usuario):
+    encontrados = set()
+    for texto in (first_name, last_name, email, telefono, username, email_usuario):
+        encontrados.update(palabras(texto))
+    digitos = ''.join(re.findall(r'\d', telefono or ''))
+    if digitos:
+        encontrados.add(digitos)
+    return {termino[:LARGO_TERMINO] for termino in encontrados}
+
+
+def indexar_empleados(apps, schema_editor):
+    Empleado = apps.get_model('italian_cuisine_app', 'Empleado')
+    TerminoEmpleado = apps.get_model('italian_cuisine_app', 'TerminoEmpleado')
+    filas = Empleado.objects.values_list(
+        'id', 'first_name', 'last_name', 'email', 'telefono', 'user__username', 'user__email',
+    )
+    nuevos = []
+    for empleado_id, *campos in filas.iterator(chunk_size=TAMANO_LOTE):
+        nuevos.extend(TerminoEmpleado(empleado_id=empleado_id, termino=termino) for termino in terminos(*campos))
+        if len(nuevos) >= TAMANO_LOTE:
+            TerminoEmpleado.objects.bulk_create(nuevos)
+            nuevos = []
+    TerminoEmpleado.objects.bulk_create(nuevos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0011_pedido_clave_cliente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoEmpleado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=150)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='empleado',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='empleado_nombre_idx'),
+        ),
+        migrations.AddField(
+            model_name='terminoempleado',
+            name='empleado',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='italian_cuisine_app.empleado'),
+        ),
+        migrations.AddIndex(
+            model_name='terminoempleado',
+            index=models.Index(fields=['termino', 'empleado'], name='termino_empleado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='terminoempleado',
+            index=models.Index(fields=['empleado', 'termino'], name='empleado_termino_idx'),
+        ),
+        migrations.RunPython(indexar_empleados, migrations.RunPython.noop),
+    ]
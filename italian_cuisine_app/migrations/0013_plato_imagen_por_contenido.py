@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 16:16
+
+import italian_cuisine_app.imagenes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0012_busqueda_empleados'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plato',
+            name='imagen',
+            field=models.ImageField(blank=True, null=True, storage=italian_cuisine_app.imagenes.AlmacenPorContenido(), upload_to='platos/'),
+        ),
+    ]
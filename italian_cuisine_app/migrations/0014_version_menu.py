@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 17:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def crear_version(apps, schema_editor):
+    # La fila existe desde el principio: invalidar_menu solo tiene que incrementarla
+    VersionMenu = apps.get_model('italian_cuisine_app', 'VersionMenu')
+    VersionMenu.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('italian_cuisine_app', '0013_plato_imagen_por_contenido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionMenu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=1)),
+                ('cambiado', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(crear_version, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,22 @@
-from django.db import models
+import copy
+import logging
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .imagenes import (
+    ERRORES_IMAGEN, AlmacenPorContenido, borrar_variantes, generar_variantes, variantes_existentes,
+)
+
+logger_imagenes = logging.getLogger('italian_cuisine_app.imagenes')
 
 
 # ==============================
@@ -20,6 +37,12 @@ class Empleado(models.Model):
     telefono = models.CharField(max_length=20, blank=True, null=True)
     fecha_ingreso = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Listado de empleados ordenado por apellido y nombre
+            models.Index(fields=['last_name', 'first_name', 'id'], name='empleado_nombre_idx'),
+        ]
+
     def __str__(self):
         # Preferir mostrar nombre completo si existe, luego usuario, sino id
         if self.first_name or self.last_name:
@@ -30,12 +53,66 @@ class Empleado(models.Model):
             return f"{self.user.username} ({self.cargo})"
         return f"Empleado #{self.pk} ({self.cargo})"
 
+    @classmethod
+    def de_usuario(cls, user):
+        """Empleado del usuario, resuelto desde la caché del proceso (o None)."""
+        if not user.is_authenticated:
+            return None
+        ahora = time.monotonic()
+        entrada = _empleados_por_usuario.get(user.pk)
+        if entrada is None or entrada[0] < ahora:
+            if len(_empleados_por_usuario) >= EMPLEADO_CACHE_MAX:
+                _empleados_por_usuario.clear()
+            entrada = (ahora + EMPLEADO_CACHE_TTL, cls.objects.filter(user_id=user.pk).first())
+            _empleados_por_usuario[user.pk] = entrada
+        if entrada[1] is None:
+            return None
+        # Cada petición recibe su propia copia, enlazada al User ya cargado por la autenticación
+        empleado = copy.copy(entrada[1])
+        empleado.user = user
+        return empleado
+
+    @staticmethod
+    def invalidar_cache():
+        _empleados_por_usuario.clear()
+
+
+# Caché por proceso: user_id -> (expira, Empleado o None). Se vacía al guardar o borrar un
+# Empleado; el TTL acota cuánto tarda otro proceso en ver un cambio de cargo.
+_empleados_por_usuario = {}
+EMPLEADO_CACHE_TTL = getattr(settings, 'EMPLEADO_CACHE_TTL', 300)
+EMPLEADO_CACHE_MAX = getattr(settings, 'EMPLEADO_CACHE_MAX', 10000)
+
+
+@receiver(post_save, sender=Empleado)
+@receiver(post_delete, sender=Empleado)
+def _invalidar_empleados(sender, **kwargs):
+    Empleado.invalidar_cache()
+
+
+class TerminoEmpleado(models.Model):
+    """Índice de búsqueda de empleados: una fila por palabra normalizada de sus datos.
+
+    Lo mantiene italian_cuisine_app.busqueda. Ambos índices cubren la consulta sin leer la tabla:
+    (termino, empleado) lista los empleados de un prefijo y (empleado, termino) comprueba si un
+    empleado dado tiene un término con ese prefijo.
+    """
+    empleado = models.ForeignKey(Empleado, on_delete=models.CASCADE, related_name='terminos', db_index=False)
+    termino = models.CharField(max_length=150)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['termino', 'empleado'], name='termino_empleado_idx'),
+            models.Index(fields=['empleado', 'termino'], name='empleado_termino_idx'),
+        ]
+
 
 # ==============================
 #  CATEGORÍA DE PLATOS
 # ==============================
 class Categoria(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
+    actualizado = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nombre
@@ -50,11 +127,57 @@ class Plato(models.Model):
     precio = models.DecimalField(max_digits=8, decimal_places=2)
     disponible = models.BooleanField(default=True)
     categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='platos')
-    imagen = models.ImageField(upload_to='platos/', blank=True, null=True)
+    # Nombre por contenido: la misma foto subida dos veces se guarda una sola vez
+    imagen = models.ImageField(upload_to='platos/', storage=AlmacenPorContenido(), blank=True, null=True)
+    # Marca de cambio para la API de menú (ETag/Last-Modified y ?since=)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.nombre} - ${self.precio}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda la imagen leída para borrar sus variantes si se reemplaza
+        instance._imagen_guardada = instance.__dict__.get('imagen')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Una imagen recién subida todavía no está "committed" en el storage
+        imagen_nueva = bool(self.imagen) and not self.imagen._committed
+        super().save(*args, **kwargs)
+        # Una foto repetida reutiliza el archivo y las variantes que ya existían
+        if imagen_nueva and not variantes_existentes(self.imagen):
+            try:
+                generar_variantes(self.imagen)
+            except ERRORES_IMAGEN:
+                # El plato ya está guardado: se queda con la imagen original, sin variantes
+                logger_imagenes.warning("No se pudieron generar las variantes de %s", self.imagen.name, exc_info=True)
+        anterior = getattr(self, '_imagen_guardada', None)
+        self._imagen_guardada = self.imagen.name or None
+        if anterior and anterior != self._imagen_guardada:
+            transaction.on_commit(lambda: self._borrar_variantes_sin_uso(anterior), using=kwargs.get('using'))
+
+    def _borrar_variantes_sin_uso(self, nombre):
+        # Con almacenamiento por contenido otro plato puede tener la misma foto
+        if not Plato.objects.filter(imagen=nombre).exists():
+            borrar_variantes(self.imagen.storage, nombre)
+
+
+class VersionMenu(models.Model):
+    """Versión del menú: una sola fila que se incrementa con cada cambio de platos o categorías.
+
+    Vive en la base, que es la fuente de verdad: la caché solo guarda una copia de vida corta
+    (ver ``menu.version_menu``) porque sin Redis es por proceso. ``cambiado`` registra también los borrados, que no
+    dejan rastro en ``actualizado``. Los cambios del menú son escasos: la fila no es un punto de
+    contención.
+    """
+    version = models.BigIntegerField(default=1)
+    cambiado = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Menú v{self.version}"
+
 
 # ==============================
 #  MESAS
@@ -66,6 +189,31 @@ class Mesa(models.Model):
     def __str__(self):
         return f"Mesa {self.numero}"
 
+    def ocupar(self):
+        """Ocupa la mesa con UPDATE ... WHERE ocupada = false. Devuelve False si ya estaba ocupada."""
+        tomada = Mesa.objects.filter(pk=self.pk, ocupada=False).update(ocupada=True)
+        if tomada:
+            self.ocupada = True
+        return bool(tomada)
+
+    def liberar(self):
+        """Libera la mesa con un UPDATE condicional de una sola columna."""
+        liberada = Mesa.objects.filter(pk=self.pk, ocupada=True).update(ocupada=False)
+        self.ocupada = False
+        return bool(liberada)
+
+
+class MesaOcupada(Exception):
+    """La mesa fue ocupada por otra petición entre la validación y la creación del pedido."""
+
+
+class TransicionInvalida(Exception):
+    """La máquina de estados de Pedido no permite el cambio pedido."""
+
+
+class EstadoCambiado(TransicionInvalida):
+    """El pedido ya no estaba en el estado esperado (otro usuario lo cambió antes)."""
+
 
 # ==============================
 #  PEDIDOS
@@ -75,21 +223,155 @@ class Pedido(models.Model):
         ('espera', 'En espera'),
         ('proceso', 'En proceso'),
         ('listo', 'Listo'),
+        ('cerrado', 'Cerrado'),
     )
+    # Máquina de estados: destinos válidos desde cada estado (cerrado es final)
+    TRANSICIONES = {
+        'espera': ('proceso', 'cerrado'),
+        'proceso': ('listo', 'cerrado'),
+        'listo': ('cerrado',),
+    }
+    # Pedidos que la cocina todavía tiene que preparar
+    ESTADOS_COCINA = ('espera', 'proceso')
 
     mesa = models.ForeignKey(Mesa, on_delete=models.SET_NULL, null=True, blank=True)
     mesero = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     fecha = models.DateTimeField(auto_now_add=True)
     estado = models.CharField(max_length=20, choices=ESTADOS, default='espera')
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Id del último CambioPedido del pedido; cambia con cualquier modificación
+    secuencia = models.BigIntegerField(default=0)
+    # Clave de idempotencia de los pedidos encolados sin conexión; el índice único impide aplicarlos dos veces
+    clave_cliente = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Listados paginados por cursor (fecha, id) de un mesero o de un estado
+            models.Index(fields=['mesero', 'fecha'], name='pedido_mesero_fecha_idx'),
+            models.Index(fields=['estado', 'fecha'], name='pedido_estado_fecha_idx'),
+            # Exportación contable por rango de fechas, ya ordenada por fecha
+            models.Index(fields=['fecha'], name='pedido_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Pedido #{self.id} - {self.estado}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda el estado leído para detectar el cierre al guardar
+        instance._estado_guardado = instance.__dict__.get('estado')
+        return instance
+
+    def save(self, *args, **kwargs):
+        nuevo = self._state.adding
+        cerrando = (
+            not nuevo
+            and self.estado == 'cerrado'
+            and getattr(self, '_estado_guardado', None) not in (None, 'cerrado')
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._marcar_cambio()
+            # Los resúmenes del dashboard se actualizan en la misma transacción
+            if nuevo:
+                ResumenVentas.registrar(self, pedidos=1, pedidos_cerrados=int(self.estado == 'cerrado'))
+            elif cerrando:
+                ResumenVentas.registrar(self, pedidos_cerrados=1)
+        self._estado_guardado = self.estado
+
     def calcular_total(self):
-        total = sum(detalle.subtotal for detalle in self.detallepedido_set.all())
+        """Recalcula el total desde cero sumando las líneas en la base de datos (reparación)."""
+        total = self.detallepedido_set.aggregate(
+            total=Coalesce(Sum('subtotal'), Value(Decimal('0')))
+        )['total']
+        Pedido.objects.filter(pk=self.pk).update(total=total)
         self.total = total
-        self.save()
+
+    def cambiar_estado(self, desde, hacia):
+        """Pasa de ``desde`` a ``hacia`` con un UPDATE condicionado al estado actual.
+
+        Lanza TransicionInvalida si la máquina de estados no permite el paso y EstadoCambiado si
+        otro usuario ya movió el pedido (el UPDATE no encontró la fila en ``desde``).
+        """
+        if hacia not in self.TRANSICIONES.get(desde, ()):
+            raise TransicionInvalida(f"No se puede pasar de '{desde}' a '{hacia}'.")
+        with transaction.atomic():
+            if not Pedido.objects.filter(pk=self.pk, estado=desde).update(estado=hacia):
+                raise EstadoCambiado(f"El pedido #{self.pk} ya no está en '{desde}'.")
+            self.estado = hacia
+            self._marcar_cambio()
+            if hacia == 'cerrado':
+                ResumenVentas.registrar(self, pedidos_cerrados=1)
+        self._estado_guardado = hacia
+
+    def _ajustar_total(self, delta):
+        """Aplica un delta al total con un UPDATE atómico (total = total + delta)."""
+        if delta:
+            Pedido.objects.filter(pk=self.pk).update(total=F('total') + delta)
+        # Siempre se marca el cambio: la cocina necesita ver las líneas nuevas aunque no cambie el total
+        self._marcar_cambio()
+        # La base de datos es la fuente de verdad; el valor en memoria solo se ajusta para mostrarlo
+        self.total = (self.total or 0) + delta
+
+    def _marcar_cambio(self):
+        """Registra un CambioPedido en la transacción en curso y guarda su id como ``secuencia``."""
+        with transaction.atomic(savepoint=False):
+            self.secuencia = CambioPedido.objects.create(pedido_id=self.pk).id
+            Pedido.objects.filter(pk=self.pk).update(secuencia=self.secuencia)
+
+    def agregar_detalle(self, plato, cantidad=1):
+        """Agrega una línea al pedido y suma su subtotal con un único UPDATE."""
+        detalle = DetallePedido(pedido=self, plato=plato, cantidad=cantidad)
+        detalle.save()
+        return detalle
+
+    def agregar_detalles(self, lineas):
+        """Agrega varias líneas (plato, cantidad) con un solo INSERT y un solo UPDATE del total."""
+        detalles = []
+        for plato, cantidad in lineas:
+            detalle = DetallePedido(pedido=self, cantidad=cantidad)
+            detalle.copiar_plato(plato)
+            detalle.subtotal = detalle.precio_unitario * cantidad
+            detalles.append(detalle)
+        if not detalles:
+            return []
+        with transaction.atomic():
+            DetallePedido.objects.bulk_create(detalles)
+            self._ajustar_total(sum((detalle.subtotal for detalle in detalles), Decimal('0')))
+            ResumenVentas.registrar_lineas(
+                self, [(detalle.plato_id, detalle.cantidad, detalle.subtotal) for detalle in detalles]
+            )
+        return detalles
+
+    @classmethod
+    def recalcular_totales(cls, queryset=None):
+        """Repara los totales de todos los pedidos (o de ``queryset``) en un solo UPDATE."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        subtotales = (
+            DetallePedido.objects.filter(pedido=OuterRef('pk'))
+            .order_by()
+            .values('pedido')
+            .annotate(suma=Sum('subtotal'))
+            .values('suma')
+        )
+        return queryset.update(
+            total=Coalesce(Subquery(subtotales), Value(Decimal('0')), output_field=models.DecimalField())
+        )
+
+
+class CambioPedido(models.Model):
+    """Registro de cambios de pedidos, solo de inserción; el id es el orden de los cambios.
+
+    Cada fila se inserta en la misma transacción que el cambio, así que nunca queda visible un
+    cambio sin su fila. No hay una fila contador compartida: los escritores no se bloquean entre sí.
+    """
+    id = models.BigAutoField(primary_key=True)
+    pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name='cambios')
+    creado = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Cambio #{self.id} del pedido #{self.pedido_id}"
 
 
 # ==============================
@@ -100,16 +382,189 @@ class DetallePedido(models.Model):
     plato = models.ForeignKey(Plato, on_delete=models.CASCADE)
     cantidad = models.PositiveIntegerField(default=1)
     subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Copia del plato al momento de la venta: los listados no necesitan cargar Plato y editar el
+    # menú no cambia cómo se ven los pedidos anteriores
+    plato_nombre = models.CharField(max_length=100, blank=True)
+    categoria_nombre = models.CharField(max_length=50, blank=True)
+    precio_unitario = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda la cantidad y el subtotal leídos para calcular el delta al guardar
+        instance._cantidad_guardada = instance.__dict__.get('cantidad')
+        instance._subtotal_guardado = instance.__dict__.get('subtotal')
+        return instance
+
+    def copiar_plato(self, plato):
+        """Fija el plato de la línea junto con su nombre, categoría y precio vigentes."""
+        self.plato = plato
+        self.plato_nombre = plato.nombre
+        self.categoria_nombre = plato.categoria.nombre
+        self.precio_unitario = plato.precio
 
     def save(self, *args, **kwargs):
-        # Calcula el subtotal antes de guardar
-        self.subtotal = self.plato.precio * self.cantidad
-        super().save(*args, **kwargs)
-        # Actualiza el total del pedido automáticamente
-        self.pedido.calcular_total()
+        if self._state.adding and not self.plato_nombre:
+            self.copiar_plato(self.plato)
+        # El subtotal sale del precio copiado, no del precio actual del plato
+        self.subtotal = self.precio_unitario * self.cantidad
+        cantidad_anterior = getattr(self, '_cantidad_guardada', None) or 0
+        subtotal_anterior = getattr(self, '_subtotal_guardado', None) or 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Ajusta el total del pedido solo con la diferencia, sin recontar las líneas
+            self._registrar_cambio(self.cantidad - cantidad_anterior, self.subtotal - subtotal_anterior)
+        self._cantidad_guardada = self.cantidad
+        self._subtotal_guardado = self.subtotal
+
+    def cambiar_cantidad(self, cantidad):
+        """Cambia la cantidad de la línea y ajusta el total del pedido con la diferencia."""
+        self.cantidad = cantidad
+        self.save(update_fields=['cantidad', 'subtotal'])
+
+    def delete(self, *args, **kwargs):
+        # Resta la cantidad y el subtotal guardados del pedido y de los resúmenes
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            self._registrar_cambio(
+                -(getattr(self, '_cantidad_guardada', None) or 0),
+                -(getattr(self, '_subtotal_guardado', None) or 0),
+            )
+        return resultado
+
+    def _registrar_cambio(self, delta_cantidad, delta_subtotal):
+        self.pedido._ajustar_total(delta_subtotal)
+        ResumenVentas.registrar_lineas(self.pedido, [(self.plato_id, delta_cantidad, delta_subtotal)])
 
     def __str__(self):
-        return f"{self.plato.nombre} x {self.cantidad}"
+        return f"{self.plato_nombre} x {self.cantidad}"
 
 # Nota: la clase Pedido ya estaba definida arriba con campos completos y relación con Mesa,
-# User y DetallePedido. Nos aseguramos de que ese modelo es el único en este archivo.
\ No newline at end of file
+# User y DetallePedido. Nos aseguramos de que ese modelo es el único en este archivo.
+
+
+# ==============================
+#  RESÚMENES PARA EL DASHBOARD
+# ==============================
+def _incrementar(modelo, claves, deltas):
+    """UPDATE ... SET campo = campo + delta sobre la fila ``claves``; la crea si aún no existe."""
+    deltas = {campo: valor for campo, valor in deltas.items() if valor}
+    if not deltas:
+        return
+    cambios = {campo: F(campo) + valor for campo, valor in deltas.items()}
+    if modelo.objects.filter(**claves).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**claves, **deltas)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        modelo.objects.filter(**claves).update(**cambios)
+
+
+class ResumenVentas(models.Model):
+    """Acumulado por día, hora y mesero que se actualiza al crear y cerrar pedidos."""
+    fecha = models.DateField()
+    hora = models.PositiveSmallIntegerField()
+    # Ids sin clave foránea: el histórico se conserva aunque se borre el usuario (0 = sin mesero)
+    mesero_id = models.IntegerField(default=0)
+    pedidos = models.IntegerField(default=0)
+    pedidos_cerrados = models.IntegerField(default=0)
+    ventas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    platos_vendidos = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'hora', 'mesero_id'], name='resumen_ventas_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.hora:02d}h mesero {self.mesero_id}"
+
+    @staticmethod
+    def _claves(pedido):
+        fecha = timezone.localtime(pedido.fecha) if timezone.is_aware(pedido.fecha) else pedido.fecha
+        return {'fecha': fecha.date(), 'hora': fecha.hour, 'mesero_id': pedido.mesero_id or 0}
+
+    @classmethod
+    def registrar(cls, pedido, **deltas):
+        _incrementar(cls, cls._claves(pedido), deltas)
+
+    @classmethod
+    def registrar_lineas(cls, pedido, lineas):
+        """Suma las líneas ``(plato_id, cantidad, subtotal)`` del pedido al resumen horario y por plato."""
+        claves = cls._claves(pedido)
+        por_plato = {}
+        for plato_id, cantidad, subtotal in lineas:
+            acumulado = por_plato.setdefault(plato_id, [0, Decimal('0')])
+            acumulado[0] += cantidad
+            acumulado[1] += subtotal
+        _incrementar(cls, claves, {
+            'ventas': sum((ventas for _, ventas in por_plato.values()), Decimal('0')),
+            'platos_vendidos': sum(cantidad for cantidad, _ in por_plato.values()),
+        })
+        for plato_id, (cantidad, ventas) in por_plato.items():
+            _incrementar(ResumenPlato, {'fecha': claves['fecha'], 'plato_id': plato_id},
+                         {'cantidad': cantidad, 'ventas': ventas})
+
+    @classmethod
+    def totales_del_dia(cls, fecha):
+        """Totales de un día leyendo solo sus filas del resumen (como mucho 24 por mesero)."""
+        # meseros_activos va primero: su filtro usa la columna "pedidos", no el agregado del mismo nombre
+        return cls.objects.filter(fecha=fecha).aggregate(
+            meseros_activos=Count('mesero_id', distinct=True, filter=Q(pedidos__gt=0) & ~Q(mesero_id=0)),
+            pedidos=Coalesce(Sum('pedidos'), 0),
+            pedidos_cerrados=Coalesce(Sum('pedidos_cerrados'), 0),
+            ventas=Coalesce(Sum('ventas'), Value(Decimal('0'))),
+            platos_vendidos=Coalesce(Sum('platos_vendidos'), 0),
+        )
+
+
+class ResumenPlato(models.Model):
+    """Unidades y ventas de cada plato por día."""
+    fecha = models.DateField()
+    plato_id = models.IntegerField()
+    cantidad = models.IntegerField(default=0)
+    ventas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'plato_id'], name='resumen_plato_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} plato {self.plato_id}: {self.cantidad}"
+
+
+# ==============================
+#  ARCHIVO DE PEDIDOS CERRADOS
+# ==============================
+# Viven en la base "archivo" (ver routers.py), así que no tienen claves foráneas hacia las
+# tablas operativas: mesa, mesero y plato se copian como valores al archivar.
+class PedidoArchivado(models.Model):
+    """Pedido cerrado movido desde Pedido por el comando archivar_pedidos (conserva su id)."""
+    id = models.BigIntegerField(primary_key=True)
+    fecha = models.DateTimeField(db_index=True)
+    estado = models.CharField(max_length=20)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    mesa_numero = models.PositiveIntegerField(null=True)
+    mesero_id = models.IntegerField(null=True)
+    mesero_usuario = models.CharField(max_length=150, blank=True)
+    archivado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pedido archivado #{self.id}"
+
+
+class DetalleArchivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    pedido = models.ForeignKey(PedidoArchivado, on_delete=models.CASCADE, related_name='lineas')
+    plato_id = models.IntegerField()
+    plato_nombre = models.CharField(max_length=100)
+    categoria_nombre = models.CharField(max_length=50)
+    precio_unitario = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=1)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.plato_nombre} x {self.cantidad}"
@@ -0,0 +1,78 @@
+"""Paginación por cursor (keyset) de pedidos sobre ``(fecha, id)`` descendente.
+
+En lugar de OFFSET, cada página filtra por "anteriores al último pedido visto", así que el costo
+de una página no depende de cuántos pedidos históricos haya; los índices ``(mesero, fecha)`` y
+``(estado, fecha)`` de Pedido sirven esas consultas.
+"""
+import base64
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+TAMANO_PAGINA = 20
+
+
+def codificar_cursor(pedido):
+    valor = f"{pedido.fecha.isoformat()}|{pedido.pk}"
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve ``(fecha, id)`` o None si el cursor no es válido."""
+    try:
+        valor = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, pk = valor.split('|')
+        return datetime.fromisoformat(fecha), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def filtrar_pedidos(queryset, params, por_defecto_hoy=True):
+    """Aplica los filtros ``desde``, ``hasta`` y ``estado`` de la querystring.
+
+    Sin filtros (y con ``por_defecto_hoy``) muestra los pedidos abiertos de hoy. ``estado`` acepta
+    un valor de Pedido.estado, ``abiertos`` (todo menos cerrados) o ``todos``.
+    """
+    desde, hasta = _fecha(params.get('desde')), _fecha(params.get('hasta'))
+    estado = params.get('estado', '')
+    if por_defecto_hoy and not (desde or hasta or estado):
+        desde, estado = timezone.localdate(), 'abiertos'
+
+    zona = timezone.get_current_timezone()
+    # Rangos sobre la columna (no fecha__date) para que el índice pueda usarse
+    if desde:
+        queryset = queryset.filter(fecha__gte=datetime.combine(desde, time.min, zona))
+    if hasta:
+        queryset = queryset.filter(fecha__lt=datetime.combine(hasta + timedelta(days=1), time.min, zona))
+    if estado == 'abiertos':
+        queryset = queryset.exclude(estado='cerrado')
+    elif estado and estado != 'todos':
+        queryset = queryset.filter(estado=estado)
+
+    filtros = {
+        'desde': desde.isoformat() if desde else '',
+        'hasta': hasta.isoformat() if hasta else '',
+        'estado': estado,
+    }
+    return queryset, filtros
+
+
+def paginar_por_cursor(queryset, cursor=None, tamano=TAMANO_PAGINA):
+    """Devuelve ``(pedidos, siguiente_cursor)``; ``siguiente_cursor`` es None en la última página."""
+    queryset = queryset.order_by('-fecha', '-id')
+    posicion = decodificar_cursor(cursor) if cursor else None
+    if posicion:
+        fecha, pk = posicion
+        queryset = queryset.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=pk))
+    # Se pide uno de más para saber si hay otra página sin hacer COUNT
+    pedidos = list(queryset[:tamano + 1])
+    siguiente = codificar_cursor(pedidos[tamano - 1]) if len(pedidos) > tamano else None
+    return pedidos[:tamano], siguiente
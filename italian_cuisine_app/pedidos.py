@@ -0,0 +1,148 @@
+"""Alta de pedidos: validación de líneas, registro transaccional y lotes encolados sin conexión.
+
+Cuando se corta el wifi, el punto de venta guarda los pedidos en cola, cada uno con una clave de
+idempotencia generada en el cliente, y al reconectar los envía juntos a ``registrar_lote``. La
+clave queda en ``Pedido.clave_cliente`` (índice único): si el lote se reenvía, las claves ya
+aplicadas se informan como duplicadas en lugar de crear otro pedido.
+"""
+import json
+
+from django.db import IntegrityError, transaction
+
+from .eventos import publicar_mesa, publicar_pedido
+from .models import Mesa, MesaOcupada, Pedido, Plato
+
+LOTE_MAXIMO = 100
+
+
+class ErrorLote(Exception):
+    """El lote, o uno de sus pedidos, no tiene la forma esperada."""
+
+
+def lineas_pedido(platos, cantidades):
+    """``[(plato_id, cantidad), ...]`` desde las listas del formulario, o None si alguna no es válida."""
+    try:
+        lineas = [(int(plato_id), int(cantidad)) for plato_id, cantidad in zip(platos, cantidades, strict=True)]
+    except (TypeError, ValueError):
+        return None
+    if not lineas or any(cantidad <= 0 for _, cantidad in lineas):
+        return None
+    return lineas
+
+
+def registrar_pedido(mesa, usuario, lineas, platos_por_id, clave=None):
+    """Ocupa la mesa y crea el pedido con sus líneas en una transacción. Lanza MesaOcupada.
+
+    Con ``clave``, un pedido ya registrado con la misma clave hace fallar el INSERT con
+    IntegrityError y la transacción no deja rastro (tampoco ocupa la mesa).
+    """
+    with transaction.atomic():
+        # Primero se reclama la mesa: solo una petición concurrente puede ganar este UPDATE
+        if not mesa.ocupar():
+            raise MesaOcupada()
+
+        pedido = Pedido.objects.create(
+            mesa=mesa,
+            mesero=usuario,
+            estado='espera',
+            total=0,
+            clave_cliente=clave,
+        )
+
+        # Un solo INSERT para las líneas y un solo UPDATE para el total
+        pedido.agregar_detalles((platos_por_id[plato_id], cantidad) for plato_id, cantidad in lineas)
+
+        publicar_mesa(mesa)
+        publicar_pedido(pedido)
+    return pedido
+
+
+def leer_lote(cuerpo):
+    """Lista de pedidos de un cuerpo JSON ``{"pedidos": [...]}``. Lanza ErrorLote."""
+    try:
+        datos = json.loads(cuerpo)
+    except ValueError:
+        raise ErrorLote("El cuerpo debe ser JSON.")
+    pedidos = datos.get('pedidos') if isinstance(datos, dict) else None
+    if not isinstance(pedidos, list) or not pedidos:
+        raise ErrorLote("Se esperaba {\"pedidos\": [...]} con al menos un pedido.")
+    if len(pedidos) > LOTE_MAXIMO:
+        raise ErrorLote(f"Un lote admite como máximo {LOTE_MAXIMO} pedidos.")
+    return pedidos
+
+
+def _leer_pedido(pedido):
+    """``(clave, mesa_id, lineas)`` de un pedido del lote. Lanza ErrorLote."""
+    if not isinstance(pedido, dict):
+        raise ErrorLote("Cada pedido debe ser un objeto.")
+    clave = pedido.get('clave')
+    if not isinstance(clave, str) or not clave.strip():
+        raise ErrorLote("Falta la clave del pedido.")
+    if len(clave) > Pedido._meta.get_field('clave_cliente').max_length:
+        raise ErrorLote("La clave del pedido es demasiado larga.")
+    try:
+        mesa_id = int(pedido.get('mesa'))
+    except (TypeError, ValueError):
+        raise ErrorLote("Debe indicar la mesa.")
+    platos, cantidades = pedido.get('platos'), pedido.get('cantidades')
+    lineas = lineas_pedido(platos, cantidades) if isinstance(platos, list) and isinstance(cantidades, list) else None
+    if not lineas:
+        raise ErrorLote("Las cantidades del pedido no son válidas.")
+    return clave, mesa_id, lineas
+
+
+def registrar_lote(pedidos, usuario):
+    """Aplica un lote en una sola transacción y devuelve un resultado por pedido, en el mismo orden.
+
+    Cada resultado trae la ``clave`` y un ``estado``: ``creado`` (con ``id`` y ``total``),
+    ``duplicado`` (la clave ya estaba aplicada; ``id`` del pedido original) o ``error`` (con el
+    motivo). Cada pedido va en su propio savepoint: uno rechazado no deshace a los demás.
+    """
+    leidos = []
+    for pedido in pedidos:
+        try:
+            leidos.append(_leer_pedido(pedido))
+        except ErrorLote as e:
+            clave = pedido.get('clave') if isinstance(pedido, dict) else None
+            leidos.append((clave if isinstance(clave, str) else None, e))
+    validos = [leido for leido in leidos if len(leido) == 3]
+
+    # Tres consultas para todo el lote: claves ya aplicadas, mesas y platos
+    aplicadas = dict(
+        Pedido.objects.filter(clave_cliente__in={clave for clave, _, _ in validos})
+        .values_list('clave_cliente', 'id')
+    )
+    mesas = Mesa.objects.in_bulk({mesa_id for _, mesa_id, _ in validos})
+    platos_por_id = Plato.objects.select_related('categoria').in_bulk(
+        {plato_id for _, _, lineas in validos for plato_id, _ in lineas}
+    )
+
+    resultados = []
+    with transaction.atomic():
+        for leido in leidos:
+            if len(leido) == 2:
+                resultados.append({'clave': leido[0], 'estado': 'error', 'error': str(leido[1])})
+                continue
+            clave, mesa_id, lineas = leido
+            resultados.append(_aplicar(clave, mesas.get(mesa_id), lineas, platos_por_id, aplicadas, usuario))
+    return resultados
+
+
+def _aplicar(clave, mesa, lineas, platos_por_id, aplicadas, usuario):
+    if clave in aplicadas:
+        return {'clave': clave, 'estado': 'duplicado', 'id': aplicadas[clave]}
+    if mesa is None:
+        return {'clave': clave, 'estado': 'error', 'error': "Mesa inexistente."}
+    faltantes = sorted({plato_id for plato_id, _ in lineas} - platos_por_id.keys())
+    if faltantes:
+        return {'clave': clave, 'estado': 'error', 'error': f"Platos inexistentes: {', '.join(map(str, faltantes))}."}
+    try:
+        pedido = registrar_pedido(mesa, usuario, lineas, platos_por_id, clave=clave)
+    except MesaOcupada:
+        return {'clave': clave, 'estado': 'error', 'error': f"La Mesa {mesa.numero} ya está ocupada."}
+    except IntegrityError:
+        # Otro envío del mismo lote insertó la clave entre la consulta inicial y este INSERT
+        pedido_id = Pedido.objects.filter(clave_cliente=clave).values_list('id', flat=True).first()
+        return {'clave': clave, 'estado': 'duplicado', 'id': pedido_id}
+    aplicadas[clave] = pedido.id
+    return {'clave': clave, 'estado': 'creado', 'id': pedido.id, 'total': pedido.total}
@@ -0,0 +1,36 @@
+"""Enrutado entre la base operativa (``default``) y la de archivo.
+
+PedidoArchivado y DetalleArchivado se leen, escriben y migran solo en ``archivo``; todos los
+demás modelos solo en ``default``. La base de archivo se crea con
+``python manage.py migrate --database=archivo``.
+"""
+ARCHIVO = 'archivo'
+MODELOS_ARCHIVO = {'pedidoarchivado', 'detallearchivado'}
+APP = 'italian_cuisine_app'
+
+
+def es_de_archivo(app_label, model_name):
+    return app_label == APP and model_name in MODELOS_ARCHIVO
+
+
+class ArchivoRouter:
+    def _base(self, modelo):
+        # Acepta clases o instancias (también request.user, que es un SimpleLazyObject)
+        meta = modelo._meta
+        return ARCHIVO if es_de_archivo(meta.app_label, meta.model_name) else 'default'
+
+    def db_for_read(self, model, **hints):
+        return self._base(model)
+
+    def db_for_write(self, model, **hints):
+        return self._base(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Solo relaciones dentro de una misma base
+        return self._base(obj1) == self._base(obj2)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if es_de_archivo(app_label, model_name):
+            return db == ARCHIVO
+        # Las migraciones de datos (sin model_name) y el resto de modelos van solo a default
+        return db != ARCHIVO
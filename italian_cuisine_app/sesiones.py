@@ -0,0 +1,46 @@
+"""Sesiones leídas desde la caché con escritura en la base, y limpieza de las expiradas por lotes.
+
+Motor de sesiones por defecto (``SESIONES=cache_db``, ver settings): el ``cached_db`` de Django.
+Mientras la sesión está en la caché, leerla no toca la base; guardarla (inicio de sesión, un
+mensaje, un cambio de datos) escribe en las dos, así que sobrevive a un reinicio de la caché.
+
+``clear_expired`` (y por tanto ``manage.py clearsessions``) borra de a ``TAMANO_LOTE`` sesiones
+por sentencia, cada lote en su propia transacción corta: un único DELETE de todas las expiradas
+retendría el lock de escritura de SQLite mientras entran pedidos. ``limpiar_sesiones`` repite la
+limpieza periódicamente.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.backends import cached_db
+from django.utils import timezone
+
+TAMANO_LOTE = 500
+
+
+def borrar_expiradas(modelo, lote=TAMANO_LOTE, pausa=0):
+    """Borra las sesiones de ``modelo`` expiradas, ``lote`` por sentencia. Devuelve cuántas borró.
+
+    ``pausa`` (segundos) entre lotes deja pasar a otras escrituras que esperan el lock.
+    """
+    ahora = timezone.now()
+    borradas = 0
+    while True:
+        # Dos consultas por lote en lugar de DELETE ... LIMIT, que no todas las bases admiten
+        claves = list(modelo.objects.filter(expire_date__lt=ahora).values_list('pk', flat=True)[:lote])
+        if claves:
+            borradas += modelo.objects.filter(pk__in=claves).delete()[0]
+        if len(claves) < lote:
+            return borradas
+        if pausa:
+            time.sleep(pausa)
+
+
+class SessionStore(cached_db.SessionStore):
+    @classmethod
+    def clear_expired(cls):
+        borrar_expiradas(cls.get_model_class())
+
+    @classmethod
+    async def aclear_expired(cls):
+        await sync_to_async(cls.clear_expired)()
@@ -0,0 +1,28 @@
+(function(){
+  function openModal(){const r=document.getElementById('modal-root');if(!r)return;r.setAttribute('aria-hidden','false');document.body.style.overflow='hidden';}
+  function closeModal(){const r=document.getElementById('modal-root');if(!r)return;r.setAttribute('aria-hidden','true');const b=document.getElementById('modal-body');if(b)b.innerHTML='';document.body.style.overflow='';}
+  function getCookie(name){let cV=null;if(document.cookie&&document.cookie!==''){const c=document.cookie.split(';');for(let i=0;i<c.length;i++){const cookie=c[i].trim();if(cookie.substring(0,name.length+1)===(name+'=')){cV=decodeURIComponent(cookie.substring(name.length+1));break;}}}return cV;}
+  function showToast(m,t='success',time=3500){const c=document.getElementById('toast-container');if(!c)return;const d=document.createElement('div');d.className='toast '+(t?t:'');d.textContent=m;c.appendChild(d);requestAnimationFrame(()=>d.classList.add('show'));setTimeout(()=>{d.classList.remove('show');setTimeout(()=>d.remove(),220);},time);}
+  function attachModalFormHandler(){
+    const m=document.getElementById('modal-body');
+    if(!m)return;
+    const f=m.querySelector('form');
+    if(!f)return;
+    f.addEventListener('submit',function(e){
+      e.preventDefault();
+      const a=f.action||window.location.href;
+      const method=(f.method||'post').toUpperCase();
+      const data=new FormData(f);
+      const h={'X-Requested-With':'XMLHttpRequest'};
+      const cs=getCookie('csrftoken');
+      if(cs)h['X-CSRFToken']=cs;
+      fetch(a,{method:method,headers:h,body:data})
+      .then(r=>{const ct=r.headers.get('content-type')||'';if(ct.indexOf('application/json')!==-1){return r.json().then(j=>({json:j}));}return r.text().then(t=>({text:t,status:r.status}));})
+      .then(res=>handleAjaxResult(res))
+      .catch(err=>{console.error('Error enviando formulario en modal',err);showToast('Error de red','error');});
+    },{once:true});
+  }
+  function handleAjaxResult(res){if(res.json){if(res.json.success){closeModal();window.location.reload();return;}else if(res.json.html){document.getElementById('modal-body').innerHTML=res.json.html;attachModalFormHandler();return;}}else if(res.text){document.getElementById('modal-body').innerHTML=res.text;attachModalFormHandler();}}
+  document.addEventListener('click',function(e){const el=e.target.closest('[data-modal="true"]');if(!el)return;e.preventDefault();const url=el.getAttribute('href');fetch(url,{headers:{'X-Requested-With':'XMLHttpRequest'}}).then(r=>r.text()).then(html=>{document.getElementById('modal-body').innerHTML=html;openModal();attachModalFormHandler();}).catch(err=>{console.error(err);showToast('Error cargando contenido','error');});});
+  document.addEventListener('click',function(e){const el=e.target.closest('[data-modal-close]');if(!el)return;e.preventDefault();closeModal();});
+})();
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.html import format_html
+
+from ..imagenes import atributos_imagen
+
+register = template.Library()
+
+
+@register.simple_tag
+def imagen_plato(imagen, alt='', sizes='160px'):
+    """<img> con la variante adecuada y ``srcset`` para que el navegador elija el ancho."""
+    src, srcset = atributos_imagen(imagen)
+    if not srcset:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', src, alt)
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy">', src, srcset, sizes, alt
+    )
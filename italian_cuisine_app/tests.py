@@ -1,3 +1,1063 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import posixpath
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import busqueda, cocina, eventos, pedidos as modulo_pedidos
+from .archivo import archivar_pedidos, lineas_historial
+from .autenticacion import UsuarioEnCacheBackend, clave_usuario
+from .busqueda import buscar_empleados
+from .cocina import cambios_desde, cola_cocina
+from .eventos import Hub, flujo_sse, publicar_mesa
+from .imagenes import es_por_contenido, generar_variantes, ruta_variante, variantes_existentes
+from .importacion import importar_menu
+from .management.commands import deduplicar_imagenes
+from .management.commands.simular_carga import percentil
+from .menu import invalidar_menu, obtener_menu, version_menu
+from .middleware import EmpleadoMiddleware
+from .models import (
+    CambioPedido, Categoria, DetallePedido, Empleado, EstadoCambiado, Mesa, Pedido, PedidoArchivado, Plato,
+    ResumenVentas, TransicionInvalida, VersionMenu,
+)
+from .paginacion import decodificar_cursor, filtrar_pedidos, paginar_por_cursor
+from .pedidos import registrar_lote
+from .sesiones import borrar_expiradas
+
+
+class DatosPedidos:
+    """Un mesero, dos platos y tres mesas libres."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mesero = User.objects.create_user('mesero', password='clave12345')
+        categoria = Categoria.objects.create(nombre='Pastas')
+        cls.lasana = Plato.objects.create(nombre='Lasaña', precio=Decimal('12.50'), categoria=categoria)
+        cls.ravioli = Plato.objects.create(nombre='Ravioli', precio=Decimal('10.00'), categoria=categoria)
+        cls.mesas = [Mesa.objects.create(numero=numero) for numero in (1, 2, 3)]
+
+    def crear_pedido(self, mesa=None, estado='espera', fecha=None):
+        pedido = Pedido.objects.create(mesa=mesa, mesero=self.mesero, estado=estado)
+        if fecha is not None:
+            # fecha es auto_now_add: se fija después del INSERT
+            Pedido.objects.filter(pk=pedido.pk).update(fecha=fecha)
+            pedido.fecha = fecha
+        return pedido
+
+
+# ==============================
+#  EMPLEADO DE LA PETICIÓN
+# ==============================
+class EmpleadoPeticionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('mesero', password='clave12345')
+        cls.empleado = Empleado.objects.create(user=cls.usuario, cargo='mesero', first_name='Ana')
+
+    def setUp(self):
+        Empleado.invalidar_cache()
+
+    def test_se_consulta_una_sola_vez_por_proceso(self):
+        with self.assertNumQueries(1):
+            primero = Empleado.de_usuario(self.usuario)
+        with self.assertNumQueries(0):
+            segundo = Empleado.de_usuario(self.usuario)
+
+        self.assertEqual(segundo.pk, self.empleado.pk)
+        # Cada llamada recibe su propia copia, enlazada al usuario ya cargado
+        self.assertIsNot(primero, segundo)
+        self.assertIs(segundo.user, self.usuario)
+
+    def test_guardar_el_empleado_vacia_la_cache(self):
+        Empleado.de_usuario(self.usuario)
+        Empleado.objects.filter(pk=self.empleado.pk).update(cargo='administrador')
+        self.assertEqual(Empleado.de_usuario(self.usuario).cargo, 'mesero')
+
+        self.empleado.refresh_from_db()
+        self.empleado.save()
+        self.assertEqual(Empleado.de_usuario(self.usuario).cargo, 'administrador')
+
+    def test_usuario_sin_empleado_o_anonimo(self):
+        otro = User.objects.create_user('sin_ficha')
+        self.assertIsNone(Empleado.de_usuario(otro))
+        with self.assertNumQueries(0):
+            self.assertIsNone(Empleado.de_usuario(otro))
+            self.assertIsNone(Empleado.de_usuario(AnonymousUser()))
+
+    def test_middleware_solo_consulta_si_se_usa(self):
+        peticiones = []
+
+        def vista(request):
+            peticiones.append(request)
+            return HttpResponse()
+
+        middleware = EmpleadoMiddleware(vista)
+        request = RequestFactory().get('/')
+        request.user = self.usuario
+        with self.assertNumQueries(0):
+            middleware(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(peticiones[0].empleado.first_name, 'Ana')
+            self.assertEqual(peticiones[0].empleado.cargo, 'mesero')
+
+    def test_dashboard_muestra_el_empleado_de_la_sesion(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['empleado'].pk, self.empleado.pk)
+
+
+# ==============================
+#  EVENTOS EN VIVO (SSE)
+# ==============================
+class HubEventosTests(TestCase):
+    async def test_entrega_a_cada_suscripcion(self):
+        hub = Hub()
+        primera, segunda = hub.suscribir(), hub.suscribir()
+        hub.publicar('mesa', {'id': 1, 'ocupada': True})
+
+        for suscripcion in (primera, segunda):
+            evento_id, tipo, datos = await suscripcion.cola.get()
+            self.assertEqual((evento_id, tipo, datos), (1, 'mesa', '{"id": 1, "ocupada": true}'))
+
+        hub.cancelar(segunda)
+        hub.publicar('mesa', {'id': 2})
+        self.assertEqual((await primera.cola.get())[0], 2)
+        self.assertTrue(segunda.cola.empty())
+
+    async def test_last_event_id_recupera_lo_perdido(self):
+        hub = Hub(historial=3)
+        for numero in range(5):
+            hub.publicar('pedido', {'id': numero})
+
+        suscripcion = hub.suscribir(ultimo_id=3)
+        self.assertEqual([suscripcion.cola.get_nowait()[0] for _ in range(suscripcion.cola.qsize())], [4, 5])
+        # Lo que ya salió del historial no se puede recuperar: solo quedan los 3 últimos
+        suscripcion = hub.suscribir(ultimo_id=0)
+        self.assertEqual(suscripcion.cola.qsize(), 3)
+
+    async def test_flujo_sse(self):
+        hub = Hub()
+        self.enterContext(mock.patch.object(eventos, 'hub', hub))
+        suscripcion = hub.suscribir()
+        flujo = flujo_sse(suscripcion)
+        self.assertEqual(await anext(flujo), 'retry: 3000\n\n')
+
+        hub.publicar('mesa', {'id': 7})
+        self.assertEqual(await anext(flujo), 'id: 1\nevent: mesa\ndata: {"id": 7}\n\n')
+        await flujo.aclose()
+        # Cerrar el flujo (cliente desconectado) cancela la suscripción
+        self.assertFalse(hub._suscripciones)
+
+    async def test_cliente_lento_se_corta(self):
+        hub = Hub()
+        suscripcion = hub.suscribir()
+        flujo = flujo_sse(suscripcion)
+        await anext(flujo)
+        suscripcion.cola = asyncio.Queue(2)
+        for numero in range(3):
+            hub.publicar('mesa', {'id': numero})
+        await asyncio.sleep(0)
+
+        self.assertTrue(suscripcion.desbordada)
+        with self.assertRaises(StopAsyncIteration):
+            await anext(flujo)
+
+    def test_publica_solo_despues_del_commit(self):
+        mesa = Mesa.objects.create(numero=1, ocupada=True)
+        with mock.patch.object(eventos.hub, 'publicar') as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                publicar_mesa(mesa)
+                publicar.assert_not_called()
+            publicar.assert_called_once_with('mesa', {'id': mesa.id, 'numero': 1, 'ocupada': True})
+
+            try:
+                with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                    publicar_mesa(mesa)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.assertEqual(publicar.call_count, 1)
+
+    async def test_vista_requiere_sesion(self):
+        respuesta = await self.async_client.get(reverse('eventos'))
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_sin_asgi_responde_204(self):
+        self.client.force_login(User.objects.create_user('mesero'))
+        with mock.patch.object(eventos.hub, 'suscribir') as suscribir:
+            respuesta = self.client.get(reverse('eventos'))
+
+        self.assertEqual(respuesta.status_code, 204)
+        suscribir.assert_not_called()
+
+
+# ==============================
+#  LISTADOS DE PEDIDOS POR CURSOR
+# ==============================
+class PaginacionCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mesero = User.objects.create_user('mesero', password='clave12345')
+
+    def crear_pedido(self, fecha=None, estado='espera'):
+        pedido = Pedido.objects.create(mesero=self.mesero, estado=estado)
+        if fecha is not None:
+            # fecha es auto_now_add: se fija después del INSERT
+            Pedido.objects.filter(pk=pedido.pk).update(fecha=fecha)
+        return pedido
+
+    def recorrer(self, queryset, tamano):
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            pagina, cursor = paginar_por_cursor(queryset, cursor, tamano)
+            vistos += [pedido.id for pedido in pagina]
+            paginas += 1
+            if cursor is None:
+                return vistos, paginas
+
+    def test_recorre_todo_sin_repetir_con_fechas_empatadas(self):
+        base = timezone.now() - timedelta(days=1)
+        for horas in (0, 0, 0, -1, -1, 1, 0):
+            self.crear_pedido(base + timedelta(hours=horas))
+        esperado = list(Pedido.objects.order_by('-fecha', '-id').values_list('id', flat=True))
+
+        vistos, paginas = self.recorrer(Pedido.objects.all(), 2)
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(paginas, 4)
+
+    def test_ultima_pagina_exacta_no_tiene_siguiente(self):
+        for _ in range(4):
+            self.crear_pedido()
+        _, paginas = self.recorrer(Pedido.objects.all(), 2)
+        self.assertEqual(paginas, 2)
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        for _ in range(3):
+            self.crear_pedido()
+        primera, _ = paginar_por_cursor(Pedido.objects.all(), None, tamano=2)
+        for cursor in ('no-es-un-cursor', '!!', ''):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(paginar_por_cursor(Pedido.objects.all(), cursor, tamano=2)[0], primera)
+
+    def test_el_cursor_apunta_al_ultimo_de_la_pagina(self):
+        for _ in range(3):
+            self.crear_pedido()
+        pagina, cursor = paginar_por_cursor(Pedido.objects.all(), None, tamano=2)
+        self.assertEqual(decodificar_cursor(cursor), (pagina[-1].fecha, pagina[-1].pk))
+
+    def test_filtros_por_defecto_y_por_estado(self):
+        hoy = self.crear_pedido()
+        cerrado = self.crear_pedido(estado='cerrado')
+        ayer = self.crear_pedido(fecha=timezone.now() - timedelta(days=1))
+
+        pedidos, filtros = filtrar_pedidos(Pedido.objects.all(), {})
+        self.assertEqual(set(pedidos), {hoy})
+        self.assertEqual(filtros['estado'], 'abiertos')
+
+        pedidos, _ = filtrar_pedidos(Pedido.objects.all(), {'estado': 'todos'})
+        self.assertEqual(set(pedidos), {hoy, cerrado, ayer})
+        desde = (timezone.localdate() - timedelta(days=1)).isoformat()
+        pedidos, _ = filtrar_pedidos(Pedido.objects.all(), {'desde': desde, 'hasta': desde})
+        self.assertEqual(set(pedidos), {ayer})
+
+    def test_mis_pedidos_pagina_por_cursor(self):
+        for _ in range(25):
+            self.crear_pedido()
+        self.client.force_login(self.mesero)
+        url = reverse('mis_pedidos')
+
+        primera = self.client.get(url, {'estado': 'todos'})
+        segunda = self.client.get(url, {'estado': 'todos', 'cursor': primera.context['siguiente']})
+
+        self.assertEqual(len(primera.context['pedidos']), 20)
+        self.assertEqual(len(segunda.context['pedidos']), 5)
+        self.assertIsNone(segunda.context['siguiente'])
+        ids = [p.id for p in primera.context['pedidos']] + [p.id for p in segunda.context['pedidos']]
+        self.assertEqual(sorted(ids), sorted(Pedido.objects.values_list('id', flat=True)))
+
+
+# ==============================
+#  OCUPACIÓN DE MESAS
+# ==============================
+class OcupacionMesaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mesero = User.objects.create_user('mesero', password='clave12345')
+        categoria = Categoria.objects.create(nombre='Pastas')
+        cls.lasana = Plato.objects.create(nombre='Lasaña', precio=Decimal('12.50'), categoria=categoria)
+        cls.mesa = Mesa.objects.create(numero=1)
+
+    def setUp(self):
+        self.client.force_login(self.mesero)
+
+    def crear_pedido(self):
+        return self.client.post(
+            reverse('crear_pedido'),
+            {'mesa': self.mesa.pk, 'platos': [self.lasana.pk], 'cantidades': [2]},
+            headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+
+    def test_ocupar_mesa_solo_una_vez(self):
+        otra_copia = Mesa.objects.get(pk=self.mesa.pk)
+
+        self.assertTrue(self.mesa.ocupar())
+        # La copia leída antes todavía la ve libre: decide el UPDATE condicionado
+        self.assertFalse(otra_copia.ocupada)
+        self.assertFalse(otra_copia.ocupar())
+        self.assertTrue(self.mesa.liberar())
+        self.assertFalse(otra_copia.liberar())
+        self.assertFalse(Mesa.objects.get(pk=self.mesa.pk).ocupada)
+
+    def test_crear_pedido_ocupa_la_mesa(self):
+        respuesta = self.crear_pedido()
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['total'], '25.00')
+        self.assertTrue(Mesa.objects.get(pk=self.mesa.pk).ocupada)
+        # Con la mesa ya ocupada corta la comprobación previa
+        self.assertEqual(self.crear_pedido().status_code, 400)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_carrera_perdida_deshace_el_pedido(self):
+        # Otra petición ocupa la mesa entre la comprobación previa y el UPDATE
+        with mock.patch.object(Mesa, 'ocupar', return_value=False):
+            respuesta = self.crear_pedido()
+
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_cerrar_pedido_libera_la_mesa(self):
+        pedido_id = self.crear_pedido().json()['id']
+
+        self.client.post(reverse('cerrar_pedido', args=[pedido_id]))
+
+        self.assertEqual(Pedido.objects.get(pk=pedido_id).estado, 'cerrado')
+        self.assertFalse(Mesa.objects.get(pk=self.mesa.pk).ocupada)
+
+    def test_cambiar_estado_mesa_alterna_en_el_update(self):
+        url = reverse('cambiar_estado_mesa', args=[self.mesa.pk])
+        self.assertTrue(self.client.post(url).json()['ocupada'])
+        self.assertFalse(self.client.post(url).json()['ocupada'])
+        self.assertEqual(self.client.post(reverse('cambiar_estado_mesa', args=[999])).status_code, 404)
+
+
+# ==============================
+#  SIMULACIÓN DE CARGA
+# ==============================
+class PercentilTests(TestCase):
+    def test_rango_mas_cercano(self):
+        valores = list(range(1, 11))
+        for p, esperado in ((0, 1), (10, 1), (50, 5), (90, 9), (95, 10), (99, 10), (100, 10)):
+            with self.subTest(p=p):
+                self.assertEqual(percentil(valores, p), esperado)
+        self.assertEqual(percentil(list(range(1, 101)), 50), 50)
+        self.assertEqual(percentil([7], 99), 7)
+        self.assertIsNone(percentil([], 50))
+
+
+# ==============================
+#  API DE MENÚ (GET condicional)
+# ==============================
+class MenuApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('mesero', password='clave12345')
+        cls.pastas = Categoria.objects.create(nombre='Pastas')
+        cls.lasana = Plato.objects.create(nombre='Lasaña', precio=Decimal('12.50'), categoria=cls.pastas)
+        cls.ravioli = Plato.objects.create(nombre='Ravioli', precio=Decimal('10.00'), categoria=cls.pastas)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.url = reverse('menu_api')
+
+    def test_revalidacion_responde_304(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Cache-Control'], 'private, no-cache')
+        self.assertEqual(len(respuesta.json()['platos']), 2)
+
+        revalidada = self.client.get(self.url, headers={'if-none-match': respuesta['ETag']})
+        self.assertEqual(revalidada.status_code, 304)
+        revalidada = self.client.get(self.url, headers={'if-modified-since': respuesta['Last-Modified']})
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_editar_o_borrar_cambia_el_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.lasana.precio = Decimal('13.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lasana.save()
+        respuesta = self.client.get(self.url, headers={'if-none-match': etag})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('13.00', {plato['precio'] for plato in respuesta.json()['platos']})
+
+        etag = respuesta['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ravioli.delete()
+        self.assertNotEqual(self.client.get(self.url, headers={'if-none-match': etag}).status_code, 304)
+
+    def test_since_devuelve_solo_lo_cambiado(self):
+        Plato.objects.update(actualizado=timezone.now() - timedelta(hours=1))
+        marca = (timezone.now() - timedelta(minutes=1)).isoformat()
+        self.ravioli.precio = Decimal('11.00')
+        self.ravioli.save()
+
+        datos = self.client.get(self.url, {'since': marca}).json()
+        self.assertEqual([plato['id'] for plato in datos['platos']], [self.ravioli.pk])
+        self.assertEqual(datos['ids_platos'], [self.lasana.pk, self.ravioli.pk])
+        self.assertEqual(datos['ids_categorias'], [self.pastas.pk])
+
+    def test_since_invalido(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'ayer'}).status_code, 400)
+
+    def test_version_en_cache_sin_consultas(self):
+        obtener_menu()
+        with self.assertNumQueries(0):
+            menu = obtener_menu()
+            version = version_menu()
+        self.assertEqual(len(menu[0]['platos']), 2)
+
+        self.lasana.disponible = False
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.lasana.save()
+            # Hasta el commit se sigue sirviendo la versión anterior
+            self.assertEqual(version_menu(), version)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(version_menu(), version + 1)
+        self.assertEqual([plato['nombre'] for plato in obtener_menu()[0]['platos']], ['Ravioli'])
+
+    def test_version_sin_cache_se_lee_de_la_base(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidar_menu()
+        cache.clear()
+        with self.assertNumQueries(1):
+            version = version_menu()
+        self.assertEqual(version, VersionMenu.objects.get(pk=1).version)
+
+
+# ==============================
+#  IMPORTACIÓN DEL MENÚ
+# ==============================
+class ImportacionMenuTests(TestCase):
+    def importar(self, texto, formato, tamano_lote=2):
+        return importar_menu(io.BytesIO(texto.encode('utf-8')), formato, tamano_lote=tamano_lote)
+
+    def test_csv_reporta_errores_por_fila(self):
+        reporte = self.importar(
+            "nombre,categoria,precio,descripcion,disponible\n"
+            "Lasaña,Pastas,12.50,Clásica,si\n"
+            "Ravioli,Pastas,abc,,\n"
+            ",Pastas,10,,\n"
+            "Tiramisú,Postres,6,,quizas\n"
+            "Panna cotta,Postres,5.5,,no\n",
+            'csv',
+        )
+
+        self.assertEqual(reporte['creados'], 2)
+        self.assertEqual(reporte['categorias_creadas'], 2)
+        self.assertEqual([error['fila'] for error in reporte['errores']], [3, 4, 5])
+        self.assertIn('Precio inválido', reporte['errores'][0]['error'])
+        self.assertFalse(Plato.objects.get(nombre='Panna cotta').disponible)
+
+    def test_json_sigue_despues_de_un_objeto_mal_formado(self):
+        reporte = self.importar(
+            '{"nombre": "Lasaña", "categoria": "Pastas", "precio": 12.5}\n'
+            '{"nombre": "Ravioli", "categoria": \n'
+            '{"nombre": "Gnocchi", "categoria": "Pastas", "precio": "9"}\n'
+            '42\n',
+            'json',
+        )
+
+        self.assertEqual(reporte['creados'], 2)
+        self.assertEqual([error['fila'] for error in reporte['errores']], [2, 4])
+        self.assertIn('JSON inválido', reporte['errores'][0]['error'])
+        self.assertEqual(set(Plato.objects.values_list('nombre', flat=True)), {'Lasaña', 'Gnocchi'})
+
+    def test_reimportar_actualiza_solo_lo_que_cambio(self):
+        texto = "nombre,categoria,precio\nLasaña,Pastas,12.50\nRavioli,Pastas,10\nGnocchi,Pastas,9\n"
+        self.importar(texto, 'csv')
+        reporte = self.importar(texto.replace('Ravioli,Pastas,10', 'RAVIOLI,pastas,11'), 'csv')
+
+        self.assertEqual(
+            (reporte['creados'], reporte['actualizados'], reporte['sin_cambios'], reporte['categorias_creadas']),
+            (0, 1, 2, 0),
+        )
+        self.assertEqual(Plato.objects.get(nombre='RAVIOLI').precio, Decimal('11.00'))
+        self.assertEqual(Plato.objects.count(), 3)
+
+    def test_lote_con_error_de_base_se_reporta_por_fila(self):
+        with mock.patch.object(Plato.objects, 'bulk_create', side_effect=DatabaseError('fallo')):
+            reporte = self.importar("nombre,categoria,precio\nLasaña,Pastas,12.50\nRavioli,Pastas,10\n", 'csv', 10)
+
+        self.assertEqual(reporte['creados'], 0)
+        self.assertEqual([error['fila'] for error in reporte['errores']], [2, 3])
+        self.assertFalse(Categoria.objects.exists())
+
+
+
+# ==============================
+#  MÁQUINA DE ESTADOS
+# ==============================
+@override_settings(SQL_MUESTREO=0)
+class EstadoPedidoTests(DatosPedidos, TestCase):
+    def test_transiciones_validas(self):
+        pedido = self.crear_pedido()
+        pedido.cambiar_estado('espera', 'proceso')
+        pedido.cambiar_estado('proceso', 'listo')
+
+        self.assertEqual(Pedido.objects.get(pk=pedido.pk).estado, 'listo')
+
+    def test_transicion_no_permitida(self):
+        pedido = self.crear_pedido(estado='listo')
+        for desde, hacia in (('listo', 'espera'), ('cerrado', 'espera'), ('espera', 'listo')):
+            with self.subTest(desde=desde, hacia=hacia), self.assertRaises(TransicionInvalida):
+                pedido.cambiar_estado(desde, hacia)
+        self.assertEqual(Pedido.objects.get(pk=pedido.pk).estado, 'listo')
+
+    def test_estado_cambiado_por_otro_usuario(self):
+        pedido = self.crear_pedido()
+        otra_copia = Pedido.objects.get(pk=pedido.pk)
+        pedido.cambiar_estado('espera', 'proceso')
+
+        cambios = CambioPedido.objects.count()
+        with self.assertRaises(EstadoCambiado):
+            otra_copia.cambiar_estado('espera', 'proceso')
+        self.assertEqual(Pedido.objects.get(pk=pedido.pk).estado, 'proceso')
+        # El intento rechazado no numera ningún cambio
+        self.assertEqual(CambioPedido.objects.count(), cambios)
+
+    def test_dos_cierres_cuentan_el_pedido_una_vez(self):
+        pedido = self.crear_pedido()
+        otra_copia = Pedido.objects.get(pk=pedido.pk)
+        pedido.cambiar_estado('espera', 'cerrado')
+        with self.assertRaises(EstadoCambiado):
+            otra_copia.cambiar_estado('espera', 'cerrado')
+
+        totales = ResumenVentas.totales_del_dia(timezone.localdate(pedido.fecha))
+        self.assertEqual(totales['pedidos'], 1)
+        self.assertEqual(totales['pedidos_cerrados'], 1)
+
+    def test_cada_cambio_avanza_la_secuencia(self):
+        pedido = self.crear_pedido()
+        creado = pedido.secuencia
+        pedido.agregar_detalles([(self.lasana, 1)])
+        con_lineas = pedido.secuencia
+        pedido.cambiar_estado('espera', 'proceso')
+
+        self.assertLess(creado, con_lineas)
+        self.assertLess(con_lineas, pedido.secuencia)
+        self.assertEqual(Pedido.objects.get(pk=pedido.pk).secuencia, pedido.secuencia)
+        self.assertEqual(pedido.cambios.order_by('-id').first().id, pedido.secuencia)
+
+    def test_vista_responde_409_si_el_estado_cambio(self):
+        pedido = self.crear_pedido(estado='proceso')
+        self.client.force_login(self.mesero)
+        url = reverse('cambiar_estado_pedido', args=[pedido.pk])
+
+        respuesta = self.client.post(url, {'desde': 'espera', 'hacia': 'proceso'})
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['estado'], 'proceso')
+
+        respuesta = self.client.post(url, {'desde': 'proceso', 'hacia': 'espera'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+# ==============================
+#  CAMBIOS DE COCINA (cursor)
+# ==============================
+@override_settings(SQL_MUESTREO=0)
+class CambiosCocinaTests(DatosPedidos, TestCase):
+    def setUp(self):
+        self.inicio = CambioPedido.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def test_entrega_cada_cambio_una_vez(self):
+        primero, segundo = self.crear_pedido(), self.crear_pedido()
+
+        cambios, cursor = cambios_desde(self.inicio)
+        self.assertEqual([c['id'] for c in cambios], [primero.id, segundo.id])
+        self.assertEqual(cursor, segundo.secuencia)
+
+        self.assertEqual(cambios_desde(cursor), ([], cursor))
+
+        primero.cambiar_estado('espera', 'proceso')
+        cambios, cursor = cambios_desde(cursor)
+        self.assertEqual([(c['id'], c['estado']) for c in cambios], [(primero.id, 'proceso')])
+
+    def test_incluye_los_que_salen_de_la_cola(self):
+        pedido = self.crear_pedido()
+        _, cursor = cambios_desde(self.inicio)
+        pedido.cambiar_estado('espera', 'cerrado')
+
+        cambios, _ = cambios_desde(cursor)
+        self.assertEqual([(c['id'], c['estado']) for c in cambios], [(pedido.id, 'cerrado')])
+
+    def test_pagina_por_limite(self):
+        ids = [self.crear_pedido().id for _ in range(3)]
+
+        vistos, cursor = [], self.inicio
+        for _ in range(4):
+            cambios, cursor = cambios_desde(cursor, limite=1)
+            vistos += [c['id'] for c in cambios]
+        self.assertEqual(vistos, ids)
+
+    def test_se_detiene_en_un_hueco_reciente(self):
+        primero, pendiente, ultimo = self.crear_pedido(), self.crear_pedido(), self.crear_pedido()
+        # Un id que todavía no se confirmó (o que se deshizo) deja un hueco en la secuencia
+        CambioPedido.objects.filter(pedido=pendiente).delete()
+
+        cambios, cursor = cambios_desde(self.inicio)
+        self.assertEqual([c['id'] for c in cambios], [primero.id])
+        self.assertEqual(cursor, primero.secuencia)
+
+        # Pasada la espera, el hueco ya no se va a llenar y se salta
+        with mock.patch.object(cocina, 'ESPERA_HUECO', timedelta(0)):
+            cambios, cursor = cambios_desde(cursor)
+        self.assertEqual([c['id'] for c in cambios], [ultimo.id])
+        self.assertEqual(cursor, ultimo.secuencia)
+
+    def test_cola_inicial_deja_fuera_lo_reciente(self):
+        antiguo = self.crear_pedido()
+        CambioPedido.objects.filter(pedido=antiguo).update(creado=timezone.now() - timedelta(minutes=1))
+        reciente = self.crear_pedido()
+
+        secuencia, tarjetas = cola_cocina()
+        self.assertEqual(secuencia, antiguo.secuencia)
+        self.assertEqual([t['id'] for t in tarjetas], [antiguo.id, reciente.id])
+        # El primer long-poll vuelve a entregar lo más reciente
+        self.assertEqual([c['id'] for c in cambios_desde(secuencia)[0]], [reciente.id])
+
+    def test_vista_cambios(self):
+        pedido = self.crear_pedido()
+        self.client.force_login(self.mesero)
+        url = reverse('cocina_cambios')
+
+        datos = self.client.get(url, {'desde': self.inicio}).json()
+        self.assertEqual([c['id'] for c in datos['pedidos']], [pedido.id])
+        self.assertEqual(datos['secuencia'], pedido.secuencia)
+        self.assertEqual(self.client.get(url, {'desde': 'basura'}).status_code, 400)
+
+
+# ==============================
+#  HISTORIAL EN BASE OPERATIVA Y ARCHIVO
+# ==============================
+@override_settings(SQL_MUESTREO=0)
+class HistorialArchivoTests(DatosPedidos, TestCase):
+    databases = {'default', 'archivo'}
+
+    def setUp(self):
+        self.dia = timezone.make_aware(datetime(2024, 3, 10, 12))
+        self.viejo = self.crear_pedido(estado='cerrado', fecha=self.dia)
+        self.viejo.agregar_detalles([(self.lasana, 2), (self.ravioli, 1)])
+        self.activo = self.crear_pedido(estado='cerrado', fecha=self.dia + timedelta(hours=2))
+        self.activo.agregar_detalles([(self.ravioli, 1)])
+        self.sin_lineas = self.crear_pedido(estado='espera', fecha=self.dia + timedelta(hours=1))
+
+    def historial(self):
+        return list(lineas_historial(self.dia - timedelta(days=1), self.dia + timedelta(days=1)))
+
+    def test_combina_ambas_bases_en_orden(self):
+        self.assertEqual(archivar_pedidos(self.dia + timedelta(hours=1)), (1, 2))
+
+        filas = self.historial()
+        self.assertEqual(
+            [fila[0] for fila in filas], [self.viejo.id, self.viejo.id, self.sin_lineas.id, self.activo.id]
+        )
+        self.assertEqual([fila[6] for fila in filas], ['Lasaña', 'Ravioli', None, 'Ravioli'])
+        self.assertFalse(Pedido.objects.filter(pk=self.viejo.pk).exists())
+        self.assertFalse(CambioPedido.objects.filter(pedido_id=self.viejo.pk).exists())
+
+    def test_archivado_interrumpido_no_duplica(self):
+        archivar_pedidos(self.dia + timedelta(hours=3))
+        # Simula un corte entre copiar al archivo y borrar: el pedido queda en las dos bases
+        PedidoArchivado.objects.create(id=self.sin_lineas.id, fecha=self.sin_lineas.fecha, estado='cerrado', total=99)
+        Pedido.objects.filter(pk=self.sin_lineas.pk).update(estado='cerrado')
+
+        filas = self.historial()
+        self.assertEqual([fila[0] for fila in filas].count(self.sin_lineas.id), 1)
+        # La fila sale de la base operativa, no de la copia
+        self.assertEqual(next(fila for fila in filas if fila[0] == self.sin_lineas.id)[5], Decimal('0'))
+        # Reanudar el archivado mueve el pedido sin dejarlo dos veces en el archivo
+        archivar_pedidos(self.dia + timedelta(hours=3))
+        self.assertEqual(PedidoArchivado.objects.filter(pk=self.sin_lineas.pk).count(), 1)
+        self.assertEqual(len(self.historial()), 4)
+
+    def test_exportacion_csv(self):
+        archivar_pedidos(self.dia + timedelta(hours=1))
+        admin = User.objects.create_superuser('admin', password='clave12345')
+        self.client.force_login(admin)
+
+        respuesta = self.client.get(reverse('exportar_pedidos'), {'desde': '2024-03-10', 'hasta': '2024-03-10'})
+        filas = list(csv.reader(io.StringIO(b''.join(respuesta.streaming_content).decode('utf-8'))))
+
+        self.assertEqual(filas[0][0], 'pedido')
+        self.assertEqual(
+            [int(fila[0]) for fila in filas[1:]], [self.viejo.id, self.viejo.id, self.sin_lineas.id, self.activo.id]
+        )
+
+
+# ==============================
+#  LOTES SIN CONEXIÓN (idempotencia)
+# ==============================
+@override_settings(SQL_MUESTREO=0)
+class LotePedidosTests(DatosPedidos, TestCase):
+    def pedido_lote(self, clave, mesa, lineas):
+        return {
+            'clave': clave, 'mesa': mesa,
+            'platos': [plato for plato, _ in lineas], 'cantidades': [cantidad for _, cantidad in lineas],
+        }
+
+    def test_un_pedido_rechazado_no_deshace_los_demas(self):
+        mesa1, mesa2, mesa3 = self.mesas
+        lote = [
+            self.pedido_lote('a', mesa1.id, [(self.lasana.id, 2)]),
+            # Misma mesa que el anterior: ya quedó ocupada dentro del lote
+            self.pedido_lote('b', mesa1.id, [(self.ravioli.id, 1)]),
+            self.pedido_lote('c', 999, [(self.lasana.id, 1)]),
+            self.pedido_lote('d', mesa2.id, [(999, 1)]),
+            {'mesa': mesa3.id, 'platos': [self.lasana.id], 'cantidades': [1]},
+            self.pedido_lote('e', mesa3.id, [(self.lasana.id, 1), (self.ravioli.id, 3)]),
+        ]
+
+        resultados = registrar_lote(lote, self.mesero)
+
+        self.assertEqual([r['estado'] for r in resultados], ['creado', 'error', 'error', 'error', 'error', 'creado'])
+        self.assertEqual([r['clave'] for r in resultados], ['a', 'b', 'c', 'd', None, 'e'])
+        self.assertEqual(resultados[0]['total'], Decimal('25.00'))
+        self.assertEqual(resultados[5]['total'], Decimal('42.50'))
+        self.assertEqual(
+            set(Pedido.objects.values_list('clave_cliente', flat=True)), {'a', 'e'}
+        )
+        self.assertEqual(DetallePedido.objects.count(), 3)
+        self.assertEqual(
+            list(Mesa.objects.order_by('numero').values_list('ocupada', flat=True)), [True, False, True]
+        )
+
+    def test_reenviar_el_lote_no_duplica_pedidos(self):
+        lote = [
+            self.pedido_lote('a', self.mesas[0].id, [(self.lasana.id, 1)]),
+            self.pedido_lote('b', self.mesas[1].id, [(self.ravioli.id, 2)]),
+        ]
+        primero = registrar_lote(lote, self.mesero)
+        # Al reintentar, las mesas siguen ocupadas por los pedidos originales: solo cuenta la clave
+        segundo = registrar_lote(lote, self.mesero)
+
+        self.assertEqual([r['estado'] for r in segundo], ['duplicado', 'duplicado'])
+        self.assertEqual([r['id'] for r in segundo], [r['id'] for r in primero])
+        self.assertEqual(Pedido.objects.count(), 2)
+        self.assertEqual(DetallePedido.objects.count(), 2)
+
+    def test_clave_repetida_dentro_del_lote(self):
+        lote = [
+            self.pedido_lote('a', self.mesas[0].id, [(self.lasana.id, 1)]),
+            self.pedido_lote('a', self.mesas[1].id, [(self.lasana.id, 1)]),
+        ]
+        resultados = registrar_lote(lote, self.mesero)
+
+        self.assertEqual([r['estado'] for r in resultados], ['creado', 'duplicado'])
+        self.assertEqual(resultados[1]['id'], resultados[0]['id'])
+        self.assertFalse(Mesa.objects.get(pk=self.mesas[1].pk).ocupada)
+
+    def test_clave_aplicada_por_otro_envio_revierte_solo_su_savepoint(self):
+        original = modulo_pedidos.registrar_pedido
+        concurrente = {}
+
+        def registrar_con_carrera(mesa, usuario, lineas, platos_por_id, clave=None):
+            if clave == 'b':
+                # Otro envío del mismo lote confirma la clave después de la consulta inicial
+                concurrente['id'] = Pedido.objects.create(mesero=usuario, clave_cliente='b').id
+            return original(mesa, usuario, lineas, platos_por_id, clave=clave)
+
+        lote = [
+            self.pedido_lote('a', self.mesas[0].id, [(self.lasana.id, 1)]),
+            self.pedido_lote('b', self.mesas[1].id, [(self.lasana.id, 1)]),
+            self.pedido_lote('c', self.mesas[2].id, [(self.ravioli.id, 1)]),
+        ]
+        with mock.patch.object(modulo_pedidos, 'registrar_pedido', registrar_con_carrera):
+            resultados = registrar_lote(lote, self.mesero)
+
+        self.assertEqual([r['estado'] for r in resultados], ['creado', 'duplicado', 'creado'])
+        self.assertEqual(resultados[1]['id'], concurrente['id'])
+        # El savepoint de "b" se deshizo entero: no ocupó la mesa ni dejó líneas
+        self.assertFalse(Mesa.objects.get(pk=self.mesas[1].pk).ocupada)
+        self.assertFalse(DetallePedido.objects.filter(pedido_id=concurrente['id']).exists())
+        self.assertEqual(Pedido.objects.filter(clave_cliente__in=['a', 'c']).count(), 2)
+
+    def test_vista_lote(self):
+        self.client.force_login(self.mesero)
+        url = reverse('lote_pedidos')
+        cuerpo = json.dumps({'pedidos': [self.pedido_lote('a', self.mesas[0].id, [(self.lasana.id, 1)])]})
+
+        primera = self.client.post(url, cuerpo, content_type='application/json')
+        reintento = self.client.post(url, cuerpo, content_type='application/json')
+
+        self.assertEqual(primera.status_code, 200)
+        self.assertEqual(primera.json()['resultados'][0]['estado'], 'creado')
+        self.assertEqual(reintento.json()['resultados'][0]['estado'], 'duplicado')
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_vista_lote_rechaza_cuerpo_invalido(self):
+        self.client.force_login(self.mesero)
+        url = reverse('lote_pedidos')
+        for cuerpo in ('no es json', '{"pedidos": []}', json.dumps({'pedidos': [{}] * 101})):
+            with self.subTest(cuerpo=cuerpo[:20]):
+                respuesta = self.client.post(url, cuerpo, content_type='application/json')
+                self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(Pedido.objects.exists())
+
+
+@override_settings(SQL_MUESTREO=0)
+class LoteConfirmadoTests(DatosPedidos, TransactionTestCase):
+    """El lote con commit real: los savepoints deshechos no publican eventos ni dejan filas."""
+
+    def setUp(self):
+        self.setUpTestData()
+
+    def test_solo_se_publican_los_pedidos_creados(self):
+        original = modulo_pedidos.registrar_pedido
+
+        def registrar_con_carrera(mesa, usuario, lineas, platos_por_id, clave=None):
+            if clave == 'b':
+                Pedido.objects.create(mesero=usuario, clave_cliente='b')
+            return original(mesa, usuario, lineas, platos_por_id, clave=clave)
+
+        lote = [
+            {'clave': clave, 'mesa': mesa.id, 'platos': [self.lasana.id], 'cantidades': [1]}
+            for clave, mesa in zip('abc', self.mesas)
+        ]
+        with mock.patch.object(modulo_pedidos, 'registrar_pedido', registrar_con_carrera), \
+                mock.patch.object(eventos.hub, 'publicar') as publicar:
+            resultados = registrar_lote(lote, self.mesero)
+
+        creados = {r['id'] for r in resultados if r['estado'] == 'creado'}
+        publicados = [llamada.args for llamada in publicar.call_args_list]
+        self.assertEqual(len(creados), 2)
+        self.assertEqual({datos['id'] for tipo, datos in publicados if tipo == 'pedido'}, creados)
+        self.assertEqual({datos['id'] for tipo, datos in publicados if tipo == 'mesa'}, {self.mesas[0].id, self.mesas[2].id})
+        self.assertEqual(list(Mesa.objects.order_by('numero').values_list('ocupada', flat=True)), [True, False, True])
+        self.assertEqual(DetallePedido.objects.count(), 2)
+
+
+# ==============================
+#  BÚSQUEDA DE EMPLEADOS
+# ==============================
+@override_settings(SQL_MUESTREO=0)
+class BusquedaEmpleadosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Empleado.objects.create(
+            user=User.objects.create_user('amartinez', email='ana@trattoria.com'),
+            first_name='Ana', last_name='Martínez', telefono='300 123 4567',
+        )
+        cls.mario = Empleado.objects.create(
+            user=User.objects.create_user('mrossi'), first_name='Mario', last_name='Rossi',
+        )
+        cls.marta = Empleado.objects.create(first_name='Marta', last_name='Zúñiga', email='marta@trattoria.com')
+
+    def buscar(self, texto):
+        return set(buscar_empleados(texto))
+
+    def test_prefijo_sin_mayusculas_ni_acentos(self):
+        self.assertEqual(self.buscar('MART'), {self.ana, self.marta})
+        self.assertEqual(self.buscar('zun'), {self.marta})
+        self.assertEqual(self.buscar('  '), {self.ana, self.mario, self.marta})
+        self.assertEqual(self.buscar('xyz'), set())
+
+    def test_todas_las_palabras_deben_coincidir(self):
+        self.assertEqual(self.buscar('ma ro'), {self.mario})
+        self.assertEqual(self.buscar('trattoria marta'), {self.marta})
+        # Teléfono por palabras o con los dígitos juntos, y usuario
+        self.assertEqual(self.buscar('3001234'), {self.ana})
+        self.assertEqual(self.buscar('4567'), {self.ana})
+        self.assertEqual(self.buscar('mrossi'), {self.mario})
+
+    def test_sin_palabra_guia_da_lo_mismo(self):
+        with mock.patch.object(busqueda, 'UMBRAL_GUIA', 0):
+            self.assertEqual(self.buscar('ma ro'), {self.mario})
+            self.assertEqual(self.buscar('mart'), {self.ana, self.marta})
+
+    def test_limite_del_rango(self):
+        self.assertEqual(busqueda._limite('ma'), 'mb')
+        self.assertEqual(busqueda._limite('az'), 'b')
+        self.assertIsNone(busqueda._limite('zz'))
+        Empleado.objects.create(first_name='Zz')
+        self.assertEqual(len(self.buscar('z')), 2)
+
+    def test_cambios_del_usuario_reindexan(self):
+        usuario = self.mario.user
+        usuario.username = 'chef'
+        usuario.save()
+
+        self.assertEqual(self.buscar('chef'), {self.mario})
+        self.assertEqual(self.buscar('mrossi'), set())
+
+    def test_vista_busqueda_parcial(self):
+        self.client.force_login(self.mario.user)
+        respuesta = self.client.get(
+            reverse('empleados'), {'q': 'mart'}, headers={'x-requested-with': 'XMLHttpRequest'}
+        )
+
+        self.assertTemplateUsed(respuesta, 'partials/empleado_rows_partial.html')
+        self.assertEqual(set(respuesta.context['empleados']), {self.ana, self.marta})
+        self.assertEqual(respuesta.context['q'], 'mart')
+
+
+# ==============================
+#  IMÁGENES POR CONTENIDO
+# ==============================
+def imagen_png(color, ancho=400):
+    salida = io.BytesIO()
+    Image.new('RGB', (ancho, ancho // 2), color).save(salida, 'PNG')
+    return salida.getvalue()
+
+
+@override_settings(SQL_MUESTREO=0)
+class ImagenesPorContenidoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre='Pastas')
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.storage = Plato._meta.get_field('imagen').storage
+
+    def archivos(self, carpeta='platos'):
+        return sorted(self.storage.listdir(carpeta)[1])
+
+    def test_la_misma_foto_es_un_solo_archivo(self):
+        primero = Plato.objects.create(nombre='Lasaña', precio=1, categoria=self.categoria,
+                                       imagen=SimpleUploadedFile('lasana.PNG', imagen_png('red')))
+        segundo = Plato.objects.create(nombre='Copia', precio=1, categoria=self.categoria,
+                                       imagen=SimpleUploadedFile('otra.png', imagen_png('red')))
+
+        self.assertEqual(primero.imagen.name, segundo.imagen.name)
+        self.assertTrue(es_por_contenido(primero.imagen.name))
+        self.assertTrue(primero.imagen.name.endswith('.png'))
+        self.assertEqual(self.archivos(), [posixpath.basename(primero.imagen.name)])
+        self.assertEqual([ancho for _, ancho in variantes_existentes(segundo.imagen)], [160, 320])
+
+    def test_deduplicar_imagenes_antiguas(self):
+        for nombre, color in (('a.png', 'red'), ('b.png', 'red'), ('c.png', 'blue')):
+            self.storage._save(f'platos/{nombre}', ContentFile(imagen_png(color)))
+        campo = Plato._meta.get_field('imagen')
+        generar_variantes(campo.attr_class(None, campo, 'platos/a.png'))
+        platos = [
+            Plato.objects.create(nombre=nombre, precio=1, categoria=self.categoria) for nombre in 'abc'
+        ]
+        for plato in platos:
+            # Sin pasar por save(): así quedaron las subidas anteriores al almacenamiento por contenido
+            Plato.objects.filter(pk=plato.pk).update(imagen=f'platos/{plato.nombre}.png')
+
+        call_command('deduplicar_imagenes', '--simular', stdout=io.StringIO())
+        self.assertEqual(self.archivos(), ['a.png', 'b.png', 'c.png'])
+
+        call_command('deduplicar_imagenes', '--lote', '2', stdout=io.StringIO())
+        nombres = [Plato.objects.get(pk=plato.pk).imagen.name for plato in platos]
+        self.assertEqual(nombres[0], nombres[1])
+        self.assertNotEqual(nombres[0], nombres[2])
+        self.assertEqual(self.archivos(), sorted({posixpath.basename(nombre) for nombre in nombres}))
+        # Las variantes viejas se borran y cada imagen nueva tiene las suyas
+        self.assertEqual(len(self.archivos('platos/variantes')), 4)
+
+        salida = io.StringIO()
+        call_command('deduplicar_imagenes', stdout=salida)
+        self.assertIn('Archivos renombrados: 0', salida.getvalue())
+
+    def test_deduplicar_invalida_el_menu_antes_de_borrar(self):
+        cache.clear()
+        self.storage._save('platos/vieja.png', ContentFile(imagen_png('green')))
+        plato = Plato.objects.create(nombre='Gnocchi', precio=1, categoria=self.categoria)
+        Plato.objects.filter(pk=plato.pk).update(imagen='platos/vieja.png')
+        self.assertIn('vieja', obtener_menu()[0]['platos'][0]['imagen'])
+
+        existia = []
+        original = deduplicar_imagenes.invalidar_menu
+
+        def invalidar():
+            existia.append(self.storage.exists('platos/vieja.png'))
+            original()
+
+        with mock.patch.object(deduplicar_imagenes, 'invalidar_menu', invalidar), \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('deduplicar_imagenes', stdout=io.StringIO())
+
+        self.assertEqual(existia, [True])
+        servido = obtener_menu()[0]['platos'][0]
+        self.assertEqual(servido['imagen'], self.storage.url(ruta_variante(Plato.objects.get().imagen.name, 320)))
+        self.assertIn('160w', servido['srcset'])
+
+
+# ==============================
+#  SESIONES Y USUARIO EN CACHÉ
+# ==============================
+@override_settings(
+    SQL_MUESTREO=0,
+    SESSION_ENGINE='italian_cuisine_app.sesiones',
+    AUTHENTICATION_BACKENDS=[
+        'italian_cuisine_app.autenticacion.UsuarioEnCacheBackend', 'django.contrib.auth.backends.ModelBackend',
+    ],
+)
+class SesionesEnCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('mesero', password='clave12345')
+
+    def setUp(self):
+        cache.clear()
+        self.backend = UsuarioEnCacheBackend()
+
+    def test_usuario_se_lee_de_la_cache(self):
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.usuario.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.usuario.pk), self.usuario)
+
+        # Desactivarlo borra la entrada y un usuario inactivo no vuelve a la caché
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertIsNone(self.backend.get_user(self.usuario.pk))
+        self.assertIsNone(cache.get(clave_usuario(self.usuario.pk)))
+
+    async def test_version_asincrona_comparte_la_cache(self):
+        self.assertEqual(await self.backend.aget_user(self.usuario.pk), self.usuario)
+        self.assertEqual(cache.get(clave_usuario(self.usuario.pk)), self.usuario)
+
+    def test_peticion_en_caliente_no_consulta_sesion_ni_usuario(self):
+        self.client.force_login(self.usuario)
+        self.client.get(reverse('dashboard'))
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        tablas = ' '.join(consulta['sql'] for consulta in consultas.captured_queries)
+        self.assertNotIn('django_session', tablas)
+        self.assertNotIn('FROM "auth_user"', tablas)
+
+    def test_borrar_expiradas_por_lotes(self):
+        vencida = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'vencida{numero}', session_data='', expire_date=vencida) for numero in range(7)]
+            + [Session(session_key='vigente', session_data='', expire_date=timezone.now() + timedelta(days=1))]
+        )
+
+        self.assertEqual(borrar_expiradas(Session, lote=3), 7)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['vigente'])
@@ -3,11 +3,10 @@ from .views import (
     VistaLogin, VistaLogout, DashboardView, PanelPrincipalView,
     PlatosCategoriasView, AgregarCategoriaView, AgregarPlatoView,
     EliminarCategoriaView, EliminarPlatoView,
-    PedidosView, CrearPedidoView, MisPedidosView, CerrarPedidoView,
-    PanelMesasView, cambiar_estado_mesa, InicioView
+    PedidosView, MisPedidosView, CerrarPedidoView,
+    PanelMesasView, InicioView
 )
 from django.shortcuts import redirect
-from .models import Empleado
 from . import views
 
 def redireccion_inicio(request):
@@ -15,7 +14,7 @@ def redireccion_inicio(request):
     if not request.user.is_authenticated:
         return redirect('login')
 
-    empleado = Empleado.objects.filter(user=request.user).first()
+    empleado = request.empleado
     if empleado:
         if empleado.cargo == 'administrador':
             return redirect('dashboard')
@@ -50,19 +49,32 @@ urlpatterns = [
     path('panel/platos/agregar-plato/', AgregarPlatoView.as_view(), name='agregar_plato'),
     path('panel/platos/eliminar-categoria/<int:pk>/', EliminarCategoriaView.as_view(), name='eliminar_categoria'),
     path('panel/platos/eliminar-plato/<int:pk>/', EliminarPlatoView.as_view(), name='eliminar_plato'),
+    path('panel/platos/importar/', views.ImportarMenuView.as_view(), name='importar_menu'),
 
     # 🧾 Pedidos
     path('panel/pedidos/', PedidosView.as_view(), name='pedidos'),
-    path('panel/pedidos/crear/', CrearPedidoView.as_view(), name='crear_pedido'),
+    path('panel/pedidos/crear/', views.crear_pedido_async, name='crear_pedido'),
+    path('panel/pedidos/lote/', views.LotePedidosView.as_view(), name='lote_pedidos'),
     path('panel/mis-pedidos/', MisPedidosView.as_view(), name='mis_pedidos'),
+    path('panel/pedidos/lista/', views.lista_pedidos, name='lista_pedidos'),
+    path('panel/pedidos/exportar/', views.exportar_pedidos, name='exportar_pedidos'),
     path('panel/pedido/<int:pk>/cerrar/', CerrarPedidoView.as_view(), name='cerrar_pedido'),
 
+    # Cocina
+    path('panel/cocina/', views.CocinaView.as_view(), name='cocina'),
+    path('panel/cocina/cambios/', views.cocina_cambios, name='cocina_cambios'),
+    path('pedido/<int:pk>/estado/', views.CambiarEstadoPedidoView.as_view(), name='cambiar_estado_pedido'),
+
     # 🍽️ Platos
-    path('plato/<int:pk>/', views.obtener_plato, name='obtener_plato'),
-    path('plato/editar/', views.EditarPlatoView.as_view(), name='editar_plato'),
+    path('plato/<int:pk>/', views.obtener_plato_async, name='obtener_plato'),
+    path('plato/editar/', views.editar_plato_async, name='editar_plato'),
+    path('api/menu/', views.menu_api, name='menu_api'),
 
     # 🪑 Mesas
     path("panel/mesas/", PanelMesasView.as_view(), name="panel_mesas"),
-    path("mesa/<int:pk>/cambiar/", cambiar_estado_mesa, name="cambiar_estado_mesa"),
+    path("mesa/<int:pk>/cambiar/", views.cambiar_estado_mesa_async, name="cambiar_estado_mesa"),
+
+    # 📡 Eventos en vivo (SSE)
+    path("panel/eventos/", views.stream_eventos, name="eventos"),
 
 ]
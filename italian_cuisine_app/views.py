@@ -1,20 +1,48 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import functools
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, CreateView, DetailView, DeleteView, UpdateView, TemplateView
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
 from django.template.loader import render_to_string
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.db import transaction
-
-from .models import Empleado, Pedido, Categoria, Plato, DetallePedido, Mesa
-from .forms import EmpleadoModelForm
-from django.views.decorators.csrf import csrf_exempt
+from django.db.models import Case, OuterRef, Prefetch, Subquery, Sum, Value, When, prefetch_related_objects
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils import timezone
+from datetime import timedelta
+
+from .models import (
+    Empleado, Pedido, Categoria, Plato, DetallePedido, Mesa, MesaOcupada, ResumenVentas,
+    EstadoCambiado, TransicionInvalida,
+)
+from .forms import EmpleadoModelForm, ImagenPlatoForm
+from .busqueda import PaginadorBusqueda, buscar_empleados
+from .menu import marca_menu, menu_json, obtener_menu
+from .importacion import detectar_formato, importar_menu
+from .estaticos import CACHE_INMUTABLE, CACHE_MEDIA, CACHE_REVALIDAR, respuesta_archivo
+from .exportacion import comprimir, csv_pedidos, en_bloques_async, rango_fechas
+from .imagenes import es_por_contenido
+from .cocina import cola_cocina, esperar_cambios
+from .eventos import hub, flujo_sse, publicar_mesa, publicar_mesa_ahora, publicar_pedido
+from .paginacion import filtrar_pedidos, paginar_por_cursor
+from .pedidos import ErrorLote, leer_lote, lineas_pedido, registrar_lote, registrar_pedido
+from django.views.decorators.http import condition, require_GET, require_POST, require_safe
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_datetime
 
 
 # ============================================================
@@ -23,10 +51,8 @@ from django.views.decorators.csrf import csrf_exempt
 class EmpleadoContextMixin:
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context["empleado"] = Empleado.objects.filter(user=self.request.user).first()
-        else:
-            context["empleado"] = None
+        # request.empleado lo resuelve EmpleadoMiddleware; no pisa un "empleado" ya puesto por la vista
+        context.setdefault("empleado", self.request.empleado)
         return context
 
 
@@ -39,13 +65,40 @@ class VistaLogin(LoginView):
         return reverse_lazy('dashboard')  # ✅ Al iniciar sesión va al dashboard
 
 
+@login_required
 def lista_pedidos(request):
-    if any(field.name == 'hora_creacion' for field in Pedido._meta.fields):
-        pedidos = Pedido.objects.all().order_by('-hora_creacion')
-    else:
-        pedidos = Pedido.objects.all().order_by('-fecha')
+    pedidos, filtros = filtrar_pedidos(Pedido.objects.select_related('mesa', 'mesero'), request.GET)
+    pedidos, siguiente = paginar_por_cursor(pedidos, request.GET.get('cursor'))
+
+    return render(request, 'pedidos/lista_pedidos.html', {
+        'pedidos': pedidos,
+        'filtros': filtros,
+        'siguiente': siguiente,
+    })
 
-    return render(request, 'pedidos/lista_pedidos.html', {'pedidos': pedidos})
+
+@login_required
+@require_GET
+def exportar_pedidos(request):
+    """CSV contable de pedidos con sus líneas, generado en streaming (``?gzip=1`` lo comprime)."""
+    if not es_administrador(request):
+        return JsonResponse({'error': 'Solo un administrador puede exportar pedidos.'}, status=403)
+    try:
+        desde, hasta = rango_fechas(request.GET)
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Rango inválido: use desde/hasta (AAAA-MM-DD), mes (AAAA-MM) o anio.'}, status=400)
+
+    nombre = f"pedidos_{desde.isoformat()}_{hasta.isoformat()}.csv"
+    contenido, tipo = csv_pedidos(desde, hasta), 'text/csv; charset=utf-8'
+    if request.GET.get('gzip'):
+        contenido, tipo = comprimir(contenido), 'application/gzip'
+        nombre += '.gz'
+    if isinstance(request, ASGIRequest):
+        # Con ASGI un iterador síncrono se juntaría entero en memoria antes de enviar nada
+        contenido = en_bloques_async(contenido)
+    respuesta = StreamingHttpResponse(contenido, content_type=tipo)
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
 
 
 # ---------- DASHBOARD PRINCIPAL ----------
@@ -53,6 +106,40 @@ class DashboardView(LoginRequiredMixin, EmpleadoContextMixin, TemplateView):
     template_name = 'panel/dashboard.html'
     login_url = '/login/'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Las métricas salen de los resúmenes precalculados, no del histórico de pedidos
+        hoy = timezone.localdate()
+        actual = ResumenVentas.totales_del_dia(hoy)
+        previo = ResumenVentas.totales_del_dia(hoy - timedelta(days=1))
+
+        def variacion(clave):
+            if not previo[clave]:
+                return None
+            return round((actual[clave] - previo[clave]) * 100 / previo[clave])
+
+        context["metricas"] = [
+            {"titulo": "Pedidos del Día", "valor": actual["pedidos"], "variacion": variacion("pedidos")},
+            {"titulo": "Ventas del Día", "valor": f"${actual['ventas']:,.2f}", "variacion": variacion("ventas")},
+            {"titulo": "Meseros Activos", "valor": actual["meseros_activos"], "variacion": variacion("meseros_activos")},
+            {"titulo": "Platos Vendidos", "valor": actual["platos_vendidos"], "variacion": variacion("platos_vendidos")},
+        ]
+
+        items = (
+            DetallePedido.objects.filter(pedido=OuterRef('pk'))
+            .order_by()
+            .values('pedido')
+            .annotate(n=Sum('cantidad'))
+            .values('n')
+        )
+        # El id crece con la fecha de creación, así que ordenar por pk usa el índice primario
+        context["pedidos_recientes"] = (
+            Pedido.objects.select_related('mesa', 'mesero')
+            .annotate(items=Subquery(items))
+            .order_by('-id')[:10]
+        )
+        return context
+
 
 # ---------- PANEL (REDIRECCIÓN AUTOMÁTICA) ----------
 class PanelPrincipalView(LoginRequiredMixin, TemplateView):
@@ -74,10 +161,32 @@ class VistaLogout(LogoutView):
 class UserListView(LoginRequiredMixin, EmpleadoContextMixin, ListView):
     model = Empleado
     template_name = 'empleados.html'
+    partial_template_name = 'partials/empleado_rows_partial.html'
     context_object_name = 'empleados'
     paginate_by = 10
     login_url = 'login'
 
+    def get_queryset(self):
+        # Orden estable para paginar y el User en la misma consulta
+        empleados = Empleado.objects.select_related('user').order_by('last_name', 'first_name', 'id')
+        return buscar_empleados(self.request.GET.get('q', ''), empleados)
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if self.request.GET.get('q', '').strip():
+            return PaginadorBusqueda(queryset, per_page, **kwargs)
+        return super().get_paginator(queryset, per_page, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.request.GET.get('q', '')
+        return context
+
+    def get_template_names(self):
+        # La búsqueda en vivo solo reemplaza las filas de la tabla
+        if self.request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return [self.partial_template_name]
+        return [self.template_name]
+
 
 class EmpleadoDetailView(LoginRequiredMixin, EmpleadoContextMixin, DetailView):
     model = Empleado
@@ -174,18 +283,24 @@ class EmpleadoDeleteView(LoginRequiredMixin, EmpleadoContextMixin, DeleteView):
 # ============================================================
 # 🔹 PLATOS Y CATEGORÍAS
 # ============================================================
+def imagen_subida(request):
+    """``(imagen, error)`` de ``request.FILES['imagen']`` ya verificada con Pillow; imagen es None si no se subió."""
+    form = ImagenPlatoForm(files=request.FILES)
+    if not form.is_valid():
+        return None, ' '.join(form.errors['imagen'])
+    return form.cleaned_data['imagen'], None
+
+
 class PlatosCategoriasView(LoginRequiredMixin, TemplateView):
     template_name = "panel/platos_categorias.html"
     login_url = "/login/"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        empleado = Empleado.objects.get(user=self.request.user)
         categorias = Categoria.objects.all().order_by("nombre")
         platos = Plato.objects.select_related("categoria").all().order_by("nombre")
 
         context.update({
-            "empleado": empleado,
             "categorias": categorias,
             "platos": platos
         })
@@ -207,7 +322,10 @@ class PlatosCategoriasView(LoginRequiredMixin, TemplateView):
             precio = request.POST.get("precio")
             disponible = bool(request.POST.get("disponible"))
             categoria_id = request.POST.get("categoria")
-            imagen = request.FILES.get("imagen")
+            imagen, error = imagen_subida(request)
+            if error:
+                messages.error(request, f"❌ {error}")
+                return redirect("platos_categorias")
 
             if categoria_id:
                 categoria = Categoria.objects.get(id=categoria_id)
@@ -259,6 +377,47 @@ class EliminarCategoriaView(View):
         return redirect('platos_categorias')
 
 
+def es_administrador(request):
+    empleado = request.empleado
+    return request.user.is_superuser or bool(empleado and empleado.cargo == 'administrador')
+
+
+@method_decorator(login_required, name='dispatch')
+class ImportarMenuView(View):
+    """Carga masiva de platos desde un CSV o JSON subido por un administrador."""
+
+    def post(self, request):
+        es_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        if not es_administrador(request):
+            if es_ajax:
+                return JsonResponse({'error': 'Solo un administrador puede importar el menú.'}, status=403)
+            messages.error(request, "❌ Solo un administrador puede importar el menú.")
+            return redirect('platos_categorias')
+
+        archivo = request.FILES.get('archivo')
+        formato = detectar_formato(archivo.name) if archivo else None
+        if formato is None:
+            if es_ajax:
+                return JsonResponse({'error': 'Suba un archivo .csv o .json.'}, status=400)
+            messages.error(request, "❌ Suba un archivo .csv o .json.")
+            return redirect('platos_categorias')
+
+        # El archivo subido (en disco si es grande) se lee por lotes, nunca completo en memoria
+        reporte = importar_menu(archivo.file, formato)
+        if es_ajax:
+            return JsonResponse(reporte)
+        messages.success(
+            request,
+            f"✅ Menú importado: {reporte['creados']} platos nuevos, {reporte['actualizados']} actualizados, "
+            f"{reporte['categorias_creadas']} categorías nuevas."
+        )
+        for error in reporte['errores'][:10]:
+            messages.warning(request, f"⚠️ Fila {error['fila'] or '-'}: {error['error']}")
+        if len(reporte['errores']) > 10:
+            messages.warning(request, f"⚠️ ... y {len(reporte['errores']) - 10} filas más con errores.")
+        return redirect('platos_categorias')
+
+
 @method_decorator(login_required, name='dispatch')
 class EliminarPlatoView(View):
     def post(self, request, pk):
@@ -267,38 +426,40 @@ class EliminarPlatoView(View):
         messages.success(request, f"🗑️ Plato '{plato.nombre}' eliminado correctamente.")
         return redirect('platos_categorias')
     
-@login_required
-def obtener_plato(request, pk):
-    """Retorna los datos de un plato en formato JSON."""
-    plato = get_object_or_404(Plato, pk=pk)
-    data = {
-        'id': plato.id,
-        'nombre': plato.nombre,
-        'descripcion': plato.descripcion,
-        'precio': float(plato.precio),
-        'categoria': plato.categoria.id if plato.categoria else None,
-        'disponible': plato.disponible,
-    }
-    return JsonResponse(data)
+def _marca_menu(request):
+    # Una sola lectura de la versión por petición: ETag, Last-Modified y cuerpo usan la misma
+    if not hasattr(request, '_marca_menu'):
+        request._marca_menu = marca_menu()
+    return request._marca_menu
 
 
-@method_decorator(csrf_exempt, name='dispatch')
-class EditarPlatoView(LoginRequiredMixin, View):
-    def post(self, request):
-        plato_id = request.POST.get('plato_id')
-        plato = get_object_or_404(Plato, id=plato_id)
-        plato.nombre = request.POST.get('nombre')
-        plato.descripcion = request.POST.get('descripcion')
-        plato.precio = request.POST.get('precio')
-        plato.disponible = 'disponible' in request.POST
-        categoria_id = request.POST.get('categoria')
-        if categoria_id:
-            plato.categoria_id = categoria_id
-        if 'imagen' in request.FILES:
-            plato.imagen = request.FILES['imagen']
-        plato.save()
-        messages.success(request, f"✅ Plato '{plato.nombre}' actualizado correctamente.")
-        return JsonResponse({'success': True})
+def _etag_menu(request):
+    etag = _marca_menu(request)['etag']
+    desde = request.GET.get('since')
+    if desde:
+        # La respuesta con ?since= tiene otra forma: su ETag nunca coincide con el del menú completo
+        etag += '-' + hashlib.sha1(desde.encode()).hexdigest()[:12]
+    return etag
+
+
+def _modificado_menu(request):
+    return _marca_menu(request)['modificado']
+
+
+@login_required
+@require_GET
+@condition(etag_func=_etag_menu, last_modified_func=_modificado_menu)
+def menu_api(request):
+    """Menú completo (o solo lo cambiado con ?since=<marca>) en un JSON compacto con GET condicional."""
+    desde = request.GET.get('since')
+    if desde:
+        desde = parse_datetime(desde)
+        if desde is None:
+            return JsonResponse({'error': 'since debe ser una marca ISO 8601 devuelta por la API.'}, status=400)
+    respuesta = HttpResponse(menu_json(desde, _marca_menu(request)), content_type='application/json')
+    # Siempre revalidar: la respuesta 304 sale de la caché sin tocar la tabla de platos
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
 
 
 # ============================================================
@@ -308,28 +469,18 @@ class PedidosView(LoginRequiredMixin, View):
     """Vista principal para crear y gestionar pedidos."""
     
     def get(self, request):
-        # Obtiene todas las categorías con sus platos (optimiza con prefetch)
-        categorias = Categoria.objects.prefetch_related('platos').all()
+        # Menú precalculado (solo platos disponibles) servido desde la caché versionada
+        categorias = obtener_menu()
         # Lista las mesas en orden numérico
         mesas = Mesa.objects.all().order_by('numero')
-        # Obtiene el empleado asociado al usuario logueado (si existe)
-        empleado = Empleado.objects.filter(user=request.user).first()
 
         contexto = {
             "categorias": categorias,
             "mesas": mesas,
-            "empleado": empleado,
         }
 
         return render(request, "panel/pedidos.html", contexto)
     
-def empleado_context(request):
-    empleado = None
-    if request.user.is_authenticated:
-        empleado = Empleado.objects.filter(user=request.user).first()
-    return {'empleado': empleado}
-
-
 class CrearPedidoView(LoginRequiredMixin, View):
     """Guarda el pedido seleccionado desde la vista principal."""
     def post(self, request):
@@ -343,6 +494,14 @@ class CrearPedidoView(LoginRequiredMixin, View):
             messages.error(request, "Debe seleccionar una mesa y al menos un plato.")
             return redirect('pedidos')
 
+        # Valida todas las líneas juntas antes de tocar la base de datos
+        lineas = lineas_pedido(platos, cantidades)
+        if not lineas:
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'error': 'Las cantidades del pedido no son válidas.'}, status=400)
+            messages.error(request, "Las cantidades del pedido no son válidas.")
+            return redirect('pedidos')
+
         mesa = get_object_or_404(Mesa, id=mesa_id)
         if mesa.ocupada:
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -350,35 +509,23 @@ class CrearPedidoView(LoginRequiredMixin, View):
             messages.warning(request, f"La Mesa {mesa.numero} ya está ocupada.")
             return redirect('pedidos')
 
-        try:
-            with transaction.atomic():
-                pedido = Pedido.objects.create(
-                    mesa=mesa,
-                    mesero=request.user,
-                    estado='en_proceso',
-                    total=0
-                )
-
-                total = 0
-                for i, plato_id in enumerate(platos):
-                    plato = get_object_or_404(Plato, id=plato_id)
-                    cantidad = int(cantidades[i])
-                    subtotal = plato.precio * cantidad
-
-                    DetallePedido.objects.create(
-                        pedido=pedido,
-                        plato=plato,
-                        cantidad=cantidad,
-                        subtotal=subtotal
-                    )
-                    total += subtotal
-
-                pedido.total = total
-                pedido.save()
-
-                mesa.ocupada = True
-                mesa.save()
+        # Una sola consulta para todos los platos del pedido
+        platos_por_id = Plato.objects.select_related('categoria').in_bulk({plato_id for plato_id, _ in lineas})
+        faltantes = sorted({plato_id for plato_id, _ in lineas} - platos_por_id.keys())
+        if faltantes:
+            error = f"Platos inexistentes: {', '.join(map(str, faltantes))}."
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'error': error}, status=400)
+            messages.error(request, error)
+            return redirect('pedidos')
 
+        try:
+            pedido = registrar_pedido(mesa, request.user, lineas, platos_por_id)
+        except MesaOcupada:
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'error': f'La Mesa {mesa.numero} ya está ocupada.'}, status=409)
+            messages.warning(request, f"La Mesa {mesa.numero} ya está ocupada.")
+            return redirect('pedidos')
         except Exception as e:
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'error': str(e)}, status=500)
@@ -398,33 +545,123 @@ class CrearPedidoView(LoginRequiredMixin, View):
         messages.success(request, f"✅ Pedido #{pedido.id} creado para Mesa {mesa.numero}.")
         return redirect('mis_pedidos')
 
+class LotePedidosView(LoginRequiredMixin, View):
+    """Recibe de una vez los pedidos que el punto de venta encoló sin conexión (JSON).
+
+    Cada pedido trae una clave generada en el cliente; reenviar el lote no duplica pedidos.
+    """
+    def post(self, request):
+        try:
+            pedidos = leer_lote(request.body)
+        except ErrorLote as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'resultados': registrar_lote(pedidos, request.user)})
+
+
+# Las tarjetas de pedidos abiertos expiran; las de pedidos cerrados ya no cambian y no expiran
+TARJETA_TIMEOUT = 60 * 10
+
+
+def clave_tarjeta(pedido):
+    """Clave del fragmento {% cache %} de la tarjeta; ``secuencia`` cambia con cualquier modificación."""
+    return make_template_fragment_key('tarjeta_pedido', [pedido.pk, pedido.secuencia])
+
+
 class MisPedidosView(LoginRequiredMixin, View):
     """Lista los pedidos del mesero actual."""
     def get(self, request):
-        pedidos = Pedido.objects.filter(
-            mesero=request.user
-        ).select_related('mesa').prefetch_related('detallepedido_set__plato')
-        empleado = Empleado.objects.filter(user=request.user).first()
+        # Por defecto solo los pedidos abiertos de hoy; el historial se recorre por cursor
+        pedidos, filtros = filtrar_pedidos(Pedido.objects.filter(mesero=request.user), request.GET)
+        pedidos, siguiente = paginar_por_cursor(pedidos.select_related('mesa'), request.GET.get('cursor'))
+
+        # Las líneas solo se cargan para las tarjetas que no están ya renderizadas en la caché
+        claves = {pedido.pk: clave_tarjeta(pedido) for pedido in pedidos}
+        en_cache = cache.get_many(claves.values())
+        sin_cache = [pedido for pedido in pedidos if claves[pedido.pk] not in en_cache]
+        prefetch_related_objects(
+            sin_cache, Prefetch('detallepedido_set', queryset=DetallePedido.objects.order_by('id'))
+        )
+        for pedido in pedidos:
+            pedido.expira_tarjeta = None if pedido.estado == 'cerrado' else TARJETA_TIMEOUT
 
         return render(request, 'panel/mis_pedidos.html', {
             'pedidos': pedidos,
-            'empleado': empleado
+            'filtros': filtros,
+            'siguiente': siguiente,
+            'estados': Pedido.ESTADOS,
         })
 
 
 class CerrarPedidoView(LoginRequiredMixin, View):
     """Permite cerrar un pedido y liberar la mesa."""
     def post(self, request, pk):
-        pedido = get_object_or_404(Pedido, pk=pk)
-        pedido.estado = 'cerrado'
-        pedido.save()
+        pedido = get_object_or_404(Pedido.objects.select_related('mesa'), pk=pk)
+        try:
+            with transaction.atomic():
+                # Condicionado al estado leído: dos cierres simultáneos no cuentan el pedido dos veces
+                pedido.cambiar_estado(pedido.estado, 'cerrado')
+                publicar_pedido(pedido)
+                if pedido.mesa is not None:
+                    pedido.mesa.liberar()
+                    publicar_mesa(pedido.mesa)
+        except TransicionInvalida:
+            messages.warning(request, f"⚠️ El pedido #{pedido.id} ya estaba cerrado.")
+            return redirect('mis_pedidos')
+
+        if pedido.mesa is None:
+            messages.success(request, f"🧾 Pedido #{pedido.id} cerrado.")
+        else:
+            messages.success(request, f"🧾 Pedido #{pedido.id} cerrado y Mesa {pedido.mesa.numero} liberada.")
+        return redirect('mis_pedidos')
 
-        pedido.mesa.ocupada = False
-        pedido.mesa.save()
 
-        messages.success(request, f"🧾 Pedido #{pedido.id} cerrado y Mesa {pedido.mesa.numero} liberada.")
-        return redirect('mis_pedidos')
-    
+# ============================================================
+# 🔹 COCINA
+# ============================================================
+class CocinaView(LoginRequiredMixin, EmpleadoContextMixin, TemplateView):
+    """Pantalla de cocina: pedidos pendientes y en preparación, el más antiguo primero."""
+    template_name = 'panel/cocina.html'
+    login_url = '/login/'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['secuencia'], context['pedidos'] = cola_cocina()
+        return context
+
+
+class CambiarEstadoPedidoView(LoginRequiredMixin, View):
+    """Aplica una transición (``desde`` → ``hacia``) de la máquina de estados del pedido."""
+
+    def post(self, request, pk):
+        pedido = get_object_or_404(Pedido, pk=pk)
+        desde = request.POST.get('desde', '')
+        hacia = request.POST.get('hacia', '')
+        if hacia == 'cerrado':
+            # Cerrar también libera la mesa: se hace desde CerrarPedidoView
+            return JsonResponse({'error': 'El cierre se hace desde la vista de pedidos.'}, status=400)
+        try:
+            with transaction.atomic():
+                pedido.cambiar_estado(desde, hacia)
+                publicar_pedido(pedido)
+        except EstadoCambiado as e:
+            actual = Pedido.objects.filter(pk=pk).values_list('estado', flat=True).first()
+            return JsonResponse({'error': str(e), 'estado': actual}, status=409)
+        except TransicionInvalida as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'success': True, 'estado': pedido.estado, 'secuencia': pedido.secuencia})
+
+
+async def cocina_cambios(request):
+    """Long-poll: responde con los pedidos cambiados después de ``?desde=<secuencia>``."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    try:
+        desde = int(request.GET.get('desde', ''))
+    except ValueError:
+        return JsonResponse({'error': 'desde debe ser la secuencia devuelta por la cocina.'}, status=400)
+    cambios, secuencia = await esperar_cambios(desde)
+    return JsonResponse({'secuencia': secuencia, 'pedidos': cambios})
 
 
 #========================================
@@ -436,17 +673,12 @@ class PanelMesasView(LoginRequiredMixin, View):
     login_url = "/login/"
 
     def get(self, request):
-        # 👇 Agregá esta línea:
-        empleado = Empleado.objects.get(user=request.user)
-
         mesas = Mesa.objects.all().order_by("numero")
         return render(request, self.template_name, {
             "mesas": mesas,
-            "empleado": empleado  # 👈 agregado al contexto
         })
 
     def post(self, request):
-        empleado = Empleado.objects.get(user=request.user)  # también aquí si recargás la vista
         numero = request.POST.get("numero")
         if numero and not Mesa.objects.filter(numero=numero).exists():
             Mesa.objects.create(numero=numero)
@@ -455,13 +687,131 @@ class PanelMesasView(LoginRequiredMixin, View):
             messages.error(request, "⚠️ Ese número de mesa ya existe o es inválido.")
         return redirect("panel_mesas")
 
-def cambiar_estado_mesa(request, pk):
-    mesa = get_object_or_404(Mesa, pk=pk)
-    mesa.ocupada = not mesa.ocupada
-    mesa.save()
+async def stream_eventos(request):
+    """Server-Sent Events con los cambios de mesas y pedidos (solo se sirven por ASGI)."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        # Con WSGI (runserver, gunicorn síncrono) el flujo nunca termina y retiene un worker por
+        # cliente; 204 le indica a EventSource que no reconecte y la página sigue sin eventos
+        return HttpResponse(status=204)
+    try:
+        ultimo_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        ultimo_id = None
+    respuesta = StreamingHttpResponse(flujo_sse(hub.suscribir(ultimo_id)), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
+
+
+# ============================================================
+# 🔹 ENDPOINTS ASÍNCRONOS (ASGI)
+# ============================================================
+# Versiones nativas de los endpoints JSON más usados: con ASGI corren en el event loop y solo
+# pasan a un hilo para cada consulta del ORM. Sus equivalentes síncronos, que solo sirven de
+# referencia, viven en la URLconf de manage.py comparar_async, que mide ambas versiones.
+
+# Tramos que siguen siendo síncronos, cada uno en un solo salto de hilo:
+# transaction.atomic no funciona en código asíncrono, y el formulario normal de pedidos
+# responde con messages y redirect desde la vista de siempre.
+registrar_pedido_async = sync_to_async(registrar_pedido)
+_crear_pedido_formulario = sync_to_async(CrearPedidoView.as_view())
+
+
+@login_required
+async def obtener_plato_async(request, pk):
+    """Retorna los datos de un plato en formato JSON."""
+    plato = await aget_object_or_404(
+        Plato.objects.only('nombre', 'descripcion', 'precio', 'categoria_id', 'disponible'), pk=pk
+    )
+    return JsonResponse({
+        'id': plato.id,
+        'nombre': plato.nombre,
+        'descripcion': plato.descripcion,
+        'precio': float(plato.precio),
+        'categoria': plato.categoria_id,
+        'disponible': plato.disponible,
+    })
+
+
+@require_POST
+@login_required
+async def editar_plato_async(request):
+    plato = await aget_object_or_404(Plato, id=request.POST.get('plato_id'))
+    imagen, error = await sync_to_async(imagen_subida)(request)
+    if error:
+        return JsonResponse({'success': False, 'error': error}, status=400)
+    plato.nombre = request.POST.get('nombre')
+    plato.descripcion = request.POST.get('descripcion')
+    plato.precio = request.POST.get('precio')
+    plato.disponible = 'disponible' in request.POST
+    categoria_id = request.POST.get('categoria')
+    if categoria_id:
+        plato.categoria_id = categoria_id
+    if imagen:
+        plato.imagen = imagen
+    # save() completo: dispara la invalidación del menú y genera las variantes de una imagen nueva
+    await plato.asave()
+    messages.success(request, f"✅ Plato '{plato.nombre}' actualizado correctamente.")
+    return JsonResponse({'success': True})
+
+
+@require_POST
+@login_required
+async def cambiar_estado_mesa_async(request, pk):
+    # Alterna la mesa en el propio UPDATE (ocupada = NOT ocupada); sin transacción se publica el estado releído, que
+    # es el vigente aunque otra petición haya cambiado la mesa entre ambas consultas
+    cambiadas = await Mesa.objects.filter(pk=pk).aupdate(
+        ocupada=Case(When(ocupada=True, then=Value(False)), default=Value(True))
+    )
+    if not cambiadas:
+        raise Http404("Mesa no encontrada.")
+    mesa = await Mesa.objects.only('numero', 'ocupada').aget(pk=pk)
+    publicar_mesa_ahora(mesa)
     return JsonResponse({"success": True, "ocupada": mesa.ocupada})
 
 
+@require_POST
+@login_required
+async def crear_pedido_async(request):
+    """Rama AJAX de CrearPedidoView con el ORM asíncrono; el formulario normal usa la vista síncrona."""
+    if request.headers.get('x-requested-with') != 'XMLHttpRequest':
+        return await _crear_pedido_formulario(request)
+
+    mesa_id = request.POST.get('mesa')
+    platos = request.POST.getlist('platos')
+    if not mesa_id or not platos:
+        return JsonResponse({'error': 'Debe seleccionar una mesa y al menos un plato.'}, status=400)
+    lineas = lineas_pedido(platos, request.POST.getlist('cantidades'))
+    if not lineas:
+        return JsonResponse({'error': 'Las cantidades del pedido no son válidas.'}, status=400)
+
+    mesa = await aget_object_or_404(Mesa, id=mesa_id)
+    if mesa.ocupada:
+        return JsonResponse({'error': f'La Mesa {mesa.numero} ya está ocupada.'}, status=400)
+
+    platos_por_id = await Plato.objects.select_related('categoria').ain_bulk({plato_id for plato_id, _ in lineas})
+    faltantes = sorted({plato_id for plato_id, _ in lineas} - platos_por_id.keys())
+    if faltantes:
+        return JsonResponse({'error': f"Platos inexistentes: {', '.join(map(str, faltantes))}."}, status=400)
+
+    try:
+        pedido = await registrar_pedido_async(mesa, await request.auser(), lineas, platos_por_id)
+    except MesaOcupada:
+        return JsonResponse({'error': f'La Mesa {mesa.numero} ya está ocupada.'}, status=409)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({
+        'id': pedido.id,
+        'mesa': mesa.numero,
+        'total': pedido.total,
+        'estado': pedido.estado
+    })
+
+
 
 from django.shortcuts import redirect
 from django.views import View
@@ -471,7 +821,7 @@ from .models import Empleado
 class InicioView(LoginRequiredMixin, View):
     """Redirige según el rol del empleado después de iniciar sesión."""
     def get(self, request):
-        empleado = Empleado.objects.filter(user=request.user).first()
+        empleado = request.empleado
 
         if empleado:
             if empleado.cargo == "administrador":
@@ -481,3 +831,34 @@ class InicioView(LoginRequiredMixin, View):
 
         # Si no tiene cargo asignado
         return redirect("mis_pedidos")
+
+
+# ============================================================
+# 🔹 ESTÁTICOS Y MEDIA (producción, sin servidor web externo)
+# ============================================================
+@functools.cache
+def _estaticos_con_hash():
+    """Nombres con hash del manifest de collectstatic (vacío si el storage no usa manifest)."""
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+@require_safe
+def servir_estatico(request, ruta):
+    try:
+        archivo = safe_join(settings.STATIC_ROOT, ruta)
+    except SuspiciousFileOperation:
+        raise Http404
+    # Un nombre con hash no cambia de contenido: el navegador no vuelve a preguntar en un año
+    cache_control = CACHE_INMUTABLE if ruta in _estaticos_con_hash() else CACHE_REVALIDAR
+    return respuesta_archivo(request, archivo, cache_control, comprimidos=True)
+
+
+@require_safe
+def servir_media(request, ruta):
+    try:
+        archivo = safe_join(settings.MEDIA_ROOT, ruta)
+    except SuspiciousFileOperation:
+        raise Http404
+    # Las imágenes de platos se nombran por su contenido: la URL no cambia de bytes nunca
+    cache_control = CACHE_INMUTABLE if es_por_contenido(ruta) else CACHE_MEDIA
+    return respuesta_archivo(request, archivo, cache_control)